@@ -0,0 +1,3 @@
+'''
+benchmarks for the parser and the generators, see `run_benchmarks.py`
+'''
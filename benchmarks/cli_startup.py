@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+'''
+checks that `parse_tl_file.py` starts up quickly, by running `python -X importtime parse_tl_file.py --help`
+and adding up how long the imports took
+
+fails (exit code 1) if the imports take longer than the budget, or if any of the modules that should only
+be imported once a sub-command runs (like pyparsing and attrs) were imported just to parse the arguments
+'''
+
+# library imports
+import argparse
+import logging
+import pathlib
+import subprocess
+import sys
+import time
+import typing
+
+SCRIPT_PATH = pathlib.Path(__file__).resolve().parent.parent / "parse_tl_file.py"
+
+# the time all of the imports of `parse_tl_file.py --help` may take, in milliseconds
+DEFAULT_IMPORT_BUDGET_MS = 60.0
+
+# modules that must not be imported until a sub-command actually needs them
+DEFERRED_MODULES = ["pyparsing", "attr", "telegram_tl_parser.parser", "telegram_tl_parser.gen", "telegram_tl_parser.output"]
+
+logger = logging.getLogger("cli_startup")
+
+
+def measure_imports(argv:typing.Sequence[str]) -> typing.Tuple[float, typing.Set[str], float]:
+    '''
+    runs `parse_tl_file.py` with `-X importtime`
+
+    @param argv the arguments to run it with
+    @return the total time of the imports in milliseconds, the names of the modules that were imported,
+        and the wall time of the whole run in milliseconds
+    '''
+
+    start = time.perf_counter()
+
+    result = subprocess.run([sys.executable, "-X", "importtime", str(SCRIPT_PATH), *argv], capture_output=True, text=True)
+
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    total_us = 0
+    modules = set()
+
+    # lines look like `import time:       505 |      32244 | attr`, nested imports are indented
+    for iter_line in result.stderr.splitlines():
+
+        if not iter_line.startswith("import time:") or "cumulative" in iter_line:
+            continue
+
+        _, cumulative_us, name = iter_line.split("|")
+        modules.add(name.strip())
+
+        if not name.startswith("  "):
+            total_us += int(cumulative_us)
+
+    return total_us / 1000, modules, wall_ms
+
+
+def main(parsed_args:argparse.Namespace) -> int:
+
+    runs = [measure_imports(parsed_args.argv) for _ in range(parsed_args.repeat)]
+
+    import_ms = min(x[0] for x in runs)
+    wall_ms = min(x[2] for x in runs)
+    modules = set.union(*[x[1] for x in runs])
+
+    logger.info("`parse_tl_file.py %s`: imports took %.1f ms (budget %.1f ms), the whole run took %.1f ms",
+        " ".join(parsed_args.argv), import_ms, parsed_args.budget_ms, wall_ms)
+
+    failed = False
+
+    for iter_module in DEFERRED_MODULES:
+        if iter_module in modules:
+            logger.error("`%s` was imported, but it should only be imported once a sub-command needs it", iter_module)
+            failed = True
+
+    if import_ms > parsed_args.budget_ms:
+        logger.error("the imports took %.1f ms, which is over the budget of %.1f ms", import_ms, parsed_args.budget_ms)
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="checks how long `parse_tl_file.py` takes to import everything it needs to start")
+    parser.add_argument("--budget-ms", dest="budget_ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS,
+        help=f"the time the imports may take, in milliseconds, defaults to {DEFAULT_IMPORT_BUDGET_MS}")
+    parser.add_argument("--repeat", type=int, default=5, help="how many times to run it, the fastest run is kept")
+    parser.add_argument("argv", nargs="*", default=["--help"],
+        help="the arguments to run `parse_tl_file.py` with, defaults to `--help`")
+
+    logging.basicConfig(level="INFO", format="%(asctime)s %(name)-16s %(levelname)-8s: %(message)s")
+
+    sys.exit(main(parser.parse_args()))
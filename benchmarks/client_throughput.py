@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+'''
+measures how many calls per second the generated asyncio client can make against its in process
+fake transport, with thousands of calls waiting for a response at the same time
+
+the attrs classes (with the codecs) and the client are generated from the given TL file into a
+temporary directory first. The generated classes import `telegram_dl`, so it needs to be importable
+
+before anything is timed, it checks that the client keeps working after tdlib sends it a update it can't decode
+'''
+
+# library imports
+import argparse
+import asyncio
+import importlib
+import logging
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from telegram_tl_parser.parser import Parser
+from telegram_tl_parser.gen import Generator
+
+DEFAULT_TL_FILE_PATH = pathlib.Path(__file__).resolve().parent.parent / "docs" / "example_tl_files" / "td_api_gitrev-3b2c06e_2020-04-06.tl"
+
+logger = logging.getLogger("client_throughput")
+
+
+def generate_modules(tl_file_path:pathlib.Path, skip_n_lines:int, output_dir:pathlib.Path) -> None:
+
+    file_def = Parser().parse(tl_file_path, skip_n_lines, False)
+    gen = Generator()
+
+    with open(output_dir / "bench_classes.py", "w", encoding="utf-8") as f:
+        gen.write_attrs_classes(file_def, f, with_codecs=True)
+
+    with open(output_dir / "bench_client.py", "w", encoding="utf-8") as f:
+        gen.write_client(file_def, f, "bench_classes")
+
+
+def answer(request:dict) -> dict:
+
+    if request["@type"] == "testSquareInt":
+        return {"@type": "testInt", "value": request["x"] * request["x"]}
+
+    return {"@type": "ok"}
+
+
+async def check_bad_update_is_skipped(client_module, transport) -> None:
+    '''
+    pushes a update with a `@type` the generated classes don't know, and checks that a call made after it still
+    gets its response, so one bad message doesn't stop the client from receiving
+
+    @param client_module the generated client module
+    @param transport a `FakeTdlibTransport`, made outside of the running event loop on purpose
+    '''
+
+    updates = []
+
+    async with client_module.TdlibClient(transport, update_handler=updates.append) as client:
+
+        transport.push_update({"@type": "updateSomethingNew"})
+        transport.push_update({"@type": "ok"})
+
+        result = await asyncio.wait_for(client.testSquareInt(x=12), timeout=5)
+
+        if result.value != 144:
+            raise Exception(f"expected `testSquareInt(x=12)` to return 144 after a bad update, got `{result}`")
+
+        if len(updates) != 1:
+            raise Exception(f"expected only the update that could be decoded to be handled, got `{updates}`")
+
+
+async def run(client_module, concurrency:int, total_calls:int, function_name:str) -> float:
+
+    async with client_module.TdlibClient(client_module.FakeTdlibTransport(answer)) as client:
+
+        method = getattr(client, function_name)
+
+        async def worker(calls:int) -> None:
+            for iter_idx in range(calls):
+                if function_name == "testSquareInt":
+                    await method(x=iter_idx)
+                else:
+                    await method()
+
+        start = time.perf_counter()
+
+        await asyncio.gather(*[worker(total_calls // concurrency) for _ in range(concurrency)])
+
+        return time.perf_counter() - start
+
+
+def main(parsed_args:argparse.Namespace) -> None:
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+
+        generate_modules(parsed_args.tl_file_path, parsed_args.skip_n_lines, pathlib.Path(temp_dir))
+
+        sys.path.insert(0, temp_dir)
+        client_module = importlib.import_module("bench_client")
+
+        asyncio.run(check_bad_update_is_skipped(client_module, client_module.FakeTdlibTransport(answer)))
+        logger.info("the client kept working after a update it couldn't decode")
+
+        for iter_function_name in ("testCallEmpty", "testSquareInt"):
+            for iter_concurrency in parsed_args.concurrency:
+
+                total_calls = (parsed_args.calls // iter_concurrency) * iter_concurrency
+
+                seconds = asyncio.run(run(client_module, iter_concurrency, total_calls, iter_function_name))
+
+                logger.info("%-14s concurrency %6d: %8d calls in %.3fs, %10.0f calls/s",
+                    iter_function_name, iter_concurrency, total_calls, seconds, total_calls / seconds)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="benchmarks the generated asyncio client against the fake transport")
+    parser.add_argument("--tl-file-path", dest="tl_file_path", type=pathlib.Path, default=DEFAULT_TL_FILE_PATH)
+    parser.add_argument("--skip-n-lines", dest="skip_n_lines", type=int, default=14)
+    parser.add_argument("--calls", type=int, default=20000, help="the number of calls to make for each concurrency")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 100, 1000, 5000],
+        help="how many calls are waiting for a response at the same time")
+
+    logging.basicConfig(level="INFO", format="%(message)s")
+
+    main(parser.parse_args())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+'''
+measures what each `--comments` setting (see `TlCommentsMode`) costs: the time `Parser.parse` takes,
+the tracemalloc peak while parsing, and the size of the JSON (indented and compact) and the binary
+schema artifact that are generated from the result
+
+    python -m benchmarks.comment_modes
+    python -m benchmarks.comment_modes --scales 1 10 --engine fast
+
+the example TL file is always measured, plus synthetic TL files (see `synthetic_schema.py`) at the given scales
+'''
+
+# library imports
+import argparse
+import io
+import logging
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from telegram_tl_parser.parser import Parser
+from telegram_tl_parser.gen import Generator
+from telegram_tl_parser.model import TlParserEngine, TlCommentsMode
+import telegram_tl_parser.artifact as artifact
+
+from benchmarks.synthetic_schema import write_synthetic_schema, HEADER_LINE_COUNT
+
+DEFAULT_TL_FILE_PATH = pathlib.Path(__file__).resolve().parent.parent / "docs" / "example_tl_files" / "td_api_gitrev-3b2c06e_2020-04-06.tl"
+
+logger = logging.getLogger("comment_modes")
+
+
+def measure(tl_file_path:pathlib.Path,
+    skip_n_lines:int,
+    engine:TlParserEngine,
+    comments_mode:TlCommentsMode,
+    repeat:int) -> typing.Dict[str, float]:
+    '''
+    @param tl_file_path the TL file to parse
+    @param skip_n_lines how many lines to skip from the start of the file
+    @param engine the engine to parse with
+    @param comments_mode the TlCommentsMode to parse with
+    @param repeat how many times to parse, the fastest run is kept
+    @return a dict of the measurements
+    '''
+
+    parser = Parser(engine, comments=comments_mode)
+    gen = Generator()
+
+    best_seconds = None
+    file_def = None
+
+    for _ in range(repeat):
+
+        start = time.perf_counter()
+        file_def = parser.parse(tl_file_path, skip_n_lines, False)
+        seconds = time.perf_counter() - start
+
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+
+    # memory is measured in a separate run, since tracemalloc slows everything down
+    tracemalloc.start()
+    parser.parse(tl_file_path, skip_n_lines, False)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    json_out = io.StringIO()
+    gen.write_json(file_def, json_out)
+
+    compact_json_out = io.StringIO()
+    gen.write_json(file_def, compact_json_out, compact=True)
+
+    artifact_out = io.BytesIO()
+    artifact.write_schema_artifact(file_def, artifact_out)
+
+    return {
+        "parse_seconds": best_seconds,
+        "peak_bytes": peak_bytes,
+        "json_bytes": len(json_out.getvalue().encode("utf-8")),
+        "compact_json_bytes": len(compact_json_out.getvalue().encode("utf-8")),
+        "artifact_bytes": len(artifact_out.getvalue())}
+
+
+def main(parsed_args:argparse.Namespace) -> None:
+
+    engine = TlParserEngine(parsed_args.engine)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+
+        tl_files = [(parsed_args.tl_file_path.name, parsed_args.tl_file_path, parsed_args.skip_n_lines)]
+
+        for iter_scale in parsed_args.scales:
+            iter_path = pathlib.Path(temp_dir) / f"synthetic_{iter_scale}x.tl"
+            write_synthetic_schema(iter_path, iter_scale)
+            tl_files.append((f"synthetic {iter_scale}x", iter_path, HEADER_LINE_COUNT))
+
+        lines = [f"{'file':<40}  {'comments':<8}  {'parse (ms)':>10}  {'peak (KiB)':>10}  {'json (KiB)':>10}  " +
+            f"{'compact (KiB)':>13}  {'artifact (KiB)':>14}"]
+
+        for iter_name, iter_path, iter_skip_n_lines in tl_files:
+            for iter_mode in (TlCommentsMode.FULL, TlCommentsMode.NONE):
+
+                result = measure(iter_path, iter_skip_n_lines, engine, iter_mode, parsed_args.repeat)
+
+                lines.append(f"{iter_name:<40}  {iter_mode.value:<8}  {result['parse_seconds'] * 1000:>10.1f}  " +
+                    f"{result['peak_bytes'] / 1024:>10.0f}  {result['json_bytes'] / 1024:>10.0f}  " +
+                    f"{result['compact_json_bytes'] / 1024:>13.0f}  {result['artifact_bytes'] / 1024:>14.0f}")
+
+        logger.info("engine `%s`, best of %s:\n%s", engine.value, parsed_args.repeat, "\n".join(lines))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="measures the parse time and output size of each `--comments` setting")
+    parser.add_argument("--tl-file-path", dest="tl_file_path", type=pathlib.Path, default=DEFAULT_TL_FILE_PATH)
+    parser.add_argument("--skip-n-lines", dest="skip_n_lines", type=int, default=14)
+    parser.add_argument("--scales", type=int, nargs="*", default=[10], help="the scales of the synthetic TL files to measure as well")
+    parser.add_argument("--engine", choices=[x.value for x in TlParserEngine], default=TlParserEngine.PYPARSING.value)
+    parser.add_argument("--repeat", type=int, default=3, help="how many times to parse each file, the fastest run is kept")
+
+    logging.basicConfig(level="INFO", format="%(message)s")
+
+    main(parser.parse_args())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+'''
+checks that the `fast` engine (`TlScanner`) gives the same TlFileDefinition as the `pyparsing` engine (the
+reference implementation) for every TL file in `docs/example_tl_files`, and how many definitions per second
+each engine parses
+
+    python -m benchmarks.engine_equivalence
+    python -m benchmarks.engine_equivalence --repeat 5 --comments none
+
+each file is parsed with the number of lines it needs skipped, and once more with too many lines skipped, where
+both engines have to fail with a ParseException, as they do for a line that isn't valid TL. The `pyparsing` engine also parses each file with
+`--pyparsing-debug-logging` turned on, which has to give the same result. The exit code is 1 if anything disagrees
+'''
+
+# library imports
+import argparse
+import logging
+import pathlib
+import sys
+import tempfile
+import time
+import typing
+
+import pyparsing
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from telegram_tl_parser.parser import Parser
+from telegram_tl_parser.model import TlParserEngine, TlCommentsMode
+
+EXAMPLE_TL_FILES_DIR = pathlib.Path(__file__).resolve().parent.parent / "docs" / "example_tl_files"
+
+# the tdlib files start with the basic types, which are skipped, the others start with definitions
+TDLIB_SKIP_N_LINES = 14
+
+# a TL file with a line that neither engine can parse
+INVALID_TL_FILE_CONTENTS = "ok = Ok;\nthis is not a definition\n---functions---\n"
+
+logger = logging.getLogger("engine_equivalence")
+
+
+def skip_n_lines_for(tl_file_path:pathlib.Path) -> int:
+
+    return TDLIB_SKIP_N_LINES if tl_file_path.name.startswith("td_api_gitrev") else 0
+
+
+def time_parse(parser:Parser, tl_file_path:pathlib.Path, skip_n_lines:int, repeat:int) -> typing.Tuple[float, typing.Any]:
+    '''
+    @return a tuple of (the fastest time out of `repeat` runs, the TlFileDefinition)
+    '''
+
+    best_seconds = None
+    file_def = None
+
+    for _ in range(repeat):
+
+        start = time.perf_counter()
+        file_def = parser.parse(tl_file_path, skip_n_lines, False)
+        seconds = time.perf_counter() - start
+
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+
+    return (best_seconds, file_def)
+
+
+def parse_error(parser:Parser, tl_file_path:pathlib.Path, skip_n_lines:int) -> typing.Optional[str]:
+    '''
+    @return the name of the exception that parsing the file raised, or None if it didn't raise
+    '''
+
+    try:
+        parser.parse(tl_file_path, skip_n_lines, False)
+
+    except Exception as e:
+        return type(e).__name__
+
+    return None
+
+
+def main(parsed_args:argparse.Namespace) -> int:
+
+    comments_mode = TlCommentsMode(parsed_args.comments)
+
+    parsers = {x: Parser(x, comments=comments_mode) for x in (TlParserEngine.PYPARSING, TlParserEngine.FAST)}
+
+    lines = [f"{'file':<40}  {'definitions':>11}  {'pyparsing (defs/s)':>18}  {'fast (defs/s)':>13}  {'speedup':>7}  {'identical':>9}"]
+    mismatches = []
+
+    for iter_path in sorted(EXAMPLE_TL_FILES_DIR.glob("*.tl")):
+
+        skip_n_lines = skip_n_lines_for(iter_path)
+
+        seconds = dict()
+        file_defs = dict()
+
+        for iter_engine, iter_parser in parsers.items():
+            seconds[iter_engine], file_defs[iter_engine] = time_parse(iter_parser, iter_path, skip_n_lines, parsed_args.repeat)
+
+        reference = file_defs[TlParserEngine.PYPARSING]
+        identical = file_defs[TlParserEngine.FAST] == reference
+
+        if not identical:
+            mismatches.append(f"`{iter_path.name}`: the engines parsed different definitions")
+
+        definition_count = len(reference.types) + len(reference.functions)
+
+        lines.append(f"{iter_path.name:<40}  {definition_count:>11}  " +
+            f"{definition_count / seconds[TlParserEngine.PYPARSING]:>18.0f}  {definition_count / seconds[TlParserEngine.FAST]:>13.0f}  " +
+            f"{seconds[TlParserEngine.PYPARSING] / seconds[TlParserEngine.FAST]:>6.1f}x  {str(identical):>9}")
+
+        # the debug actions run for every match attempt, and must not change what is parsed
+        try:
+            debug_file_def = parsers[TlParserEngine.PYPARSING].parse(iter_path, skip_n_lines, True)
+
+            if debug_file_def != reference:
+                mismatches.append(f"`{iter_path.name}`: parsing with debug logging gave different definitions")
+
+        except Exception as e:
+            mismatches.append(f"`{iter_path.name}`: parsing with debug logging raised `{type(e).__name__}: {e}`")
+
+        # skipping more lines than the types section has has to fail the same way with both engines
+        too_many_lines = iter_path.read_text(encoding="utf-8").split("---functions---")[0].count("\n") + 2
+
+        errors = {x.value: parse_error(y, iter_path, too_many_lines) for x, y in parsers.items()}
+
+        if errors[TlParserEngine.PYPARSING.value] != pyparsing.ParseException.__name__ or len(set(errors.values())) != 1:
+            mismatches.append(f"`{iter_path.name}` skipping `{too_many_lines}` lines: the engines raised `{errors}`")
+
+    # a line that isn't valid TL has to fail the same way with both engines
+    with tempfile.TemporaryDirectory() as temp_dir:
+
+        invalid_path = pathlib.Path(temp_dir) / "invalid.tl"
+        invalid_path.write_text(INVALID_TL_FILE_CONTENTS, encoding="utf-8")
+
+        errors = {x.value: parse_error(y, invalid_path, 0) for x, y in parsers.items()}
+
+        if set(errors.values()) != {pyparsing.ParseException.__name__}:
+            mismatches.append(f"a line that isn't valid TL: the engines raised `{errors}`")
+
+    logger.info("comments `%s`, best of %s:\n%s", comments_mode.value, parsed_args.repeat, "\n".join(lines))
+
+    for iter_mismatch in mismatches:
+        logger.error("mismatch: %s", iter_mismatch)
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="checks that the `fast` engine parses the example TL files the same as the `pyparsing` engine")
+    parser.add_argument("--repeat", type=int, default=3, help="how many times to parse each file with each engine, the fastest run is kept")
+    parser.add_argument("--comments", choices=[x.value for x in TlCommentsMode], default=TlCommentsMode.FULL.value)
+
+    # the parser logs every file it parses at INFO
+    logging.basicConfig(level="WARNING", format="%(message)s")
+    logger.setLevel(logging.INFO)
+
+    sys.exit(main(parser.parse_args()))
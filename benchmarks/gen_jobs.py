@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+'''
+measures how long `Generator.write_attrs_classes` takes with different numbers of worker processes
+(`attrs --gen-jobs`), against synthetic TL files (see `synthetic_schema.py`), and checks that the output is
+byte for byte the same as rendering in this process
+
+    python -m benchmarks.gen_jobs
+    python -m benchmarks.gen_jobs --scales 10 100 --jobs 1 2 4 8 --with-codecs
+
+the times include starting the worker processes, since that is part of what `--gen-jobs` costs
+'''
+
+# library imports
+import argparse
+import io
+import logging
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import typing
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from telegram_tl_parser.parser import Parser
+from telegram_tl_parser.gen import Generator
+from telegram_tl_parser.model import TlParserEngine, TlCommentsMode
+
+from benchmarks.synthetic_schema import write_synthetic_schema, HEADER_LINE_COUNT
+
+logger = logging.getLogger("gen_jobs")
+
+
+def time_render(gen:Generator, file_def, with_codecs:bool, jobs:int, repeat:int) -> typing.Tuple[float, str]:
+    '''
+    @return a tuple of (the fastest time out of `repeat` runs, the rendered module)
+    '''
+
+    best_seconds = None
+    rendered = None
+
+    for _ in range(repeat):
+
+        out = io.StringIO()
+
+        start = time.perf_counter()
+        gen.write_attrs_classes(file_def, out, with_codecs=with_codecs, jobs=jobs)
+        seconds = time.perf_counter() - start
+
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+        rendered = out.getvalue()
+
+    return (best_seconds, rendered)
+
+
+def main(parsed_args:argparse.Namespace) -> None:
+
+    gen = Generator()
+
+    lines = [f"{'scale':>5}  {'definitions':>11}  {'jobs':>4}  {'render (ms)':>11}  {'speedup':>7}  {'identical':>9}"]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+
+        for iter_scale in parsed_args.scales:
+
+            tl_file_path = pathlib.Path(temp_dir) / f"synthetic_{iter_scale}x.tl"
+            write_synthetic_schema(tl_file_path, iter_scale)
+
+            # the attrs classes don't use the comments, so don't spend time on them
+            file_def = Parser(TlParserEngine.FAST, comments=TlCommentsMode.NONE).parse(tl_file_path, HEADER_LINE_COUNT, False)
+
+            definition_count = len(file_def.types) + len(file_def.functions)
+
+            serial_seconds, serial_rendered = time_render(gen, file_def, parsed_args.with_codecs, 1, parsed_args.repeat)
+
+            for iter_jobs in parsed_args.jobs:
+
+                if iter_jobs == 1:
+                    seconds, rendered = serial_seconds, serial_rendered
+                else:
+                    seconds, rendered = time_render(gen, file_def, parsed_args.with_codecs, iter_jobs, parsed_args.repeat)
+
+                lines.append(f"{iter_scale:>5}  {definition_count:>11}  {iter_jobs:>4}  {seconds * 1000:>11.1f}  " +
+                    f"{serial_seconds / seconds:>6.2f}x  {str(rendered == serial_rendered):>9}")
+
+                if rendered != serial_rendered:
+                    logger.error("the output with `%s` jobs is different from the serial output", iter_jobs)
+
+    logger.info("with codecs: %s, %s CPUs, best of %s:\n%s",
+        parsed_args.with_codecs, os.cpu_count(), parsed_args.repeat, "\n".join(lines))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="benchmarks rendering the attrs classes with a pool of worker processes")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100], help="the scales of the synthetic TL files")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4], help="the numbers of worker processes to try")
+    parser.add_argument("--with-codecs", dest="with_codecs", action="store_true", help="render the tdlib JSON encoders and decoders as well")
+    parser.add_argument("--repeat", type=int, default=3, help="how many times to render for each number of jobs, the fastest run is kept")
+
+    logging.basicConfig(level="WARNING", format="%(message)s")
+    logger.setLevel(logging.INFO)
+
+    main(parser.parse_args())
@@ -0,0 +1,750 @@
+#!/usr/bin/env python3
+
+'''
+runs the benchmarks against synthetic TL files (see `synthetic_schema.py`) at a few scales, writes the
+results as JSON, and optionally compares them to the results of an earlier run, failing if the throughput
+of any benchmark dropped by more than the allowed amount
+
+    python -m benchmarks.run_benchmarks --results-path results.json
+    python -m benchmarks.run_benchmarks --results-path new.json --baseline-path results.json --max-regression 0.15
+
+the benchmarks are:
+
+* `parse`: parsing the types and functions sections, in TL lines per second
+* `build model`: turning the parse results into a TlFileDefinition, in definitions per second
+* `serial parse`: all of `Parser.parse` in this process, in TL lines per second
+* `parallel parse`: all of `Parser.parse` with `--jobs` worker processes (`Parser.parse(workers=N)`), in TL lines
+  per second, the speedup over `serial parse` is logged as well
+* `memory`: the tracemalloc peak while parsing, and how much the TlFileDefinition holds on to once parsing is
+  done, in bytes. This is compared to the baseline too, where using more memory counts as the regression
+* `json`: `Generator.write_json`, in definitions per second
+* `json compact`: `Generator.write_json(compact=True)`, in definitions per second
+* `json asdict`: the JSON encoded the way it was before `TlJsonEncoder`, with `attr.asdict` and `json.dumps`, in
+  definitions per second. Its output has to be the same as `json`'s, and the speedup of `json` over it is logged
+* `attrs`: `Generator.write_attrs_classes`, in definitions per second
+* `codecs decode` / `codecs encode`: the generated `decode_tdlib_object` and `to_tdlib_dict` (`attrs --with-codecs`) on
+  `CODEC_CORPUS_SIZE` random tdlib objects, in objects per second. Encoding what was decoded has to give back the
+  same dicts
+* `codecs reflection`: decoding the same objects with `typing.get_type_hints`, which is what a runtime without the
+  generated codecs has to do, in objects per second. The speedup of `codecs decode` over it is logged
+* `import`: importing the generated attrs module in a new interpreter, in definitions per second.
+  The generated module imports `telegram_dl`, so this is skipped if that can't be imported
+* `package import`: importing the package `Generator.write_attrs_package` writes in a new interpreter, in
+  definitions per second, so it can be compared to `import` directly. Skipped like `import`
+* `package classes`: the same as `package import`, plus using `PACKAGE_CLASS_COUNT` classes spread across the
+  package, so their submodules are imported too, in definitions per second
+
+the throughput of `parse` and `build model` should stay about the same as the file gets bigger, so the exit code
+is also 1 if their throughput at any scale is more than `--max-scaling-drop` lower than at the smallest scale
+'''
+
+# library imports
+import argparse
+import base64
+import compileall
+import datetime
+import decimal
+import enum
+import gc
+import importlib.util
+import io
+import json
+import logging
+import os
+import pathlib
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+import typing
+
+import attr
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from telegram_tl_parser.parser import Parser
+from telegram_tl_parser.gen import Generator
+from telegram_tl_parser.model import TlParserEngine, TlFileDefinition, TlClassTypeEnum
+import telegram_tl_parser.stats as stats
+
+from benchmarks.synthetic_schema import write_synthetic_schema, HEADER_LINE_COUNT, BASIC_TYPES
+
+logger = logging.getLogger("run_benchmarks")
+
+# bump this whenever the results file changes in a way that makes it incomparable to older ones
+RESULTS_VERSION = 1
+
+BENCHMARK_NAMES = ["parse", "build model", "serial parse", "parallel parse", "memory", "json", "json compact", "json asdict", "attrs", "codecs decode", "codecs encode",
+    "codecs reflection", "import", "package import",
+    "package classes"]
+
+DEFAULT_SCALES = [1, 10, 100]
+
+# the benchmarks that need the attrs classes generated with the codecs
+CODEC_BENCHMARK_NAMES = ["codecs decode", "codecs encode", "codecs reflection"]
+
+# how many tdlib objects the codec benchmarks decode and encode
+CODEC_CORPUS_SIZE = 5000
+
+# how deep objects are nested inside the objects of the codec benchmarks
+CODEC_MAX_DEPTH = 3
+
+# how many classes the `package classes` benchmark uses after importing the package
+PACKAGE_CLASS_COUNT = 30
+
+# the benchmarks whose throughput shouldn't depend on the size of the file, see `check_scaling`
+LINEAR_BENCHMARK_NAMES = ["parse", "build model"]
+
+# the phases of `Parser.parse` that make up each benchmark
+PARSE_PHASES = ["parse types section", "parse functions section"]
+BUILD_MODEL_PHASES = ["build model", "infer abstract types"]
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class BenchmarkResult:
+
+    benchmark:str = attr.ib()
+    scale:int = attr.ib()
+
+    # the fastest of the repeats
+    seconds:float = attr.ib()
+
+    # how many `unit`s were processed
+    items:int = attr.ib()
+    unit:str = attr.ib()
+
+    @property
+    def throughput(self) -> float:
+        ''' `unit`s per second '''
+
+        return self.items / self.seconds if self.seconds > 0 else float("inf")
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+
+        return dict(attr.asdict(self), throughput=self.throughput)
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class MemoryResult:
+
+    scale:int = attr.ib()
+
+    # the tracemalloc peak while parsing
+    peak_bytes:int = attr.ib()
+
+    # what is still allocated once parsing is done, which is what the TlFileDefinition holds on to
+    retained_bytes:int = attr.ib()
+
+    definitions:int = attr.ib()
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+
+        return attr.asdict(self)
+
+
+def _measure_parse_memory(parser:Parser, tl_file_path:pathlib.Path) -> typing.Tuple[int, int]:
+    '''
+    parses the file with tracemalloc running, the grammar should already be built so it isn't counted
+
+    @return a tuple of (the peak bytes while parsing, the bytes still allocated once parsing is done)
+    '''
+
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        start_bytes = tracemalloc.get_traced_memory()[0]
+
+        file_def = parser.parse(tl_file_path, HEADER_LINE_COUNT, False)
+
+        gc.collect()
+        current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+
+    finally:
+        tracemalloc.stop()
+
+    # keep the result alive until it has been measured
+    del file_def
+
+    return (peak_bytes - start_bytes, current_bytes - start_bytes)
+
+
+def _json_via_asdict(file_def:TlFileDefinition) -> str:
+    '''
+    encodes the TlFileDefinition the way `Generator.write_json` did before `TlJsonEncoder`, which is the reference
+    its indented output has to match
+    '''
+
+    def json_default(obj:typing.Any) -> typing.Any:
+
+        if isinstance(obj, enum.Enum):
+            return obj.value
+
+        raise TypeError(f"can't handle a object of type `{type(obj)}`")
+
+    root_obj = {
+        "__version__": Generator.VERSION,
+        "tl_file_definition": attr.asdict(file_def, recurse=True, filter=lambda attribute, value: attribute.init)}
+
+    return json.dumps(root_obj, indent=Generator.INDENTATION, default=json_default)
+
+
+def _import_generated_module(module_dir:pathlib.Path, module_name:str) -> types.ModuleType:
+    '''
+    imports a module that was generated into `module_dir` into this interpreter
+    '''
+
+    spec = importlib.util.spec_from_file_location(module_name, module_dir / f"{module_name}.py")
+    module = importlib.util.module_from_spec(spec)
+
+    # attrs and `typing.get_type_hints` look the module up by name
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+
+    return module
+
+
+def _codec_corpus(file_def:TlFileDefinition, codecs_module:types.ModuleType, size:int) -> typing.List[typing.Dict[str, typing.Any]]:
+    '''
+    makes random tdlib objects, as they would be decoded from tdlib's JSON, out of the concrete types of the file
+
+    @param file_def the TlFileDefinition the module was generated from
+    @param codecs_module the generated module, its `TDLIB_FIELD_TABLES` says what fields each object has
+    @param size how many objects to make
+    @return the objects
+    '''
+
+    rng = random.Random(0)
+
+    concrete_types:typing.Dict[str, typing.List[str]] = dict()
+
+    for iter_type in file_def.types:
+        if iter_type.class_type == TlClassTypeEnum.CONCRETE:
+            concrete_types.setdefault(iter_type.extends_from, []).append(iter_type.class_name)
+
+    def make_value(tl_type:str, depth:int) -> typing.Any:
+
+        base_type = tl_type.replace("vector<", "").rstrip(">")
+
+        # the synthetic files have a few parameters whose type isn't defined anywhere, those are left null (or empty)
+        if base_type not in BASIC_TYPES and base_type not in concrete_types and base_type not in codecs_module.TDLIB_FIELD_TABLES:
+            return [] if tl_type.startswith("vector<") else None
+
+        if tl_type.startswith("vector<"):
+            return [] if depth >= CODEC_MAX_DEPTH else [make_value(tl_type[len("vector<"):-1], depth + 1) for _ in range(2)]
+
+        if tl_type in ("int32", "int53"):
+            return rng.randint(0, 1 << 30)
+        if tl_type == "int64":
+            return str(rng.randint(0, 1 << 62))
+        if tl_type == "double":
+            return rng.random()
+        if tl_type == "string":
+            return "hello world"
+        if tl_type == "Bool":
+            return rng.random() < 0.5
+        if tl_type == "bytes":
+            return base64.b64encode(b"\x00\x01abc").decode("ascii")
+
+        if depth >= CODEC_MAX_DEPTH:
+            return None
+
+        return make_object(rng.choice(concrete_types[tl_type]) if tl_type in concrete_types else tl_type, depth + 1)
+
+    def make_object(type_name:str, depth:int) -> typing.Dict[str, typing.Any]:
+
+        result = {"@type": type_name}
+
+        for iter_field_name, iter_tl_type in codecs_module.TDLIB_FIELD_TABLES[type_name]:
+            result[iter_field_name] = make_value(iter_tl_type, depth)
+
+        return result
+
+    all_concrete_types = sorted(x for y in concrete_types.values() for x in y)
+
+    return [make_object(rng.choice(all_concrete_types), 0) for _ in range(size)]
+
+
+def _reflection_decode(codecs_module:types.ModuleType, d:typing.Mapping[str, typing.Any]) -> typing.Any:
+    '''
+    decodes a tdlib object by looking at the type hints of its class, rather than with the generated codecs
+
+    the hints are evaluated a field at a time, like `typing.get_type_hints` would, but only for the fields that
+    aren't null or empty, since the synthetic files have a few parameters whose type isn't defined anywhere (see
+    `_codec_corpus`), which `typing.get_type_hints` can't evaluate
+    '''
+
+    cls = codecs_module.tdlib_gen_locals[d["@type"]]
+
+    def decode_value(hint:typing.Any, value:typing.Any) -> typing.Any:
+
+        if value is None or value == []:
+            return value
+
+        if isinstance(hint, str):
+            hint = eval(hint, codecs_module.tdlib_gen_globals, codecs_module.tdlib_gen_locals)
+
+        if typing.get_origin(hint) is not None:
+            (inner_hint,) = typing.get_args(hint)
+            return [decode_value(inner_hint, x) for x in value]
+
+        if hint is int:
+            return int(value)
+        if hint is decimal.Decimal:
+            return decimal.Decimal(str(value))
+        if hint is bytes:
+            return base64.b64decode(value)
+        if hint in (str, bool):
+            return value
+
+        return _reflection_decode(codecs_module, value)
+
+    return cls(**{x.name: decode_value(x.type, d.get(x.name)) for x in attr.fields(cls) if x.name != "_extra"})
+
+
+def _run_codec_benchmarks(file_def:TlFileDefinition,
+    gen:Generator,
+    benchmarks:typing.Sequence[str],
+    repeat:int,
+    module_dir:pathlib.Path,
+    module_name:str,
+    record:typing.Callable[[str, float], None]) -> int:
+    '''
+    runs the `CODEC_BENCHMARK_NAMES` benchmarks, see the module docstring
+
+    @return the number of objects that were decoded and encoded
+    '''
+
+    with open(module_dir / f"{module_name}.py", "w", encoding="utf-8") as f:
+        gen.write_attrs_classes(file_def, f, with_codecs=True)
+
+    codecs_module = _import_generated_module(module_dir, module_name)
+
+    corpus = _codec_corpus(file_def, codecs_module, CODEC_CORPUS_SIZE)
+
+    for _ in range(repeat):
+
+        start = time.perf_counter()
+        decoded = [codecs_module.decode_tdlib_object(x) for x in corpus]
+        record("codecs decode", time.perf_counter() - start)
+
+        if "codecs encode" in benchmarks:
+            start = time.perf_counter()
+            encoded = [x.to_tdlib_dict() for x in decoded]
+            record("codecs encode", time.perf_counter() - start)
+
+            if encoded != corpus:
+                raise Exception(f"encoding the decoded objects of `{module_name}` didn't give back the same dicts")
+
+        if "codecs reflection" in benchmarks:
+            start = time.perf_counter()
+            reflected = [_reflection_decode(codecs_module, x) for x in corpus]
+            record("codecs reflection", time.perf_counter() - start)
+
+            if reflected != decoded:
+                raise Exception(f"decoding with reflection and with the codecs of `{module_name}` gave different objects")
+
+    return len(corpus)
+
+
+def _time_import(module_dir:pathlib.Path, module_name:str, class_names:typing.Sequence[str]=()) -> float:
+    '''
+    imports the module in a new interpreter, and returns how long the import took
+
+    @param module_dir the directory the module (or package) is in
+    @param module_name the name of the module (or package)
+    @param class_names the names of classes to get from the module after importing it, this is timed as well
+    '''
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(module_dir)] + [x for x in [env.get("PYTHONPATH")] if x])
+
+    code = f"import time; start = time.perf_counter(); import {module_name}; " + \
+        f"[getattr({module_name}, x) for x in {list(class_names)!r}]; print(time.perf_counter() - start)"
+
+    result = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True)
+
+    return float(result.stdout.strip())
+
+
+def run_scale(scale:int,
+    benchmarks:typing.Sequence[str],
+    repeat:int,
+    engine:TlParserEngine,
+    jobs:int,
+    work_dir:pathlib.Path) -> typing.Tuple[typing.List[BenchmarkResult], typing.Optional[MemoryResult]]:
+    '''
+    runs the benchmarks against a synthetic TL file at the given scale
+
+    @param scale the scale of the synthetic TL file
+    @param benchmarks the names of the benchmarks to run
+    @param repeat how many times to run each benchmark, the fastest run is kept
+    @param engine the engine to parse with
+    @param jobs the number of worker processes for the `parallel parse` benchmark
+    @param work_dir where the synthetic TL file and the generated module are written
+    @return a tuple of (the results, the result of the `memory` benchmark or None if it wasn't run)
+    '''
+
+    tl_file_path = work_dir / f"synthetic_{scale}x.tl"
+    write_synthetic_schema(tl_file_path, scale)
+
+    with open(tl_file_path, "r", encoding="utf-8") as f:
+        line_count = sum(1 for _ in f) - HEADER_LINE_COUNT
+
+    parser = Parser(engine)
+    gen = Generator()
+
+    best:typing.Dict[str, float] = dict()
+
+    def record(name:str, seconds:float) -> None:
+        best[name] = min(seconds, best.get(name, seconds))
+
+    file_def = None
+
+    for _ in range(repeat):
+
+        run_stats = stats.RunStats(track_memory=False)
+
+        start = time.perf_counter()
+        file_def = parser.parse(tl_file_path, HEADER_LINE_COUNT, False, run_stats=run_stats)
+        record("serial parse", time.perf_counter() - start)
+
+        record("parse", sum(run_stats.phases[x].wall_seconds for x in PARSE_PHASES))
+        record("build model", sum(run_stats.phases[x].wall_seconds for x in BUILD_MODEL_PHASES))
+
+        if "json" in benchmarks:
+            start = time.perf_counter()
+            gen.write_json(file_def, io.StringIO())
+            record("json", time.perf_counter() - start)
+
+        if "json compact" in benchmarks:
+            start = time.perf_counter()
+            gen.write_json(file_def, io.StringIO(), compact=True)
+            record("json compact", time.perf_counter() - start)
+
+        if "json asdict" in benchmarks:
+            start = time.perf_counter()
+            _json_via_asdict(file_def)
+            record("json asdict", time.perf_counter() - start)
+
+        if "attrs" in benchmarks:
+            start = time.perf_counter()
+            gen.write_attrs_classes(file_def, io.StringIO())
+            record("attrs", time.perf_counter() - start)
+
+    definition_count = len(file_def.types) + len(file_def.functions)
+
+    if "json asdict" in benchmarks:
+
+        if _json_via_asdict(file_def) != gen.tl_file_definition_to_json(file_def):
+            raise Exception(f"the JSON of the {scale}x file isn't the same as what `attr.asdict` and `json.dumps` give")
+
+        if "json" in benchmarks:
+            logger.info("%-17s %4sx: %.2f times as fast as `attr.asdict` and `json.dumps`", "json", scale, best["json asdict"] / best["json"])
+
+    memory_result = None
+
+    if "memory" in benchmarks:
+
+        peak_bytes, retained_bytes = _measure_parse_memory(parser, tl_file_path)
+
+        memory_result = MemoryResult(scale=scale, peak_bytes=peak_bytes, retained_bytes=retained_bytes, definitions=definition_count)
+
+    if "parallel parse" in benchmarks:
+
+        for _ in range(repeat):
+
+            start = time.perf_counter()
+            parallel_file_def = parser.parse(tl_file_path, HEADER_LINE_COUNT, False, workers=jobs)
+            record("parallel parse", time.perf_counter() - start)
+
+            if parallel_file_def != file_def:
+                raise Exception(f"parsing the {scale}x file with `{jobs}` workers gave a different result than parsing it in this process")
+
+        logger.info("%-17s %4sx: %.2f times as fast as the serial parse with `%s` workers on `%s` CPUs",
+            "parallel parse", scale, best["serial parse"] / best["parallel parse"], jobs, os.cpu_count())
+
+    codec_object_count = 0
+
+    if any(x in CODEC_BENCHMARK_NAMES for x in benchmarks):
+
+        if importlib.util.find_spec("telegram_dl") is None:
+            logger.warning("skipping the codec benchmarks, as the generated module imports `telegram_dl`, which isn't installed")
+
+        else:
+            codec_object_count = _run_codec_benchmarks(file_def, gen, benchmarks, repeat, work_dir, f"synthetic_{scale}x_codecs", record)
+
+            if "codecs reflection" in benchmarks:
+                logger.info("%-17s %4sx: %.2f times as fast as decoding with reflection", "codecs decode", scale,
+                    best["codecs reflection"] / best["codecs decode"])
+
+    if "import" in benchmarks:
+
+        if importlib.util.find_spec("telegram_dl") is None:
+            logger.warning("skipping the `import` benchmark, as the generated module imports `telegram_dl`, which isn't installed")
+
+        else:
+            module_name = f"synthetic_{scale}x"
+
+            with open(work_dir / f"{module_name}.py", "w", encoding="utf-8") as f:
+                gen.write_attrs_classes(file_def, f)
+
+            # the first import compiles the module, which isn't what we want to measure
+            _time_import(work_dir, module_name)
+
+            for _ in range(repeat):
+                record("import", _time_import(work_dir, module_name))
+
+    if "package import" in benchmarks or "package classes" in benchmarks:
+
+        if importlib.util.find_spec("telegram_dl") is None:
+            logger.warning("skipping the package benchmarks, as the generated package imports `telegram_dl`, which isn't installed")
+
+        else:
+            package_name = f"synthetic_{scale}x_package"
+
+            gen.write_attrs_package(file_def, work_dir / package_name)
+
+            # every so many of the concrete types, so they come from all over the package
+            concrete_type_names = sorted(x.class_name for x in file_def.types if x.class_type == TlClassTypeEnum.CONCRETE)
+            class_names = concrete_type_names[::max(1, len(concrete_type_names) // PACKAGE_CLASS_COUNT)][:PACKAGE_CLASS_COUNT]
+
+            # compiling the package isn't what we want to measure, and only the submodules that are used get compiled on import
+            compileall.compile_dir(work_dir / package_name, quiet=1)
+
+            for _ in range(repeat):
+
+                if "package import" in benchmarks:
+                    record("package import", _time_import(work_dir, package_name))
+
+                if "package classes" in benchmarks:
+                    record("package classes", _time_import(work_dir, package_name, class_names))
+
+            if "import" in best and "package import" in best:
+                logger.info("%-17s %4sx: %.1f times as fast as importing the single module", "package import", scale,
+                    best["import"] / best["package import"])
+
+    units = {
+        "parse": ("TL lines", line_count),
+        "serial parse": ("TL lines", line_count),
+        "parallel parse": ("TL lines", line_count),
+        "codecs decode": ("objects", codec_object_count),
+        "codecs encode": ("objects", codec_object_count),
+        "codecs reflection": ("objects", codec_object_count)}
+
+    results = []
+
+    for iter_name in benchmarks:
+
+        if iter_name not in best:
+            continue
+
+        unit, items = units.get(iter_name, ("definitions", definition_count))
+
+        results.append(BenchmarkResult(benchmark=iter_name, scale=scale, seconds=best[iter_name], items=items, unit=unit))
+
+    return (results, memory_result)
+
+
+def check_scaling(results:typing.Sequence[BenchmarkResult], max_scaling_drop:float) -> typing.List[str]:
+    '''
+    compares the throughput of each benchmark at every scale to its throughput at the smallest scale, for the
+    benchmarks in `LINEAR_BENCHMARK_NAMES` a big drop means the work grows faster than the size of the file
+
+    @param results the results of this run
+    @param max_scaling_drop how much lower (as a fraction) the throughput at a bigger scale can be before it
+        counts as not scaling linearly
+    @return a description of every benchmark that didn't scale linearly, empty if they all did
+    '''
+
+    smallest_results:typing.Dict[str, BenchmarkResult] = dict()
+
+    for iter_result in results:
+        if iter_result.benchmark not in smallest_results or iter_result.scale < smallest_results[iter_result.benchmark].scale:
+            smallest_results[iter_result.benchmark] = iter_result
+
+    problems = []
+
+    for iter_result in results:
+
+        smallest_result = smallest_results[iter_result.benchmark]
+
+        if iter_result.scale == smallest_result.scale:
+            continue
+
+        ratio = iter_result.throughput / smallest_result.throughput
+
+        logger.info("%-17s %4sx: %.2f times the throughput at %sx", iter_result.benchmark, iter_result.scale,
+            ratio, smallest_result.scale)
+
+        if iter_result.benchmark in LINEAR_BENCHMARK_NAMES and ratio < 1 - max_scaling_drop:
+            problems.append(f"`{iter_result.benchmark}` at {iter_result.scale}x: {iter_result.throughput:.0f} {iter_result.unit}/s " +
+                f"is {(1 - ratio) * 100:.1f}% lower than the {smallest_result.throughput:.0f} {iter_result.unit}/s at {smallest_result.scale}x")
+
+    return problems
+
+
+def compare_results(results:typing.Sequence[BenchmarkResult],
+    memory_results:typing.Sequence[MemoryResult],
+    baseline:typing.Dict[str, typing.Any],
+    max_regression:float) -> typing.List[str]:
+    '''
+    compares the results to a earlier run
+
+    @param results the results of this run
+    @param memory_results the results of the `memory` benchmark of this run
+    @param baseline the decoded results file of the earlier run
+    @param max_regression how much lower (as a fraction, so 0.1 is 10%) the throughput of a benchmark
+        can be than in the baseline before it counts as a regression, or how much higher the memory use
+    @return a description of every regression, empty if there aren't any
+    '''
+
+    if baseline.get("__version__") != RESULTS_VERSION:
+        raise Exception(f"the baseline is results version `{baseline.get('__version__')}`, but this is version `{RESULTS_VERSION}`")
+
+    baseline_throughputs = {(x["benchmark"], x["scale"]): x["throughput"] for x in baseline["results"]}
+
+    regressions = []
+
+    for iter_result in results:
+
+        baseline_throughput = baseline_throughputs.get((iter_result.benchmark, iter_result.scale))
+
+        if baseline_throughput is None:
+            logger.info("`%s` at %sx isn't in the baseline, not comparing it", iter_result.benchmark, iter_result.scale)
+            continue
+
+        change = iter_result.throughput / baseline_throughput - 1
+
+        logger.info("%-17s %4sx: %+.1f%% compared to the baseline", iter_result.benchmark, iter_result.scale, change * 100)
+
+        if change < -max_regression:
+            regressions.append(f"`{iter_result.benchmark}` at {iter_result.scale}x: {iter_result.throughput:.0f} {iter_result.unit}/s " +
+                f"is {-change * 100:.1f}% lower than the baseline's {baseline_throughput:.0f} {iter_result.unit}/s")
+
+    baseline_memory = {x["scale"]: x for x in baseline.get("memory", [])}
+
+    for iter_result in memory_results:
+
+        baseline_result = baseline_memory.get(iter_result.scale)
+
+        if baseline_result is None:
+            logger.info("`memory` at %sx isn't in the baseline, not comparing it", iter_result.scale)
+            continue
+
+        for iter_field in ("peak_bytes", "retained_bytes"):
+
+            change = getattr(iter_result, iter_field) / baseline_result[iter_field] - 1
+
+            logger.info("%-17s %4sx: %s %+.1f%% compared to the baseline", "memory", iter_result.scale, iter_field, change * 100)
+
+            if change > max_regression:
+                regressions.append(f"`memory` at {iter_result.scale}x: {iter_field} of {getattr(iter_result, iter_field)} " +
+                    f"is {change * 100:.1f}% higher than the baseline's {baseline_result[iter_field]}")
+
+    return regressions
+
+
+def main(parsed_args:argparse.Namespace) -> int:
+
+    results:typing.List[BenchmarkResult] = []
+    memory_results:typing.List[MemoryResult] = []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+
+        for iter_scale in parsed_args.scales:
+
+            logger.info("running the benchmarks at %sx", iter_scale)
+
+            scale_results, memory_result = run_scale(iter_scale, parsed_args.benchmarks, parsed_args.repeat,
+                TlParserEngine(parsed_args.engine), parsed_args.jobs, pathlib.Path(temp_dir))
+
+            for iter_result in scale_results:
+                logger.info("%-17s %4sx: %10.4fs, %12.0f %s/s", iter_result.benchmark, iter_result.scale,
+                    iter_result.seconds, iter_result.throughput, iter_result.unit)
+
+            results.extend(scale_results)
+
+            if memory_result is not None:
+                logger.info("%-17s %4sx: peak %8.2f MiB, retained %8.2f MiB, %6.0f retained bytes per definition", "memory",
+                    iter_scale, memory_result.peak_bytes / 1024 ** 2, memory_result.retained_bytes / 1024 ** 2,
+                    memory_result.retained_bytes / memory_result.definitions)
+
+                memory_results.append(memory_result)
+
+    results_obj = {
+        "__version__": RESULTS_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "engine": parsed_args.engine,
+        "repeat": parsed_args.repeat,
+        "jobs": parsed_args.jobs,
+        "cpu_count": os.cpu_count(),
+        "results": [x.to_dict() for x in results],
+        "memory": [x.to_dict() for x in memory_results]}
+
+    exit_code = 0
+
+    scaling_problems = check_scaling(results, parsed_args.max_scaling_drop)
+
+    if scaling_problems:
+        for iter_problem in scaling_problems:
+            logger.error("doesn't scale linearly: %s", iter_problem)
+
+        exit_code = 1
+
+    if parsed_args.results_path is not None:
+        with open(parsed_args.results_path, "w", encoding="utf-8") as f:
+            json.dump(results_obj, f, indent=4)
+
+        logger.info("results written to `%s`", parsed_args.results_path)
+
+    if parsed_args.baseline_path is not None:
+
+        with open(parsed_args.baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        regressions = compare_results(results, memory_results, baseline, parsed_args.max_regression)
+
+        if regressions:
+            for iter_regression in regressions:
+                logger.error("regression: %s", iter_regression)
+
+            return 1
+
+        logger.info("no benchmark regressed by more than %.1f%%", parsed_args.max_regression * 100)
+
+    return exit_code
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="benchmarks the parser and the generators with synthetic TL files")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+        help="the scales of the synthetic TL files, 1 is about the size of tdlib's `td_api.tl`")
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARK_NAMES, default=BENCHMARK_NAMES,
+        help="the benchmarks to run, defaults to all of them")
+    parser.add_argument("--repeat", type=int, default=3, help="how many times to run each benchmark, the fastest run is kept")
+    parser.add_argument("--engine", choices=[x.value for x in TlParserEngine], default=TlParserEngine.PYPARSING.value)
+    parser.add_argument("--jobs", type=int, default=max(2, os.cpu_count() or 1),
+        help="the number of worker processes for the `parallel parse` benchmark, defaults to the number of CPUs (at least 2)")
+    parser.add_argument("--results-path", dest="results_path", type=pathlib.Path,
+        help="where to write the results as JSON")
+    parser.add_argument("--baseline-path", dest="baseline_path", type=pathlib.Path,
+        help="the results of a earlier run to compare against, the exit code is 1 if any benchmark regressed")
+    parser.add_argument("--max-regression", dest="max_regression", type=float, default=0.1,
+        help="how much lower the throughput of a benchmark can be than in the baseline, as a fraction, defaults to 0.1 (10%%)")
+    parser.add_argument("--max-scaling-drop", dest="max_scaling_drop", type=float, default=0.5,
+        help="how much lower the throughput of `parse` and `build model` can be at a bigger scale than at the smallest " +
+            "scale, as a fraction, defaults to 0.5 (50%%)")
+
+    # the parser logs every file it parses at INFO
+    logging.basicConfig(level="WARNING", format="%(asctime)s %(name)-16s %(levelname)-8s: %(message)s")
+    logger.setLevel(logging.INFO)
+
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+
+'''
+generates synthetic TL files that look like tdlib's `td_api.tl`, at any size
+
+at a scale of 1, the file has about as many types, functions, comments and parameters as
+`docs/example_tl_files/td_api_gitrev-3b2c06e_2020-04-06.tl`, and a scale of 10 has ten times as many.
+Like tdlib's file, the first `HEADER_LINE_COUNT` lines are the basic types that are skipped when parsing
+'''
+
+# library imports
+import argparse
+import pathlib
+import random
+import typing
+
+import attr
+
+# the basic types, these are the lines that `--skip-n-lines 14` skips
+HEADER = \
+'''double ? = Double;
+string ? = String;
+
+int32 = Int32;
+int53 = Int53;
+int64 = Int64;
+bytes = Bytes;
+
+boolFalse = Bool;
+boolTrue = Bool;
+
+vector {t:Type} # [ t ] = Vector t;
+
+
+'''
+
+HEADER_LINE_COUNT = 14
+
+BASIC_TYPES = ["int32", "int53", "int64", "string", "bytes", "Bool", "double"]
+
+# roughly how often each basic type is used in tdlib's file
+BASIC_TYPE_WEIGHTS = [30, 20, 10, 30, 3, 15, 2]
+
+WORDS = ["chat", "message", "user", "file", "photo", "sticker", "call", "poll", "game", "invoice", "location",
+    "contact", "animation", "audio", "document", "video", "voice", "note", "text", "entity", "button", "keyboard",
+    "inline", "query", "result", "notification", "setting", "proxy", "network", "storage", "statistics", "session",
+    "password", "passport", "element", "error", "background", "theme", "language", "pack", "member", "status",
+    "group", "channel", "supergroup", "secret", "draft", "reply", "markup", "option", "value", "json", "update"]
+
+DESCRIPTION_WORDS = ["the", "a", "of", "to", "is", "if", "for", "this", "that", "will", "be", "returned", "used",
+    "identifier", "information", "about", "current", "user", "chat", "message", "may", "null", "only", "when",
+    "true", "number", "list", "new", "unique", "in", "seconds", "point", "time", "must", "non-empty", "and", "or"]
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class SchemaShape:
+    '''
+    how many of each kind of definition a synthetic TL file at a scale of 1 has, and how they are put together
+    '''
+
+    # abstract types that have `//@class` comments and more than one concrete type
+    abstract_type_count:int = attr.ib(default=120)
+
+    # the smallest and largest number of concrete types per abstract type
+    min_fan_out:int = attr.ib(default=2)
+    max_fan_out:int = attr.ib(default=9)
+
+    # concrete types that are the only type of their (inferred) abstract type
+    standalone_type_count:int = attr.ib(default=130)
+
+    function_count:int = attr.ib(default=372)
+
+    max_parameter_count:int = attr.ib(default=6)
+
+    # how likely a parameter is to be one of the types, rather than a basic type
+    object_parameter_chance:float = attr.ib(default=0.3)
+
+    # how likely a parameter is to be a vector, and a vector to be a vector of vectors
+    vector_chance:float = attr.ib(default=0.12)
+    nested_vector_chance:float = attr.ib(default=0.05)
+
+    # how likely the comments of a definition are on one line, rather than one line per parameter
+    inline_comment_chance:float = attr.ib(default=0.5)
+
+
+class SyntheticSchemaGenerator:
+    '''
+    writes a synthetic TL file, the same scale and seed always give the same file
+    '''
+
+    def __init__(self, scale:int=1, seed:int=0, shape:SchemaShape=SchemaShape()):
+        '''
+        @param scale how many times larger than tdlib's file the result is
+        @param seed the seed for the random choices
+        @param shape what the file looks like at a scale of 1
+        '''
+
+        if scale < 1:
+            raise Exception(f"the scale has to be at least 1, got `{scale}`")
+
+        self.scale = scale
+        self.shape = shape
+        self.random = random.Random(seed)
+
+        # the names of the abstract types that have been written so far, that parameters can use
+        self._abstract_names:typing.List[str] = []
+
+    def _name(self, index:int, word_count:int) -> str:
+
+        words = [self.random.choice(WORDS) for _ in range(word_count)]
+
+        return words[0] + "".join(x.capitalize() for x in words[1:]) + str(index)
+
+    def _description(self, min_words:int, max_words:int) -> str:
+
+        words = [self.random.choice(DESCRIPTION_WORDS) for _ in range(self.random.randint(min_words, max_words))]
+
+        return " ".join(words).capitalize()
+
+    def _param_type(self) -> str:
+
+        if self._abstract_names and self.random.random() < self.shape.object_parameter_chance:
+            param_type = self.random.choice(self._abstract_names)
+
+            # tdlib uses the concrete type as often as the abstract one
+            if self.random.random() < 0.5:
+                param_type = param_type[0].lower() + param_type[1:]
+        else:
+            param_type = self.random.choices(BASIC_TYPES, BASIC_TYPE_WEIGHTS)[0]
+
+        if self.random.random() < self.shape.vector_chance:
+            param_type = f"vector<{param_type}>"
+
+            if self.random.random() < self.shape.nested_vector_chance:
+                param_type = f"vector<{param_type}>"
+
+        return param_type
+
+    def _write_definition(self, name:str, result_type:str, out:typing.TextIO) -> None:
+
+        param_names = []
+
+        for _ in range(self.random.randint(0, self.shape.max_parameter_count)):
+            param_name = "_".join(self.random.choice(WORDS) for _ in range(self.random.randint(1, 3)))
+
+            if param_name not in param_names:
+                param_names.append(param_name)
+
+        params = [(x, self._param_type()) for x in param_names]
+
+        comments = [f"@description {self._description(4, 20)}"] + [f"@{x} {self._description(2, 10)}" for x, _ in params]
+
+        if self.random.random() < self.shape.inline_comment_chance:
+            out.write("//" + " ".join(comments) + "\n")
+        else:
+            for iter_comment in comments:
+                out.write(f"//{iter_comment}\n")
+
+        out.write(" ".join([name] + [f"{x}:{y}" for x, y in params] + ["=", result_type]) + ";\n")
+        out.write("\n")
+
+    def write(self, out:typing.TextIO) -> None:
+        '''
+        writes the TL file
+
+        @param out the file object to write to
+        '''
+
+        out.write(HEADER)
+
+        # the types, in the order tdlib's file has them, so later types use the earlier ones
+        abstract_count = self.shape.abstract_type_count * self.scale
+        standalone_count = self.shape.standalone_type_count * self.scale
+
+        kinds = ["abstract"] * abstract_count + ["standalone"] * standalone_count
+        self.random.shuffle(kinds)
+
+        for iter_index, iter_kind in enumerate(kinds):
+
+            if iter_kind == "abstract":
+                abstract_name = self._name(iter_index, 2)
+                abstract_name = abstract_name[0].upper() + abstract_name[1:]
+
+                out.write(f"//@class {abstract_name} @description {self._description(5, 20)}\n")
+                out.write("\n")
+
+                for iter_sub_index in range(self.random.randint(self.shape.min_fan_out, self.shape.max_fan_out)):
+                    concrete_name = abstract_name[0].lower() + abstract_name[1:] + self._name(iter_sub_index, 1).capitalize()
+                    self._write_definition(concrete_name, abstract_name, out)
+
+            else:
+                concrete_name = self._name(iter_index, 2)
+                abstract_name = concrete_name[0].upper() + concrete_name[1:]
+
+                self._write_definition(concrete_name, abstract_name, out)
+
+            self._abstract_names.append(abstract_name)
+            out.write("\n")
+
+        out.write("---functions---\n")
+        out.write("\n")
+
+        for iter_index in range(self.shape.function_count * self.scale):
+            function_name = self.random.choice(["get", "set", "search", "delete", "add", "toggle"]) + self._name(iter_index, 2).capitalize()
+            self._write_definition(function_name, self.random.choice(self._abstract_names), out)
+            out.write("\n")
+
+
+def write_synthetic_schema(path:pathlib.Path, scale:int=1, seed:int=0) -> None:
+    '''
+    writes a synthetic TL file, see `SyntheticSchemaGenerator`
+
+    @param path where to write the file
+    @param scale how many times larger than tdlib's file the result is
+    @param seed the seed for the random choices
+    '''
+
+    with open(path, "w", encoding="utf-8") as f:
+        SyntheticSchemaGenerator(scale, seed).write(f)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="writes a synthetic TL file that looks like tdlib's, at any size")
+    parser.add_argument("--output-file-path", dest="output_file_path", type=pathlib.Path, required=True)
+    parser.add_argument("--scale", type=int, default=1, help="how many times larger than tdlib's file the result is")
+    parser.add_argument("--seed", type=int, default=0)
+
+    parsed_args = parser.parse_args()
+
+    write_synthetic_schema(parsed_args.output_file_path, parsed_args.scale, parsed_args.seed)
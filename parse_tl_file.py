@@ -2,16 +2,17 @@
 
 # library imports
 import argparse
+import contextlib
+import io
 import logging
+import os
 import sys
 import pathlib
 
-# third party imports
-import attr
-
-from telegram_tl_parser.parser import Parser
-from telegram_tl_parser.gen import Generator
-from telegram_tl_parser.output import JsonOutput, AttrsOutput
+# note: only the standard library is imported up front, the parser, the generators and the things
+# they need (pyparsing and attrs) are imported once we know which sub-command to run, see `lazy_output`.
+# `benchmarks/cli_startup.py` checks how long the imports take
+from telegram_tl_parser.options import TlParserEngine, TlCommentsMode, BatchOutputFormat, RunStatsFormat, DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_SIZE_BYTES
 
 def isFileType(filePath):
     ''' see if the file path given to us by argparse is a file
@@ -54,8 +55,49 @@ def isValidNewFileLocation(filePath):
 
     return path_resolved
 
-if __name__ == "__main__":
-    # if we are being run as a real program
+def lazy_output(output_class_name):
+    ''' returns a function that runs the `run_from_args` of one of the classes in `telegram_tl_parser.output`,
+    which is only imported when the function is called
+    @param output_class_name - the name of the class, like `JsonOutput`
+    @return the function, that takes the parsed arguments'''
+
+    def run_from_args(parsed_args):
+
+        import telegram_tl_parser.output as output
+
+        output_class = getattr(output, output_class_name)
+
+        if parsed_args.watch:
+            output.OutputWatcher(parsed_args, output_class.render_outputs).run()
+        else:
+            output_class.run_from_args(parsed_args)
+
+    return run_from_args
+
+def serve_from_args(parsed_args):
+    ''' runs the `serve` sub-command, every request is run as if the arguments it contains were passed to this script
+    @param parsed_args - the parsed command line arguments'''
+
+    import telegram_tl_parser.server as server
+    from telegram_tl_parser.grammar import TlGrammar
+
+    # build the grammar up front, rather than on the first request
+    TlGrammar.get_shared()
+
+    def handle_request(argv):
+
+        output_io = io.StringIO()
+
+        with contextlib.redirect_stdout(output_io), contextlib.redirect_stderr(output_io):
+            exit_code = main(argv, output_io, in_server=True)
+
+        return exit_code, output_io.getvalue()
+
+    server.serve(parsed_args.socket_path, handle_request)
+
+def build_argument_parser():
+    ''' builds the parser for the command line arguments
+    @return the argparse.ArgumentParser'''
 
     parser = argparse.ArgumentParser(
         description="parses telegram .tl files into python attrs classes",
@@ -64,19 +106,83 @@ if __name__ == "__main__":
     parser.add_argument("--tl-file-path",
         dest="tl_file_path",
         type=isFileType,
-        required=True,
-        help="the telegram .tl file")
+        required=False,
+        help="the telegram .tl file, required for every sub-command except `batch`")
     parser.add_argument("--output-file-path",
         dest="output_file_path",
         type=isValidNewFileLocation,
-        required=True,
-        help="the output file we will write")
+        required=False,
+        help="the output file we will write, required for every sub-command except `batch`")
     parser.add_argument("--skip-n-lines",
         dest="skip_n_lines",
         type=int,
         default=14,
         required=False,
         help="Skip N number of lines from the start of the file, defaults to 14.")
+    parser.add_argument("--engine",
+        dest="engine",
+        choices=[x.value for x in TlParserEngine],
+        default=TlParserEngine.PYPARSING.value,
+        help="The engine used to parse the file, `pyparsing` (the reference implementation) or `fast` " +
+            "(a hand written line oriented scanner), defaults to `pyparsing`")
+    parser.add_argument("--comments",
+        dest="comments",
+        choices=[x.value for x in TlCommentsMode],
+        default=TlCommentsMode.FULL.value,
+        help="What to do with the comments in the TL file: `full` keeps them, and `none` skips the comment lines " +
+            "before they are parsed, so the output has no comments at all. Defaults to `full`")
+    parser.add_argument("--jobs",
+        dest="jobs",
+        type=int,
+        default=1,
+        help="The number of worker processes to parse the file with, the file is split into chunks at blank lines " +
+            "and the chunks are parsed in parallel, defaults to 1 (parse in this process)")
+    parser.add_argument("--packrat",
+        action="store_true",
+        help="If provided, turn on pyparsing's packrat (memoization) mode for the `pyparsing` engine")
+    parser.add_argument("--packrat-cache-size",
+        dest="packrat_cache_size",
+        type=int,
+        default=128,
+        help="The maximum number of entries in the packrat cache when `--packrat` is used, defaults to 128")
+    parser.add_argument("--grammar-profile",
+        dest="grammar_profile",
+        action="store_true",
+        help="If provided, log how many match attempts and how much time each element of the pyparsing grammar takes")
+    parser.add_argument("--cache-dir",
+        dest="cache_dir",
+        type=pathlib.Path,
+        default=DEFAULT_CACHE_DIR,
+        help=f"The directory where parsed files are cached, defaults to `{DEFAULT_CACHE_DIR}`")
+    parser.add_argument("--cache-max-size-mb",
+        dest="cache_max_size_mb",
+        type=int,
+        default=DEFAULT_CACHE_MAX_SIZE_BYTES // (1024 * 1024),
+        help="The maximum size of the parse cache in megabytes, the least recently used entries are " +
+            f"removed when it gets bigger than this, defaults to {DEFAULT_CACHE_MAX_SIZE_BYTES // (1024 * 1024)}")
+    parser.add_argument("--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="If provided, don't read from or write to the parse cache")
+    parser.add_argument("--profile",
+        action="store_true",
+        help="If provided, report the wall time, CPU time and tracemalloc peak of each phase of parsing and " +
+            "generating, plus counts of what was parsed (the `json`, `attrs`, `attrs-package` and `client` sub-commands only). Tracking the memory " +
+            "slows everything down, so the times are only comparable to other `--profile` runs")
+    parser.add_argument("--profile-format",
+        dest="profile_format",
+        choices=[x.value for x in RunStatsFormat],
+        default=RunStatsFormat.TEXT.value,
+        help="The format of the `--profile` report, defaults to `text`")
+    parser.add_argument("--profile-output-path",
+        dest="profile_output_path",
+        type=isValidNewFileLocation,
+        help="If set, the `--profile` report is written to this file rather than logged")
+    parser.add_argument("--always-write",
+        dest="always_write",
+        action="store_true",
+        help="If provided, always replace the output files, by default a output file that already has the contents " +
+            "we would write is left alone, so its modification time doesn't change")
     parser.add_argument("--pyparsing-debug-logging",
         dest="pyparsing_debug_logging_is_enabled",
         action="store_true",
@@ -88,29 +194,162 @@ if __name__ == "__main__":
         dest="log_to_file",
         type=isValidNewFileLocation,
         help="If set, the log statements will be logged to the specified file rather than stdout")
+    parser.add_argument("--watch",
+        action="store_true",
+        help="If provided, keep running and regenerate the output every time the TL file changes, only rewriting " +
+            "the files whose contents changed (every sub-command except `batch` and `serve`)")
+    parser.add_argument("--watch-interval",
+        dest="watch_interval",
+        type=float,
+        default=0.5,
+        help="How often `--watch` checks if the TL file changed, in seconds, defaults to 0.5")
+    parser.add_argument("--server-socket",
+        dest="server_socket",
+        type=pathlib.Path,
+        help="If set, rather than running the sub-command in this process, send it to the process listening on " +
+            "this Unix socket (see the `serve` sub-command), which already has everything imported and the grammar built")
 
     subparsers = parser.add_subparsers(help="sub-command help" )
 
     json_subparser = subparsers.add_parser("json", help="JSON output")
-    json_subparser.set_defaults(func_to_run=JsonOutput.run_from_args)
+    json_subparser.add_argument("--compact",
+        action="store_true",
+        help="If provided, write the JSON without any whitespace rather than indented")
+    json_subparser.set_defaults(func_to_run=lazy_output("JsonOutput"), requires_single_file=True)
 
     attrs_subparser = subparsers.add_parser("attrs", help="Attrs style classes output")
-    attrs_subparser.set_defaults(func_to_run=AttrsOutput.run_from_args)
+    attrs_subparser.add_argument("--with-codecs",
+        dest="with_codecs",
+        action="store_true",
+        help="If provided, also generate `from_tdlib_dict` / `to_tdlib_dict` methods for every class, plus the " +
+            "`TDLIB_TYPE_DECODERS` (`@type` -> decoder) and `TDLIB_FIELD_TABLES` dicts, so converting tdlib's JSON doesn't need reflection")
+    attrs_subparser.add_argument("--gen-jobs",
+        dest="gen_jobs",
+        type=int,
+        default=1,
+        help="The number of worker processes to render the classes with, the classes are split into runs that are " +
+            "rendered in parallel and written in the usual order, so the output is the same. Defaults to 1 (render in this process)")
+    attrs_subparser.set_defaults(func_to_run=lazy_output("AttrsOutput"), requires_single_file=True)
+
+    attrs_package_subparser = subparsers.add_parser("attrs-package",
+        help="Attrs style classes output, split into a package that imports each group of classes the first time " +
+            "one of them is used, `--output-file-path` is the directory of the package")
+    attrs_package_subparser.add_argument("--with-codecs",
+        dest="with_codecs",
+        action="store_true",
+        help="If provided, also generate the tdlib JSON encoders and decoders, see `attrs --with-codecs`")
+    attrs_package_subparser.set_defaults(func_to_run=lazy_output("AttrsPackageOutput"), requires_single_file=True)
+
+    client_subparser = subparsers.add_parser("client",
+        help="a asyncio client with a `async def` for every function, that uses the classes from `attrs --with-codecs`")
+    client_subparser.add_argument("--classes-module",
+        dest="classes_module",
+        required=True,
+        help="the name the client imports the classes generated by `attrs --with-codecs` (or `attrs-package --with-codecs`) as, " +
+            "like `telegram_dl.tdlib_generated`")
+    client_subparser.set_defaults(func_to_run=lazy_output("ClientOutput"), requires_single_file=True)
+
+    artifact_subparser = subparsers.add_parser("artifact",
+        help="binary schema artifact output, which `telegram_tl_parser.loader.load_file_definition` loads a lot faster than parsing")
+    artifact_subparser.set_defaults(func_to_run=lazy_output("ArtifactOutput"), requires_single_file=True)
+
+    batch_subparser = subparsers.add_parser("batch", help="parse and generate output for many TL files in one process")
+    batch_subparser.add_argument("--input-glob",
+        dest="input_glob",
+        required=True,
+        help="a glob matching the TL files to process, like `docs/example_tl_files/td_api_*.tl`")
+    batch_subparser.add_argument("--output-path-template",
+        dest="output_path_template",
+        required=True,
+        help="the path to write each output to, `{stem}` is replaced with the name of the TL file without " +
+            "its extension and `{name}` with the full name of the TL file, like `out/{stem}/tdlib_generated.py`")
+    batch_subparser.add_argument("--format",
+        dest="batch_format",
+        choices=[x.value for x in BatchOutputFormat],
+        default=BatchOutputFormat.ATTRS.value,
+        help="the output format to generate for every file, defaults to `attrs`")
+    batch_subparser.add_argument("--compact",
+        action="store_true",
+        help="If provided and the format is `json`, write the JSON without any whitespace rather than indented")
+    batch_subparser.add_argument("--with-codecs",
+        dest="with_codecs",
+        action="store_true",
+        help="If provided and the format is `attrs`, also generate the tdlib JSON encoders and decoders, see `attrs --with-codecs`")
+    batch_subparser.add_argument("--workers",
+        dest="batch_workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="the number of worker processes, each one keeps its grammar warm between files, defaults to the number of CPUs")
+    batch_subparser.set_defaults(func_to_run=lazy_output("BatchOutput"))
+
+    serve_subparser = subparsers.add_parser("serve",
+        help="keep running, and run the sub-commands sent with `--server-socket`, so the imports and the grammar stay warm")
+    serve_subparser.add_argument("--socket-path",
+        dest="socket_path",
+        type=isValidNewFileLocation,
+        required=True,
+        help="the path of the Unix socket to listen on")
+    serve_subparser.set_defaults(func_to_run=serve_from_args)
+
+    return parser
+
+def main(argv, output_stream, in_server=False):
+    ''' parses the command line arguments and runs the sub-command
+    @param argv - the command line arguments, without the name of the script
+    @param output_stream - where the log statements go, unless `--log-to-file` is given
+    @param in_server - whether we are running a request sent to the `serve` sub-command
+    @return the exit code'''
+
+    parser = build_argument_parser()
+
+    root_logger = logging.getLogger()
+    logging_handler = None
+    previous_logging_level = root_logger.level
 
     try:
-        parsed_args = parser.parse_args()
+        parsed_args = parser.parse_args(argv)
+
+        if parsed_args.server_socket is not None:
+
+            if in_server:
+                parser.error("`--server-socket` can't be used in a request that was sent to the server")
+
+            import telegram_tl_parser.server as server
+
+            # the server runs the same arguments, just without `--server-socket`
+            server_argv = []
+            argv_iterator = iter(argv)
+
+            for iter_arg in argv_iterator:
+                if iter_arg == "--server-socket":
+                    next(argv_iterator)
+                elif not iter_arg.startswith("--server-socket="):
+                    server_argv.append(iter_arg)
+
+            exit_code, output = server.send_request(parsed_args.server_socket, server_argv)
+            output_stream.write(output)
+            return exit_code
+
+        if getattr(parsed_args, "requires_single_file", False) and \
+            (parsed_args.tl_file_path is None or parsed_args.output_file_path is None):
+
+            parser.error("`--tl-file-path` and `--output-file-path` are required for this sub-command")
+
+        if in_server and getattr(parsed_args, "func_to_run", None) is serve_from_args:
+            parser.error("the `serve` sub-command can't be sent to the server")
+
+        if parsed_args.watch and (in_server or not getattr(parsed_args, "requires_single_file", False)):
+            parser.error("`--watch` only works with the sub-commands that process a single file, and not through `--server-socket`")
 
         # set up logging stuff
         logging.captureWarnings(True) # capture warnings with the logging infrastructure
-        root_logger = logging.getLogger()
         logging_formatter = logging.Formatter("%(asctime)s %(threadName)-10s %(name)-24s %(levelname)-8s: %(message)s")
 
         # set up logging handler
-        logging_handler = None
         if parsed_args.log_to_file:
             logging_handler = logging.FileHandler(parsed_args.log_to_file, mode="a", encoding="utf-8")
         else:
-            logging_handler = logging.StreamHandler(sys.stdout)
+            logging_handler = logging.StreamHandler(output_stream)
 
         logging_handler.setFormatter(logging_formatter)
         root_logger.addHandler(logging_handler)
@@ -132,10 +371,31 @@ if __name__ == "__main__":
         else:
             root_logger.info("no subcommand specified!")
             parser.print_help()
-            sys.exit(0)
+            return 0
 
         root_logger.info("Done!")
 
+        return 0
+
+    except SystemExit as e:
+        # argparse exits when the arguments are wrong (or for `--help`), which
+        # shouldn't take the server down with it
+        if not in_server:
+            raise
+
+        return e.code if isinstance(e.code, int) else 1
+
     except Exception as e:
         root_logger.exception("Something went wrong!")
-        sys.exit(1)
\ No newline at end of file
+        return 1
+
+    finally:
+        if logging_handler is not None:
+            root_logger.removeHandler(logging_handler)
+            logging_handler.close()
+            root_logger.setLevel(previous_logging_level)
+
+if __name__ == "__main__":
+    # if we are being run as a real program
+
+    sys.exit(main(sys.argv[1:], sys.stdout))
\ No newline at end of file
@@ -0,0 +1,302 @@
+import array
+import hashlib
+import logging
+import struct
+import sys
+import typing
+
+import telegram_tl_parser.model as model
+
+logger = logging.getLogger(__name__)
+
+# the binary schema artifact is a precompiled TlFileDefinition, that loads a lot faster than parsing
+# the TL file does. The layout is:
+#
+#   header: magic, format version, a reserved uint16, the payload length and the sha256 of the payload
+#   payload:
+#       uint32: the number of strings in the string table
+#       uint32: the length in bytes of the string table
+#       the string table: every string the file definition uses, utf-8 encoded and separated by NUL bytes
+#       the rest: a array of little endian int32s, that describe the file definition, see `_IntWriter`
+#
+# every string in the int32 array is a index into the string table, or -1 for None
+#
+# the int32 array starts with the parameter table, as most parameters (like `chat_id:int53`) are
+# used by more than one definition, and then the types and functions, which refer to the
+# parameters by their index in the parameter table
+
+ARTIFACT_MAGIC = b"TLSCHEMA"
+
+# bump this whenever the layout changes
+ARTIFACT_VERSION = 1
+
+ARTIFACT_HEADER_STRUCT = struct.Struct("<8sHHI32s")
+
+STRING_TABLE_HEADER_STRUCT = struct.Struct("<II")
+
+NONE_INDEX = -1
+
+CLASS_TYPE_TO_INT = {model.TlClassTypeEnum.CONCRETE: 0, model.TlClassTypeEnum.ABSTRACT: 1}
+INT_TO_CLASS_TYPE = {v: k for k, v in CLASS_TYPE_TO_INT.items()}
+
+
+class _IntWriter:
+    '''
+    builds the string table and the int32 array while writing a artifact
+    '''
+
+    def __init__(self):
+
+        self.strings:typing.Dict[str, int] = dict()
+        self.ints = array.array("i")
+
+    def add_string(self, value:typing.Optional[str]) -> None:
+
+        if value is None:
+            self.ints.append(NONE_INDEX)
+            return
+
+        if "\0" in value:
+            raise Exception(f"can't write a string with a NUL character in it to a schema artifact: `{value}`")
+
+        index = self.strings.get(value)
+
+        if index is None:
+            index = len(self.strings)
+            self.strings[value] = index
+
+        self.ints.append(index)
+
+    def add_int(self, value:int) -> None:
+
+        self.ints.append(value)
+
+    def add_comments(self, comments:typing.Sequence[model.TlComment]) -> None:
+
+        self.add_int(len(comments))
+
+        for iter_comment in comments:
+            self.add_string(iter_comment.comment_text)
+            self.add_int(iter_comment.source_line_number)
+
+
+def write_schema_artifact(file_definition:model.TlFileDefinition, fp:typing.BinaryIO) -> None:
+    '''
+    writes the TlFileDefinition as a binary schema artifact, see the top of this module for the layout
+
+    @param file_definition the TlFileDefinition to write
+    @param fp the file object to write to, opened in binary mode
+    '''
+
+    writer = _IntWriter()
+
+    # the parameter table
+    param_indexes:typing.Dict[model.TlParameter, int] = dict()
+
+    for iter_def in list(file_definition.types) + list(file_definition.functions):
+        for iter_param in iter_def.parameters:
+            param_indexes.setdefault(iter_param, len(param_indexes))
+
+    writer.add_int(len(param_indexes))
+
+    for iter_param in param_indexes.keys():
+
+        if iter_param.default_value is not None and not isinstance(iter_param.default_value, str):
+            raise Exception("only strings and None are supported as the default value of a parameter in a schema artifact, " +
+                f"got `{iter_param.default_value!r}` for the parameter `{iter_param.param_name}`")
+
+        writer.add_string(iter_param.param_name)
+        writer.add_string(iter_param.param_type)
+        writer.add_int(1 if iter_param.required else 0)
+        writer.add_string(iter_param.default_value)
+
+    # the types
+    writer.add_int(len(file_definition.types))
+
+    for iter_type_def in file_definition.types:
+        writer.add_string(iter_type_def.class_name)
+        writer.add_string(iter_type_def.extends_from)
+        writer.add_string(iter_type_def.source_line)
+        writer.add_int(iter_type_def.source_line_number)
+        writer.add_int(CLASS_TYPE_TO_INT[iter_type_def.class_type])
+        writer.add_int(len(iter_type_def.parameters))
+        writer.ints.extend(param_indexes[x] for x in iter_type_def.parameters)
+        writer.add_comments(iter_type_def.comments)
+
+    # the functions
+    writer.add_int(len(file_definition.functions))
+
+    for iter_function_def in file_definition.functions:
+        writer.add_string(iter_function_def.function_name)
+        writer.add_string(iter_function_def.return_type)
+        writer.add_string(iter_function_def.source_line)
+        writer.add_int(iter_function_def.source_line_number)
+        writer.add_int(len(iter_function_def.parameters))
+        writer.ints.extend(param_indexes[x] for x in iter_function_def.parameters)
+        writer.add_comments(iter_function_def.comments)
+
+    string_table = "\0".join(writer.strings.keys()).encode("utf-8")
+
+    ints = writer.ints
+
+    if sys.byteorder != "little":
+        ints = array.array("i", ints)
+        ints.byteswap()
+
+    payload = STRING_TABLE_HEADER_STRUCT.pack(len(writer.strings), len(string_table)) + string_table + ints.tobytes()
+
+    fp.write(ARTIFACT_HEADER_STRUCT.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION, 0, len(payload), hashlib.sha256(payload).digest()))
+    fp.write(payload)
+
+
+def is_schema_artifact(data:bytes) -> bool:
+    '''
+    @param data the start of a file (at least the first 8 bytes)
+    @return whether the data looks like a binary schema artifact
+    '''
+
+    return data[:len(ARTIFACT_MAGIC)] == ARTIFACT_MAGIC
+
+
+def read_schema_artifact(data:bytes) -> model.TlFileDefinition:
+    '''
+    rebuilds a TlFileDefinition from a binary schema artifact written by `write_schema_artifact`
+
+    the header is checked, so a artifact that is truncated, corrupt or from a different version of the format
+    raises an Exception rather than producing a wrong TlFileDefinition
+
+    @param data the entire contents of the artifact
+    @return the TlFileDefinition
+    '''
+
+    if len(data) < ARTIFACT_HEADER_STRUCT.size:
+        raise Exception(f"not a schema artifact, it is only `{len(data)}` bytes long")
+
+    magic, version, _, payload_length, checksum = ARTIFACT_HEADER_STRUCT.unpack_from(data, 0)
+
+    if magic != ARTIFACT_MAGIC:
+        raise Exception(f"not a schema artifact, the magic is `{magic!r}` rather than `{ARTIFACT_MAGIC!r}`")
+
+    if version != ARTIFACT_VERSION:
+        raise Exception(f"unsupported schema artifact version `{version}`, this version of the parser reads version `{ARTIFACT_VERSION}`")
+
+    payload = data[ARTIFACT_HEADER_STRUCT.size:]
+
+    if len(payload) != payload_length:
+        raise Exception(f"the schema artifact's payload is `{len(payload)}` bytes long, but the header says it is `{payload_length}` bytes")
+
+    if hashlib.sha256(payload).digest() != checksum:
+        raise Exception("the schema artifact's checksum doesn't match, it is corrupt")
+
+    string_count, string_table_length = STRING_TABLE_HEADER_STRUCT.unpack_from(payload, 0)
+
+    string_table_start = STRING_TABLE_HEADER_STRUCT.size
+    ints_start = string_table_start + string_table_length
+
+    if string_count == 0:
+        strings = []
+    else:
+        strings = payload[string_table_start:ints_start].decode("utf-8").split("\0")
+
+    if len(strings) != string_count:
+        raise Exception(f"the schema artifact's string table has `{len(strings)}` strings, but it should have `{string_count}`")
+
+    ints_bytes = payload[ints_start:]
+
+    if len(ints_bytes) % 4 != 0:
+        raise Exception(f"the schema artifact is malformed, its int32 array is `{len(ints_bytes)}` bytes long")
+
+    ints = array.array("i")
+    ints.frombytes(ints_bytes)
+
+    if sys.byteorder != "little":
+        ints.byteswap()
+
+    # a iterator so every read just takes the next int
+    ints_iterator = iter(ints)
+    next_int = ints_iterator.__next__
+
+    # a negative index would silently count from the end of the list, so the lookups only accept
+    # indexes that are actually in the table, and `NONE_INDEX` only where the value can be None. Flags
+    # have to be exactly 0 or 1, so a corrupt one isn't read as False
+
+    def next_string() -> str:
+
+        index = next_int()
+
+        if index < 0:
+            raise IndexError(f"string index `{index}` out of range")
+
+        return strings[index]
+
+    def next_optional_string() -> typing.Optional[str]:
+
+        index = next_int()
+
+        if index == NONE_INDEX:
+            return None
+
+        if index < 0:
+            raise IndexError(f"string index `{index}` out of range")
+
+        return strings[index]
+
+    def next_bool() -> bool:
+
+        value = next_int()
+
+        if value not in (0, 1):
+            raise ValueError(f"flag value `{value}` is not 0 or 1")
+
+        return value == 1
+
+    def next_param() -> model.TlParameter:
+
+        index = next_int()
+
+        if index < 0:
+            raise IndexError(f"parameter index `{index}` out of range")
+
+        return params[index]
+
+    try:
+
+        params = []
+
+        for _ in range(next_int()):
+            params.append(model.TlParameter(
+                param_name=next_string(),
+                param_type=next_string(),
+                required=next_bool(),
+                default_value=next_optional_string()))
+
+        types = []
+
+        for _ in range(next_int()):
+            types.append(model.TlTypeDefinition(
+                class_name=next_string(),
+                extends_from=next_optional_string(),
+                source_line=next_string(),
+                source_line_number=next_int(),
+                class_type=INT_TO_CLASS_TYPE[next_int()],
+                parameters=[next_param() for _ in range(next_int())],
+                comments=[model.TlComment(comment_text=next_string(), source_line_number=next_int()) for _ in range(next_int())]))
+
+        functions = []
+
+        for _ in range(next_int()):
+            functions.append(model.TlFunctionDefinition(
+                function_name=next_string(),
+                return_type=next_string(),
+                source_line=next_string(),
+                source_line_number=next_int(),
+                parameters=[next_param() for _ in range(next_int())],
+                comments=[model.TlComment(comment_text=next_string(), source_line_number=next_int()) for _ in range(next_int())]))
+
+    except (StopIteration, IndexError, KeyError, ValueError) as e:
+        raise Exception(f"the schema artifact is malformed: `{type(e).__name__}: {e}`") from e
+
+    if next(ints_iterator, None) is not None:
+        raise Exception("the schema artifact is malformed, there is data left over after the functions")
+
+    return model.TlFileDefinition(types=types, functions=functions)
@@ -0,0 +1,149 @@
+import hashlib
+import logging
+import os
+import pathlib
+import pickle
+import typing
+
+import telegram_tl_parser.model as model
+import telegram_tl_parser.utils as utils
+from telegram_tl_parser.options import DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_SIZE_BYTES
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENTRY_SUFFIX = ".pickle"
+
+class ParseCache:
+    '''
+    a content addressed, on disk cache of parsed `TlFileDefinition` objects
+
+    entries are keyed on the hash of the TL file's contents, the number of lines that were skipped,
+    the version of the parser and the engine that was used, so a entry can never be handed out for a
+    different file or for a file that would be parsed differently.
+
+    entries are stored as pickles, since those load a lot faster than the file can be parsed.
+    When the combined size of the entries goes over the maximum size, the least recently used
+    entries are removed
+    '''
+
+    def __init__(self,
+        cache_dir:pathlib.Path=DEFAULT_CACHE_DIR,
+        max_size_bytes:int=DEFAULT_CACHE_MAX_SIZE_BYTES):
+        '''
+        @param cache_dir the directory the cache entries are stored in, created if it doesn't exist
+        @param max_size_bytes the maximum combined size of all of the cache entries
+        '''
+
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_size_bytes = max_size_bytes
+
+    def make_key(self,
+        tl_file_contents:bytes,
+        skip_n_lines:int,
+        parser_version:int,
+        engine:model.TlParserEngine,
+        comments_mode:model.TlCommentsMode=model.TlCommentsMode.FULL) -> str:
+        '''
+        computes the cache key for a TL file
+
+        @param tl_file_contents the raw contents of the TL file
+        @param skip_n_lines the number of lines that are skipped at the start of the file
+        @param parser_version the version of the parser, see `Parser.VERSION`
+        @param engine the engine the file is parsed with
+        @param comments_mode what the parser does with the comments, see `TlCommentsMode`
+        @return the cache key as a hex string
+        '''
+
+        hasher = hashlib.sha256(tl_file_contents)
+        hasher.update((f"|skip_n_lines={skip_n_lines}|parser_version={parser_version}|engine={engine.value}" +
+            f"|comments={comments_mode.value}").encode("utf-8"))
+
+        return hasher.hexdigest()
+
+    def _path_for_key(self, key:str) -> pathlib.Path:
+
+        return self.cache_dir / f"{key}{CACHE_ENTRY_SUFFIX}"
+
+    def get(self, key:str) -> typing.Optional[model.TlFileDefinition]:
+        '''
+        looks up a cache entry
+
+        @param key the cache key, see `make_key`
+        @return the cached TlFileDefinition, or None if there is no (usable) entry for the key
+        '''
+
+        entry_path = self._path_for_key(key)
+
+        try:
+            with open(entry_path, "rb") as f:
+                result = pickle.load(f)
+
+        except FileNotFoundError:
+            return None
+
+        except Exception as e:
+            logger.warning("removing unreadable cache entry `%s`: `%s`", entry_path, e)
+            entry_path.unlink(missing_ok=True)
+            return None
+
+        if not isinstance(result, model.TlFileDefinition):
+            logger.warning("removing cache entry `%s` as it contains a `%s` rather than a TlFileDefinition",
+                entry_path, type(result))
+            entry_path.unlink(missing_ok=True)
+            return None
+
+        # bump the modification time so the eviction sees this entry as recently used
+        try:
+            os.utime(entry_path)
+        except OSError as e:
+            logger.debug("failed to update the modification time of `%s`: `%s`", entry_path, e)
+
+        return result
+
+    def put(self, key:str, file_definition:model.TlFileDefinition) -> None:
+        '''
+        stores a cache entry, and then evicts old entries if the cache is over its maximum size
+
+        @param key the cache key, see `make_key`
+        @param file_definition the TlFileDefinition to store
+        '''
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        entry_path = self._path_for_key(key)
+
+        # write atomically so that another process never sees a half written entry
+        with utils.atomic_write(entry_path, binary=True) as f:
+            pickle.dump(file_definition, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        logger.debug("stored cache entry `%s`", entry_path)
+
+        self.evict()
+
+    def evict(self) -> None:
+        '''
+        removes the least recently used entries until the combined size of the cache
+        entries is at or below the maximum size
+        '''
+
+        entries = []
+
+        for iter_path in self.cache_dir.glob(f"*{CACHE_ENTRY_SUFFIX}"):
+            try:
+                stat_result = iter_path.stat()
+            except FileNotFoundError:
+                continue
+
+            entries.append((stat_result.st_mtime, stat_result.st_size, iter_path))
+
+        total_size = sum(x[1] for x in entries)
+
+        # oldest first
+        for iter_mtime, iter_size, iter_path in sorted(entries):
+
+            if total_size <= self.max_size_bytes:
+                break
+
+            logger.debug("evicting cache entry `%s` (`%s` bytes)", iter_path, iter_size)
+            iter_path.unlink(missing_ok=True)
+            total_size -= iter_size
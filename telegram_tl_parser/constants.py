@@ -5,6 +5,12 @@ ROOT_OBJECT_NAME = "RootObject"
 
 TDLIB_TYPE_VAR_NAME = "__tdlib_type__"
 
+# the class variable of a function's class that holds the TL type the function returns
+TDLIB_RETURN_TYPE_VAR_NAME = "__tdlib_return_type__"
+
+# the name of the dict from function name -> the class of its result
+TDLIB_FUNCTION_RESULT_TYPES_VAR_NAME = "TDLIB_FUNCTION_RESULT_TYPES"
+
 AS_TDLIB_JSON_TYPE_KEY_NAME = "@type"
 
 # these are the types that are usually lines 1-14 in the Telegram TL file, and can be replaced straight up
@@ -66,4 +72,436 @@ ATTRS_GEN_LOCALS_AND_GLOBALS_VARS = \
 # to resolve a string representation of these types
 tdlib_gen_globals = globals()
 tdlib_gen_locals = locals()
-'''
\ No newline at end of file
+'''
+
+# how each of the basic types is converted from (and to) the JSON that tdlib sends (and expects),
+# `{}` is replaced with the value. The basic types that aren't listed here are passed through as they are.
+# tdlib sends `int64` as a string, and `bytes` as base64
+TDLIB_JSON_BASIC_TYPE_DECODERS = {
+    "double": "decimal.Decimal(str({}))",
+    "int64": "int({})",
+    "bytes": "base64.b64decode({})"}
+
+TDLIB_JSON_BASIC_TYPE_ENCODERS = {
+    "double": "float({})",
+    "int64": "str({})",
+    "bytes": "base64.b64encode({}).decode(\"ascii\")"}
+
+TDLIB_JSON_EXTRA_KEY_NAME = "@extra"
+
+# the name of the dict from `@type` to the `from_tdlib_dict` of the class with that type
+TDLIB_TYPE_DECODERS_VAR_NAME = "TDLIB_TYPE_DECODERS"
+
+# the name of the dict from `@type` to a tuple of (field name, TL type) for the class with that type
+TDLIB_FIELD_TABLES_VAR_NAME = "TDLIB_FIELD_TABLES"
+
+ATTRS_GEN_CODECS_HELPERS = \
+'''import base64
+import json
+
+# tdlib wants compact JSON, and doesn't need non ascii characters to be escaped
+_tdlib_request_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_tdlib_object(d:typing.Optional[typing.Mapping[str, typing.Any]]) -> typing.Any:
+    \'\'\'
+    turns a dict that was decoded from tdlib's JSON into the class for its `@type`, None stays None
+    \'\'\'
+
+    if d is None:
+        return None
+
+    return TDLIB_TYPE_DECODERS[d["@type"]](d)
+
+
+def encode_tdlib_object(obj:typing.Any) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    \'\'\'
+    turns one of the classes into a dict that can be encoded as JSON and sent to tdlib, None stays None
+    \'\'\'
+
+    if obj is None:
+        return None
+
+    return obj.to_tdlib_dict()
+
+
+def encode_tdlib_request(d:typing.Dict[str, typing.Any], extra:typing.Optional[str]=None) -> str:
+    \'\'\'
+    encodes the dict from a function's `to_tdlib_dict` as the JSON string that is sent to tdlib,
+    with `extra` as its `@extra` if it is given
+    \'\'\'
+
+    if extra is not None:
+        d["@extra"] = extra
+
+    return _tdlib_request_encoder.encode(d)
+
+
+'''
+
+
+# the first line of every file in a package written by `Generator.write_attrs_package`, this is also
+# how we recognize the files we wrote earlier, so we can remove them if they are no longer needed
+ATTRS_PACKAGE_GENERATED_MARKER = "# generated by telegram_tl_parser, do not edit\n"
+
+ATTRS_PACKAGE_BASE_MODULE_NAME = "_base"
+
+# the module that the functions whose return type doesn't belong to any other module go in
+ATTRS_PACKAGE_FUNCTIONS_MODULE_NAME = "_functions"
+
+# the name of the dict from class name -> the name of the submodule that defines it
+ATTRS_PACKAGE_CLASS_MODULES_VAR_NAME = "CLASS_MODULES"
+
+ATTRS_PACKAGE_BASE_LAZY_LOADING = \
+'''
+def load_class(name:str) -> type:
+    \'\'\'
+    imports the submodule that defines the class with the given name, and returns the class
+    \'\'\'
+
+    return getattr(importlib.import_module(f"{__package__}.{CLASS_MODULES[name]}"), name)
+
+
+class LazyNamespace(dict):
+    \'\'\'
+    a dict that imports classes the first time they are looked up, so it can be used as the namespace
+    for `eval` or `typing.get_type_hints` without importing every submodule up front
+    \'\'\'
+
+    def __missing__(self, key:str) -> typing.Any:
+
+        if key not in CLASS_MODULES:
+            raise KeyError(key)
+
+        value = load_class(key)
+        self[key] = value
+        return value
+'''
+
+ATTRS_PACKAGE_BASE_LAZY_DECODERS = \
+'''
+
+class _LazyDecoders(dict):
+    \'\'\'
+    `@type` -> decoder, where the decoder's submodule is only imported the first time it is needed
+    \'\'\'
+
+    def __missing__(self, key:str) -> typing.Callable[[typing.Mapping[str, typing.Any]], RootObject]:
+
+        if key not in CLASS_MODULES:
+            raise KeyError(key)
+
+        value = load_class(key).from_tdlib_dict
+        self[key] = value
+        return value
+
+
+TDLIB_TYPE_DECODERS:typing.Dict[str, typing.Callable[[typing.Mapping[str, typing.Any]], RootObject]] = _LazyDecoders()
+'''
+
+ATTRS_PACKAGE_BASE_LAZY_RESULT_TYPES = \
+'''
+
+class _LazyResultTypes(dict):
+    \'\'\'
+    function name -> the class of its result, where the class's submodule is only imported the first time it is needed
+    \'\'\'
+
+    def __missing__(self, key:str) -> type:
+
+        if key not in _FUNCTION_RESULT_TYPE_NAMES:
+            raise KeyError(key)
+
+        value = load_class(_FUNCTION_RESULT_TYPE_NAMES[key])
+        self[key] = value
+        return value
+
+
+TDLIB_FUNCTION_RESULT_TYPES:typing.Dict[str, type] = _LazyResultTypes()
+'''
+
+ATTRS_PACKAGE_INIT_LAZY_LOADING = \
+'''
+
+__all__ = ["RootObject", *CLASS_MODULES]
+
+
+def __getattr__(name:str) -> typing.Any:
+
+    # only called when `name` isn't already in this module, the class is
+    # added to the module so the next lookup doesn't come back here
+    if name in CLASS_MODULES:
+        value = load_class(name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> typing.List[str]:
+
+    return sorted(set(globals()) | set(CLASS_MODULES))
+
+
+# use these when you need to use `typing.get_type_hints` or `eval`
+# to resolve a string representation of these types, classes are imported
+# the first time they are looked up
+tdlib_gen_globals = LazyNamespace(globals())
+tdlib_gen_locals = tdlib_gen_globals
+'''
+
+
+# the name the client module imports the module with the attrs classes as
+CLIENT_GEN_CLASSES_MODULE_ALIAS = "tl"
+
+CLIENT_GEN_CLIENT_CLASS_NAME = "TdlibClient"
+
+# the names that `TdlibClientBase` uses, a function with one of these names gets a `_` added to the end of its method name
+CLIENT_GEN_RESERVED_NAMES = frozenset(["invoke", "start", "shutdown", "transport", "update_handler"])
+
+CLIENT_GEN_IMPORT_STATEMENTS = \
+'''from __future__ import annotations
+import asyncio
+import decimal
+import itertools
+import json
+import logging
+import typing
+
+import {classes_module} as tl
+
+logger = logging.getLogger(__name__)
+
+'''
+
+CLIENT_GEN_RUNTIME = \
+'''
+class TdlibError(Exception):
+    \'\'\'
+    raised by a call when tdlib answers it with an `error`
+    \'\'\'
+
+    def __init__(self, error:typing.Any):
+
+        super().__init__(f"tdlib error {error.code}: {error.message}")
+        self.error = error
+
+
+class TdlibTransport:
+    \'\'\'
+    the interface between `TdlibClient` and tdlib, implement this to connect the client to a tdlib instance
+    \'\'\'
+
+    async def send(self, request:str) -> None:
+        \'\'\'
+        sends a request to tdlib, the JSON string from a function's `to_request`
+        \'\'\'
+
+        raise NotImplementedError()
+
+    async def receive(self) -> typing.Dict[str, typing.Any]:
+        \'\'\'
+        waits for the next response or update from tdlib, and returns it decoded from JSON
+        \'\'\'
+
+        raise NotImplementedError()
+
+    async def close(self) -> None:
+        \'\'\'
+        closes the connection to tdlib
+        \'\'\'
+
+        pass
+
+
+class FakeTdlibTransport(TdlibTransport):
+    \'\'\'
+    a transport that answers requests in process, for tests and benchmarks
+
+    every request is decoded and handed to `handler`, which returns the response as a dict, or None to
+    not answer it. The `@extra` of the request is copied to the response
+    \'\'\'
+
+    def __init__(self, handler:typing.Callable[[typing.Dict[str, typing.Any]], typing.Optional[typing.Dict[str, typing.Any]]]):
+
+        self.handler = handler
+        self.requests_sent = 0
+
+        # created on first use, since before python 3.10 a queue binds to the event loop that is current
+        # when it is created, which isn't the one `asyncio.run` starts if the transport is made before it
+        self._incoming:typing.Optional[asyncio.Queue] = None
+
+    def _incoming_queue(self) -> asyncio.Queue:
+
+        if self._incoming is None:
+            self._incoming = asyncio.Queue()
+
+        return self._incoming
+
+    async def send(self, request:str) -> None:
+
+        request_dict = json.loads(request)
+        self.requests_sent += 1
+
+        response = self.handler(request_dict)
+
+        if response is not None:
+            response = dict(response)
+
+            if "@extra" in request_dict:
+                response["@extra"] = request_dict["@extra"]
+
+            self._incoming_queue().put_nowait(response)
+
+    def push_update(self, update:typing.Dict[str, typing.Any]) -> None:
+        \'\'\'
+        queues a update, as if tdlib had sent it, call this from the event loop the client runs on
+        \'\'\'
+
+        self._incoming_queue().put_nowait(update)
+
+    async def receive(self) -> typing.Dict[str, typing.Any]:
+
+        return await self._incoming_queue().get()
+
+
+class TdlibClientBase:
+    \'\'\'
+    sends requests to tdlib over a `TdlibTransport`, and matches up the responses with the requests
+    by their `@extra`, so any number of requests can be waiting for a response at the same time
+
+    anything tdlib sends that isn't a response to a request is decoded and passed to `update_handler`
+    \'\'\'
+
+    def __init__(self,
+        transport:TdlibTransport,
+        update_handler:typing.Optional[typing.Callable[[tl.RootObject], None]]=None):
+
+        self.transport = transport
+        self.update_handler = update_handler
+
+        # `@extra` -> the future of the request that is waiting for a response
+        self._pending:typing.Dict[str, asyncio.Future] = dict()
+        self._extra_counter = itertools.count(1)
+        self._receive_task:typing.Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> TdlibClientBase:
+
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info:typing.Any) -> None:
+
+        await self.shutdown()
+
+    async def start(self) -> None:
+        \'\'\'
+        starts receiving responses and updates from the transport
+        \'\'\'
+
+        if self._receive_task is None:
+            self._receive_task = asyncio.get_running_loop().create_task(self._receive_loop())
+
+    async def shutdown(self) -> None:
+        \'\'\'
+        stops receiving, fails every request that is still waiting for a response and closes the transport
+        \'\'\'
+
+        if self._receive_task is not None:
+            self._receive_task.cancel()
+
+            try:
+                await self._receive_task
+            except asyncio.CancelledError:
+                pass
+
+            self._receive_task = None
+
+        self._fail_pending(ConnectionError("the client was shut down"))
+
+        await self.transport.close()
+
+    async def invoke(self, request:tl.RootObject) -> typing.Any:
+        \'\'\'
+        sends a request, and waits for its response
+
+        @param request a instance of one of the function classes
+        @return the response, as one of the attrs classes
+        \'\'\'
+
+        if self._receive_task is None:
+            raise Exception("the client isn't started, use `start` or `async with`")
+
+        if self._receive_task.done():
+            raise ConnectionError("the client stopped receiving from the transport, see the log for why")
+
+        extra = str(next(self._extra_counter))
+        future = asyncio.get_running_loop().create_future()
+        self._pending[extra] = future
+
+        try:
+            await self.transport.send(request.to_request(extra))
+            return await future
+
+        finally:
+            self._pending.pop(extra, None)
+
+    async def _receive_loop(self) -> None:
+
+        try:
+            while True:
+                response = await self.transport.receive()
+
+                try:
+                    self._dispatch(response)
+                except Exception:
+                    logger.exception("dispatching the message `%s` failed, skipping it", response.get("@type"))
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.exception("receiving from the transport failed")
+            self._fail_pending(e)
+
+    def _dispatch(self, response:typing.Dict[str, typing.Any]) -> None:
+
+        future = self._pending.pop(response.get("@extra"), None)
+
+        if future is None:
+
+            if self.update_handler is not None:
+
+                # a update we can't decode or that the handler chokes on shouldn't stop the client
+                try:
+                    self.update_handler(tl.decode_tdlib_object(response))
+                except Exception:
+                    logger.exception("handling the update `%s` failed, skipping it", response.get("@type"))
+
+            return
+
+        if future.done():
+            # the caller gave up waiting
+            return
+
+        try:
+            result = tl.decode_tdlib_object(response)
+
+        except Exception as e:
+            future.set_exception(e)
+            return
+
+        if response["@type"] == "error":
+            future.set_exception(TdlibError(result))
+        else:
+            future.set_result(result)
+
+    def _fail_pending(self, exception:BaseException) -> None:
+
+        for iter_future in self._pending.values():
+            if not iter_future.done():
+                iter_future.set_exception(exception)
+
+        self._pending.clear()
+
+'''
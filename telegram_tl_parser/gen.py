@@ -1,57 +1,117 @@
-import json
 import typing
-import decimal
+import concurrent.futures
+import functools
 import io
 import logging
+import pathlib
 import re
 
-import attr
-
-from telegram_tl_parser.model import TlParameter, TlTypeDefinition, TlFunctionDefinition, TlFileDefinition, TlClassTypeEnum
+from telegram_tl_parser.model import TlParameter, TlTypeDefinition, TlFunctionDefinition, TlFileDefinition, TlClassTypeEnum, TlTypeReference
 import telegram_tl_parser.constants as constants
+import telegram_tl_parser.stats as stats
+import telegram_tl_parser.utils as utils
+from telegram_tl_parser.json_encoder import TlJsonEncoder
 
 logger = logging.getLogger(__name__)
 
-class Generator:
+@functools.lru_cache(maxsize=None)
+def _pythonify_type_reference_cached(type_reference:TlTypeReference) -> str:
+    '''
+    does the work for `Generator._pythonify_type_reference`, this is only called once per
+    distinct type per process
 
-    VERSION = 2
+    @param type_reference the type reference
+    @return the python-ified type
+    '''
 
-    INDENTATION = 4
+    inner_type_replacement = constants.BASIC_TYPES_REPLACEMENT_DICT.get(type_reference.base_name, type_reference.base_name)
 
+    result = f"{'typing.Sequence[' * type_reference.vector_depth}{inner_type_replacement}{']' * type_reference.vector_depth}"
 
-    def _json_default(self, obj:typing.Any) -> typing.Any:
-        '''
-        method meant to be passed into `json.dumps(default=X)` to support
-        custom types that can't be seralized by default
+    logger.debug("------ pythonify result: `%s` becomes `%s`", type_reference.to_tl_type(), result)
 
-        @param obj the object that can't be serialized
-        @return the serialized version of the object or we raise a TypeError if we can't handle it
-        '''
+    return result
 
-        if isinstance(obj, TlClassTypeEnum):
+@functools.lru_cache(maxsize=None)
+def _tdlib_codec_template(type_reference:TlTypeReference, decode:bool) -> str:
+    '''
+    returns a template (with `{}` where the value goes) of the expression that converts a value of
+    the given type from (or to) tdlib's JSON, this is only worked out once per distinct type per process
 
-            return obj.value
-        else:
+    @param type_reference the type of the value
+    @param decode True for the expression that converts from tdlib's JSON, False for the one that converts to it
+    @return the template
+    '''
+
+    if type_reference.base_name in constants.BASIC_TYPES_REPLACEMENT_DICT:
+        basic_codecs = constants.TDLIB_JSON_BASIC_TYPE_DECODERS if decode else constants.TDLIB_JSON_BASIC_TYPE_ENCODERS
+        template = basic_codecs.get(type_reference.base_name)
+
+        # passed through as it is, so a vector of it can be passed through as it is as well
+        if template is None:
+            return "{}"
+
+    else:
+        template = "decode_tdlib_object({})" if decode else "encode_tdlib_object({})"
 
-            raise TypeError(f"can't handle a object of type `{type(obj)}`")
+    # wrap it in a list comprehension for every vector, from the innermost one out, so
+    # `vector<vector<X>>` becomes `[[X(v1) for v1 in v0] for v0 in {}]`
+    for iter_depth in reversed(range(type_reference.vector_depth)):
+        template = "[" + template.format(f"v{iter_depth}") + f" for v{iter_depth} in {{}}]"
 
-    def tl_file_definition_to_json(self, filedef:TlFileDefinition) -> str:
+    return template
+
+# NOTE: you need `kw_only` or else you get errors because the root class has a parameter
+# with a default value while subclasses have parameters without a default value
+# see http://www.attrs.org/en/stable/examples.html#keyword-only-attributes
+ATTR_S_ANNOTATION_STRING = "@attr.s(auto_attribs=True, frozen=True, kw_only=True)\n"
+
+class Generator:
+
+    VERSION = 2
+
+    INDENTATION = 4
+
+
+    def tl_file_definition_to_json(self, filedef:TlFileDefinition, compact:bool=False) -> str:
         ''' takes a TlFileDefinition and converts it to JSON
 
         @param filedef a TlFileDefinition object
+        @param compact if True the JSON has no whitespace at all, else it is indented
         @return a JSON string
 
         '''
 
-        root_obj = {"__version__": Generator.VERSION, "tl_file_definition": {}}
+        out = io.StringIO()
+
+        self.write_json(filedef, out, compact=compact)
+
+        return out.getvalue()
+
+    def write_json(self,
+        filedef:TlFileDefinition,
+        fp:typing.TextIO,
+        run_stats:typing.Optional[stats.RunStats]=None,
+        compact:bool=False) -> None:
+        '''
+        takes a TlFileDefinition and writes it as JSON to the given file object, a bit at a time,
+        so the whole document never has to be in memory at once
+
+        unless `compact` is True, the output is the same as `json.dumps(attr.asdict(...), indent=4)` of the
+        entire document would give, see `TlJsonEncoder`
 
-        d = attr.asdict(filedef, recurse=True)
+        @param filedef a TlFileDefinition object
+        @param fp the file object to write to
+        @param run_stats if provided, the time and memory of emitting the JSON are recorded in it
+        @param compact if True the JSON has no whitespace at all, else it is indented
+        '''
 
-        root_obj["tl_file_definition"] = d
+        root_obj = {"__version__": Generator.VERSION, "tl_file_definition": filedef}
 
-        json_str = json.dumps(root_obj, indent=4, default=self._json_default)
+        encoder = TlJsonEncoder(indent=None if compact else Generator.INDENTATION)
 
-        return json_str
+        with stats.phase(run_stats, "emit json"):
+            encoder.write(root_obj, fp)
 
     def _tl_type_definition_sorter(self, obj:typing.Any) -> typing.Any:
         ''' function we pass to `sorted` to help us sort
@@ -92,18 +152,6 @@ class Generator:
         return " " * num_spaces
 
 
-    def _replace_basic_type_with_python_type(self, t:str) -> str:
-        '''
-        helper to look up in the Generator.BASIC_TYPES_REPLACEMENT_DICT dictionary
-        '''
-        if t in constants.BASIC_TYPES_REPLACEMENT_DICT.keys():
-            replacement = constants.BASIC_TYPES_REPLACEMENT_DICT[t]
-            logger.debug("------ replacing `%s` with `%s`", t, replacement)
-            return replacement
-        else:
-            logger.debug("------ not replacing `%s` with anything, returning as is", t)
-            return t
-
     def _pythonify_tl_type(self, tl_type:str) -> str:
         '''
         helper to take a object type that appears in a TL file and pythonify it
@@ -117,162 +165,834 @@ class Generator:
         @return the python-ified type to put in the class or function definition
         '''
 
-        logger.debug("---- pythonifying the type `%s`", tl_type)
-        result = None
+        return self._pythonify_type_reference(TlTypeReference.from_tl_type(tl_type))
 
-        # first see if this is a vector type, as that requires special handling
-        # if it is not a vector, just try and replace the type normally
-        if (regex_result := constants.BASIC_TYPE_VECTOR_REGEX.search(tl_type)) is not None:
+    def _pythonify_type_reference(self, type_reference:TlTypeReference) -> str:
+        '''
+        same as `_pythonify_tl_type` but for a TlTypeReference, like the ones on `TlParameter.param_type_reference`
 
-            logger.debug("------ vector regex matched: `%s`", regex_result)
+        the result only depends on the type reference, so it is cached for the whole process
 
-            # it is a vector type, we need to loop becuase we could have arbitrarily nested vectors
-            # since it already matched, we start out with 1 'sequence' wrapping the inner type, but
-            # we might have double (or even triple? why) nested vectors
-            running_prefix = "typing.Sequence["
-            middle = regex_result.groupdict()[constants.BASIC_TYPE_VECTOR_REGEX_TYPE_NAME]
-            running_suffix = "]"
+        @param type_reference the type reference
+        @return the python-ified type to put in the class or function definition
+        '''
 
+        return _pythonify_type_reference_cached(type_reference)
 
-            while True:
-                logger.debug("-------- vector unwrapping, prefix: `%s`, middle: `%s`, suffix: `%s`",
-                    running_prefix, middle, running_suffix)
 
-                tmp_regex_result = constants.BASIC_TYPE_VECTOR_REGEX.search(middle)
-                if tmp_regex_result:
-                    logger.debug("---------- matched again")
-                    running_prefix += "typing.Sequence["
-                    running_suffix += "]"
-                    middle = tmp_regex_result.groupdict()[constants.BASIC_TYPE_VECTOR_REGEX_TYPE_NAME]
-                else:
-                    logger.debug("---------- didn't match again")
-                    break
+    def tl_file_definition_to_attrs_classes(self, filedef:TlFileDefinition, with_codecs:bool=False, jobs:int=1) -> str:
+        '''
+        takes a TlFileDefinition and converts it to Attrs style classes
 
-            # replace the inner type, and then return it as prefix + middle (type) + suffix
-            vector_inner_type = middle
-            inner_type_replacement = self._replace_basic_type_with_python_type(vector_inner_type)
+        @param filedef a TlFileDefinition object
+        @param with_codecs whether to include the tdlib JSON encoders and decoders, see `write_attrs_classes`
+        @param jobs the number of worker processes to render the classes with, see `write_attrs_classes`
+        @return a string containing the text of the class, suitable for writing out as a .py file
+        '''
 
-            result = f"{running_prefix}{inner_type_replacement}{running_suffix}"
-        else:
-            # it is not a vector type
-            logger.debug("------ vector regex didn't match")
-            result = self._replace_basic_type_with_python_type(tl_type)
+        out = io.StringIO()
 
-        logger.debug("------ pythonify result: `%s` becomes `%s`", tl_type, result)
-        return result
+        self.write_attrs_classes(filedef, out, with_codecs=with_codecs, jobs=jobs)
 
+        return out.getvalue()
 
-    def tl_file_definition_to_attrs_classes(self, filedef:TlFileDefinition) -> str:
+    def write_attrs_classes(self,
+        filedef:TlFileDefinition,
+        out:typing.TextIO,
+        run_stats:typing.Optional[stats.RunStats]=None,
+        with_codecs:bool=False,
+        jobs:int=1) -> None:
         '''
-        takes a TlFileDefinition and converts it to Attrs style classes
+        takes a TlFileDefinition and writes it as Attrs style classes to the given file object, one class at a time
 
         @param filedef a TlFileDefinition object
-        @return a string containing the text of the class, suitable for writing out as a .py file
+        @param out the file object to write to
+        @param run_stats if provided, the time and memory of sorting and emitting the classes are recorded in it
+        @param with_codecs if True, every concrete type and function also gets `from_tdlib_dict` / `to_tdlib_dict`
+            methods, and the module gets the `TDLIB_TYPE_DECODERS` and `TDLIB_FIELD_TABLES` dicts, see `_write_codec_methods`
+        @param jobs if more than 1, the classes are rendered by this many worker processes, see
+            `_render_definition_classes_in_parallel`, the output is the same as rendering them in this process
         '''
 
-        l = logger.getChild("attrs_gen")
+        # need to sort the types so we don't have the classes defined in a invalid order
+        with stats.phase(run_stats, "sort types"):
+            sorted_type_defs_list = sorted(filedef.types, key=self._tl_type_definition_sorter)
+
+        with stats.phase(run_stats, "emit attrs classes"):
+            self._write_attrs_classes(sorted_type_defs_list, filedef.functions, out, with_codecs, jobs)
+
+    def _write_attrs_classes(self,
+        sorted_type_defs_list:typing.Sequence[TlTypeDefinition],
+        function_defs_list:typing.Sequence[TlFunctionDefinition],
+        out:typing.TextIO,
+        with_codecs:bool,
+        jobs:int=1) -> None:
+        '''
+        does the work for `write_attrs_classes`
 
+        @param sorted_type_defs_list the types, already sorted so the classes are defined in a valid order
+        @param function_defs_list the functions
+        @param out the file object to write to
+        @param with_codecs whether to write the tdlib JSON encoders and decoders
+        @param jobs the number of worker processes to render the classes with
+        '''
 
-        # where we will write the result while constructing it
-        out = io.StringIO()
+        l = logger.getChild("attrs_gen")
 
         out.write(constants.ATTRS_GEN_IMPORT_STATEMENTS)
 
+        if with_codecs:
+            out.write(constants.ATTRS_GEN_CODECS_HELPERS)
+
         l.debug("starting TlFileDefinition -> attrs classes generation")
 
-        l.debug("starting on types")
+        # the types and then the functions, every class only depends on its own definition
+        definitions = list(sorted_type_defs_list) + list(function_defs_list)
 
-        # need to sort the types so we don't have the classes defined in a invalid order
-        sorted_type_defs_list = sorted(filedef.types, key=self._tl_type_definition_sorter)
+        if jobs > 1:
 
-        # NOTE: you need `kw_only` or else you get errors because the root class has a parameter
-        # with a default value while subclasses have parameters without a default value
-        # see http://www.attrs.org/en/stable/examples.html#keyword-only-attributes
-        attr_s_annotation_string = "@attr.s(auto_attribs=True, frozen=True, kw_only=True)\n"
+            for iter_rendered in self._render_definition_classes_in_parallel(definitions, with_codecs, jobs):
+                out.write(iter_rendered)
 
-        # types
-        for iter_type_def in sorted_type_defs_list:
+        else:
 
-            l.debug("current type def: `%s`", iter_type_def)
+            for iter_definition in definitions:
+                self._write_definition_class(iter_definition, out, with_codecs)
 
-            if iter_type_def.class_name == constants.ROOT_OBJECT_NAME:
-                # hack because we need to add some special stuff to the root object's
-                # attr definition that no other object needs so i'm just hard coding
-                # the root object definition in a string
+        if with_codecs:
+            self._write_codec_tables(self._codec_classes(sorted_type_defs_list, function_defs_list), out)
+            out.write("\n")
+
+        self._write_function_result_table(constants.TDLIB_FUNCTION_RESULT_TYPES_VAR_NAME,
+            self._function_result_types(sorted_type_defs_list, function_defs_list), False, out)
+
+        # then finally write the two variables that are the 'global' and 'local' namespaces
+        # for stuff to use when they need help `eval()`ing a string representation of one of
+        # these classes
+
+        out.write(constants.ATTRS_GEN_LOCALS_AND_GLOBALS_VARS)
+
+    def _write_definition_class(self,
+        definition:typing.Union[TlTypeDefinition, TlFunctionDefinition],
+        out:typing.TextIO,
+        with_codecs:bool) -> None:
+        '''
+        writes the attrs class for a single type or function, what gets written only depends on the definition,
+        so this is the unit of work that `_render_definition_classes_in_parallel` hands out
+
+        @param definition the TlTypeDefinition or TlFunctionDefinition to write
+        @param out the file object to write to
+        @param with_codecs whether to write the tdlib JSON encoders and decoders
+        '''
+
+        if isinstance(definition, TlFunctionDefinition):
+            self._write_function_class(definition, out, with_codecs)
+
+        elif definition.class_name == constants.ROOT_OBJECT_NAME:
+            # hack because we need to add some special stuff to the root object's
+            # attr definition that no other object needs so i'm just hard coding
+            # the root object definition in a string
+
+            out.write(constants.ATTRS_GEN_ROOT_OBJECT_DEFINITION)
+            logger.getChild("attrs_gen").debug("writing hard coded root object definition")
+
+        else:
+            self._write_type_class(definition, out, with_codecs)
+
+    def _render_definition_classes_in_parallel(self,
+        definitions:typing.Sequence[typing.Union[TlTypeDefinition, TlFunctionDefinition]],
+        with_codecs:bool,
+        jobs:int) -> typing.Iterator[str]:
+        '''
+        splits the definitions into runs of consecutive definitions and renders their classes in a process pool,
+        the rendered runs are yielded in the same order as the definitions, so writing them out one after the
+        other gives exactly what `_write_definition_class` would for each definition in turn
+
+        @param definitions the types and functions, in the order their classes are written
+        @param with_codecs whether to write the tdlib JSON encoders and decoders
+        @param jobs the number of worker processes to use
+        @return a iterator of the rendered text of each run, in order
+        '''
+
+        # a few runs per worker so one slow run doesn't hold everything up
+        num_runs = jobs * 4
+        run_len = max(1, -(-len(definitions) // num_runs))
+
+        run_starts = list(range(0, len(definitions), run_len))
+        run_ends = [min(x + run_len, len(definitions)) for x in run_starts]
+
+        logger.info("rendering `%s` classes in `%s` runs with `%s` workers", len(definitions), len(run_starts), jobs)
+
+        # the workers get all of the definitions once, when they start (which costs nothing when the processes are
+        # forked), and each run is just a range of indexes, sending the definitions with every run costs
+        # more than rendering them does
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_render_worker,
+            initargs=(definitions, with_codecs)) as executor:
 
-                out.write(constants.ATTRS_GEN_ROOT_OBJECT_DEFINITION)
-                l.debug("writing hard coded root object definition")
+            # `map` gives the results in the order the runs were submitted in, no matter which finishes first
+            yield from executor.map(_render_definition_classes, run_starts, run_ends)
+
+    def _codec_classes(self,
+        type_defs_list:typing.Sequence[TlTypeDefinition],
+        function_defs_list:typing.Sequence[TlFunctionDefinition]) -> typing.List[typing.Tuple[str, typing.Sequence[TlParameter]]]:
+        '''
+        @param type_defs_list the types
+        @param function_defs_list the functions
+        @return the `@type` of every class that gets codecs (the concrete types and the functions), and its parameters
+        '''
+
+        result = [(x.class_name, x.parameters) for x in type_defs_list if x.class_type == TlClassTypeEnum.CONCRETE]
+        result.extend((x.function_name, x.parameters) for x in function_defs_list)
+
+        return result
+
+    def _write_type_class(self, type_def:TlTypeDefinition, out:typing.TextIO, with_codecs:bool) -> None:
+        '''
+        writes the attrs class for a single type (other than the root object)
+
+        @param type_def the type to write
+        @param out the file object to write to
+        @param with_codecs whether to write the tdlib JSON encoders and decoders
+        '''
+
+        l = logger.getChild("attrs_gen")
+
+        l.debug("current type def: `%s`", type_def)
+
+        out.write(ATTR_S_ANNOTATION_STRING)
+
+        # see if this class extends anything , everything should extend something except for the
+        # "root object" we have
+        if type_def.extends_from:
+            out.write(f"class {type_def.class_name}({type_def.extends_from}):\n")
+        else:
+            out.write(f"class {type_def.class_name}:\n")
+
+        # write out the special 'type' name
+        out.write(f"{self._spaces(Generator.INDENTATION)}{constants.TDLIB_TYPE_VAR_NAME} = \"{type_def.class_name}\"\n")
+
+        # write out the parameters, or pass if there are none
+        if len(type_def.parameters) > 0:
+            for iter_param_def in type_def.parameters:
+                l.debug("-- param: `%s`", iter_param_def)
+
+                param_type = self._pythonify_type_reference(iter_param_def.param_type_reference)
+
+                # handle if the parameter is marked as required or not
+                if iter_param_def.required:
+                    out.write(f"{self._spaces(Generator.INDENTATION)}{iter_param_def.param_name}:{param_type} = attr.ib()\n")
+                else:
+                    # special case string, where we need to surround the value in quotes
+                    if isinstance(iter_param_def.default_value, str):
+                        out.write(f"{self._spaces(Generator.INDENTATION)}{iter_param_def.param_name}:{param_type} = attr.ib(default=\"{iter_param_def.default_value}\")\n")
+                    else:
+                        out.write(f"{self._spaces(Generator.INDENTATION)}{iter_param_def.param_name}:{param_type} = attr.ib(default={iter_param_def.default_value})\n")
+
+        else:
+            l.debug(" -- no parameters")
+
+        if with_codecs and type_def.class_type == TlClassTypeEnum.CONCRETE:
+            self._write_codec_methods(type_def.class_name, type_def.parameters, out)
+
+        out.write("\n")
+        out.write("\n")
+
+    def _write_function_class(self, function_def:TlFunctionDefinition, out:typing.TextIO, with_codecs:bool) -> None:
+        '''
+        writes the attrs class for a single function
+
+        @param function_def the function to write
+        @param out the file object to write to
+        @param with_codecs whether to write the tdlib JSON encoders and decoders
+        '''
+
+        l = logger.getChild("attrs_gen")
+
+        l.debug("current function def: `%s`", function_def)
+
+        out.write(ATTR_S_ANNOTATION_STRING)
+
+        # all functions extend from 'root object'
+        out.write(f"class {function_def.function_name}({constants.ROOT_OBJECT_NAME}):\n")
+
+        # write out the special 'type' name
+        out.write(f"{self._spaces(Generator.INDENTATION)}{constants.TDLIB_TYPE_VAR_NAME} = \"{function_def.function_name}\"\n")
+
+        # and the TL type that the function returns
+        out.write(f"{self._spaces(Generator.INDENTATION)}{constants.TDLIB_RETURN_TYPE_VAR_NAME} = \"{function_def.return_type}\"\n")
+
+        # write out the parameters, or pass if there are none
+        if len(function_def.parameters) > 0:
+            for iter_param_def in function_def.parameters:
+                l.debug("-- param: `%s`", iter_param_def)
+
+                param_type = self._pythonify_type_reference(iter_param_def.param_type_reference)
+
+                out.write(f"{self._spaces(Generator.INDENTATION)}{iter_param_def.param_name}:{param_type} = attr.ib()\n")
+        else:
+            l.debug(" -- no parameters")
+
+        if with_codecs:
+            self._write_codec_methods(function_def.function_name, function_def.parameters, out)
+            self._write_request_method(out)
+
+        out.write("\n")
+        out.write("\n")
+
+    def _write_request_method(self, out:typing.TextIO) -> None:
+        '''
+        writes the `to_request` method for a function's class, which returns the JSON string that is sent to tdlib
+        to call the function. It uses `to_tdlib_dict`, so the `@type` and the order of the fields are already
+        worked out and nothing is looked up at runtime
+
+        @param out the file object to write to
+        '''
+
+        ind = self._spaces(Generator.INDENTATION)
+
+        out.write("\n")
+        out.write(f"{ind}def to_request(self, extra:typing.Optional[str]=None) -> str:\n")
+        out.write(f"{ind * 2}return encode_tdlib_request(self.to_tdlib_dict(), extra)\n")
+
+    def _function_result_types(self,
+        type_defs_list:typing.Sequence[TlTypeDefinition],
+        function_defs_list:typing.Sequence[TlFunctionDefinition]) -> typing.List[typing.Tuple[str, str]]:
+        '''
+        works out the class of the result of every function, for `TDLIB_FUNCTION_RESULT_TYPES`
+
+        functions whose return type isn't one of the types (which only happens with a partial TL file) are left out
+
+        @param type_defs_list the types
+        @param function_defs_list the functions
+        @return a list of (function name, the class name of its result)
+        '''
+
+        type_names = set(x.class_name for x in type_defs_list)
+
+        result = []
+
+        for iter_function_def in function_defs_list:
+
+            if iter_function_def.return_type not in type_names:
+                logger.debug("leaving the function `%s` out of `%s`, as its return type `%s` isn't defined",
+                    iter_function_def.function_name, constants.TDLIB_FUNCTION_RESULT_TYPES_VAR_NAME, iter_function_def.return_type)
                 continue
 
+            result.append((iter_function_def.function_name, iter_function_def.return_type))
 
-            out.write(attr_s_annotation_string)
+        return result
 
-            # see if this class extends anything , everything should extend something except for the
-            # "root object" we have
-            if iter_type_def.extends_from:
-                out.write(f"class {iter_type_def.class_name}({iter_type_def.extends_from}):\n")
+    def _write_function_result_table(self,
+        var_name:str,
+        function_result_types:typing.Sequence[typing.Tuple[str, str]],
+        quote_class_names:bool,
+        out:typing.TextIO) -> None:
+        '''
+        writes the dict from function name to the class of its result, so a response can be decoded as the
+        right class without looking anything up
+
+        @param var_name the name of the variable to write
+        @param function_result_types see `_function_result_types`
+        @param quote_class_names whether to write the class names as strings, rather than as the classes themselves
+        @param out the file object to write to
+        '''
+
+        ind = self._spaces(Generator.INDENTATION)
+
+        value_type = "str" if quote_class_names else "type"
+
+        out.write(f"{var_name}:typing.Dict[str, {value_type}] = {{\n")
+
+        for iter_function_name, iter_class_name in function_result_types:
+
+            if quote_class_names:
+                out.write(f"{ind}\"{iter_function_name}\": \"{iter_class_name}\",\n")
             else:
-                out.write(f"class {iter_type_def.class_name}:\n")
+                out.write(f"{ind}\"{iter_function_name}\": {iter_class_name},\n")
 
-            # write out the special 'type' name
-            out.write(f"{self._spaces(Generator.INDENTATION)}{constants.TDLIB_TYPE_VAR_NAME} = \"{iter_type_def.class_name}\"\n")
+        out.write("}\n")
 
-            # write out the parameters, or pass if there are none
-            if len(iter_type_def.params) > 0:
-                for iter_param_def in iter_type_def.params:
-                    l.debug("-- param: `%s`", iter_param_def)
+    def _write_codec_methods(self, class_name:str, parameters:typing.Sequence[TlParameter], out:typing.TextIO) -> None:
+        '''
+        writes the `from_tdlib_dict` and `to_tdlib_dict` methods for a class, these convert between the class
+        and the dicts that tdlib's JSON is made of, field by field, with the conversion for each field's type
+        already worked out, so no reflection is needed at runtime
 
-                    param_type = self._pythonify_tl_type(iter_param_def.param_type)
+        @param class_name the name of the class, which is also its `@type`
+        @param parameters the parameters of the class
+        @param out the file object to write to
+        '''
 
-                    # handle if the parameter is marked as required or not
-                    if iter_param_def.required:
-                        out.write(f"{self._spaces(Generator.INDENTATION)}{iter_param_def.param_name}:{param_type} = attr.ib()\n")
-                    else:
-                        # special case string, where we need to surround the value in quotes
-                        if isinstance(iter_param_def.default_value, str):
-                            out.write(f"{self._spaces(Generator.INDENTATION)}{iter_param_def.param_name}:{param_type} = attr.ib(default=\"{iter_param_def.default_value}\")\n")
-                        else:
-                            out.write(f"{self._spaces(Generator.INDENTATION)}{iter_param_def.param_name}:{param_type} = attr.ib(default={iter_param_def.default_value})\n")
+        ind = self._spaces(Generator.INDENTATION)
+        type_key = constants.AS_TDLIB_JSON_TYPE_KEY_NAME
+        extra_key = constants.TDLIB_JSON_EXTRA_KEY_NAME
+
+        out.write("\n")
+        out.write(f"{ind}@staticmethod\n")
+        out.write(f"{ind}def from_tdlib_dict(d:typing.Mapping[str, typing.Any]) -> {class_name}:\n")
+        out.write(f"{ind * 2}return {class_name}(\n")
+
+        for iter_param_def in parameters:
 
+            type_reference = iter_param_def.param_type_reference
+
+            # tdlib leaves out objects that are null, so only those are looked up with `get`
+            if type_reference.vector_depth == 0 and type_reference.base_name not in constants.BASIC_TYPES_REPLACEMENT_DICT:
+                value = f"d.get(\"{iter_param_def.param_name}\")"
             else:
-                l.debug(" -- no parameters")
+                value = f"d[\"{iter_param_def.param_name}\"]"
 
-            out.write("\n")
-            out.write("\n")
+            out.write(f"{ind * 3}{iter_param_def.param_name}={_tdlib_codec_template(type_reference, True).format(value)},\n")
 
-        # functions
-        for iter_function_def in filedef.functions:
-            l.debug("current function def: `%s`", iter_function_def)
+        out.write(f"{ind * 3}extra=d.get(\"{extra_key}\", \"\"))\n")
 
+        out.write("\n")
+        out.write(f"{ind}def to_tdlib_dict(self) -> typing.Dict[str, typing.Any]:\n")
+        out.write(f"{ind * 2}d = {{\n{ind * 3}\"{type_key}\": \"{class_name}\"")
 
-            out.write(attr_s_annotation_string)
+        for iter_param_def in parameters:
 
-            # all functions extend from 'root object'
-            out.write(f"class {iter_function_def.function_name}({constants.ROOT_OBJECT_NAME}):\n")
+            value = f"self.{iter_param_def.param_name}"
 
-            # write out the special 'type' name
-            out.write(f"{self._spaces(Generator.INDENTATION)}{constants.TDLIB_TYPE_VAR_NAME} = \"{iter_function_def.function_name}\"\n")
+            out.write(f",\n{ind * 3}\"{iter_param_def.param_name}\": {_tdlib_codec_template(iter_param_def.param_type_reference, False).format(value)}")
 
-            # write out the parameters, or pass if there are none
-            if len(iter_function_def.params) > 0:
-                for iter_param_def in iter_function_def.params:
-                    l.debug("-- param: `%s`", iter_param_def)
+        out.write("}\n")
+        out.write(f"{ind * 2}if self._extra != \"\":\n")
+        out.write(f"{ind * 3}d[\"{extra_key}\"] = self._extra\n")
+        out.write(f"{ind * 2}return d\n")
 
-                    param_type = self._pythonify_tl_type(iter_param_def.param_type)
+    def _write_codec_tables(self,
+        codec_classes:typing.Sequence[typing.Tuple[str, typing.Sequence[TlParameter]]],
+        out:typing.TextIO) -> None:
+        '''
+        writes the module level dicts that go along with the codec methods, `TDLIB_TYPE_DECODERS` which
+        maps each `@type` to the `from_tdlib_dict` of its class, and `TDLIB_FIELD_TABLES`, see `_write_codec_field_table`
 
-                    out.write(f"{self._spaces(Generator.INDENTATION)}{iter_param_def.param_name}:{param_type} = attr.ib()\n")
+        @param codec_classes the `@type` of every class that has codec methods, and its parameters
+        @param out the file object to write to
+        '''
+
+        ind = self._spaces(Generator.INDENTATION)
+
+        out.write(f"{constants.TDLIB_TYPE_DECODERS_VAR_NAME}:typing.Dict[str, typing.Callable[[typing.Mapping[str, typing.Any]], RootObject]] = {{\n")
+
+        for iter_class_name, _ in codec_classes:
+            out.write(f"{ind}\"{iter_class_name}\": {iter_class_name}.from_tdlib_dict,\n")
+
+        out.write("}\n")
+        out.write("\n")
+
+        self._write_codec_field_table(codec_classes, out)
+
+    def _write_codec_field_table(self,
+        codec_classes:typing.Sequence[typing.Tuple[str, typing.Sequence[TlParameter]]],
+        out:typing.TextIO) -> None:
+        '''
+        writes `TDLIB_FIELD_TABLES`, which maps each `@type` to a tuple of (field name, TL type) for its class
+
+        @param codec_classes the `@type` of every class that has codec methods, and its parameters
+        @param out the file object to write to
+        '''
+
+        ind = self._spaces(Generator.INDENTATION)
+
+        out.write(f"{constants.TDLIB_FIELD_TABLES_VAR_NAME}:typing.Dict[str, typing.Tuple[typing.Tuple[str, str], ...]] = {{\n")
+
+        for iter_class_name, iter_parameters in codec_classes:
+            fields = ", ".join(f"(\"{x.param_name}\", \"{x.param_type}\")" for x in iter_parameters)
+
+            # a tuple with one element needs the trailing comma
+            if len(iter_parameters) == 1:
+                fields += ","
+
+            out.write(f"{ind}\"{iter_class_name}\": ({fields}),\n")
+
+        out.write("}\n")
+
+    def _package_module_name(self, group_name:str, used_module_names:typing.Set[str]) -> str:
+        '''
+        works out the name of the submodule for a group of classes, which is the snake case name of
+        the group with a leading underscore, so it can never be the same as the name of a class
+        (which would replace the class with the module when the module gets imported)
+
+        @param group_name the name of the group, normally the abstract type
+        @param used_module_names the module names that are already taken
+        @return the module name
+        '''
+
+        base_module_name = "_" + re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", group_name.lstrip("_")).lower()
+
+        module_name = base_module_name
+        suffix = 2
+
+        while module_name in used_module_names:
+            module_name = f"{base_module_name}_{suffix}"
+            suffix += 1
+
+        used_module_names.add(module_name)
+
+        return module_name
+
+    def _package_groups(self, filedef:TlFileDefinition) -> typing.Dict[str, typing.Tuple[typing.List[TlTypeDefinition], typing.List[TlFunctionDefinition]]]:
+        '''
+        splits the types and functions (other than the root object) into the groups that each become a submodule
+        of the package, one group per abstract type, with the abstract type, the concrete types that extend it and the
+        functions that return it
+
+        @param filedef a TlFileDefinition object
+        @return a dict of group name -> (the types, already sorted so the classes are defined in a valid order, the functions)
+        '''
+
+        groups:typing.Dict[str, typing.Tuple[typing.List[TlTypeDefinition], typing.List[TlFunctionDefinition]]] = dict()
+
+        # the group that each type ended up in
+        type_groups:typing.Dict[str, str] = dict()
+
+        for iter_type_def in sorted(filedef.types, key=self._tl_type_definition_sorter):
+
+            if iter_type_def.class_name == constants.ROOT_OBJECT_NAME:
+                continue
+
+            if iter_type_def.class_type == TlClassTypeEnum.ABSTRACT or iter_type_def.extends_from in (None, constants.ROOT_OBJECT_NAME):
+                group_name = iter_type_def.class_name
             else:
-                l.debug(" -- no parameters")
+                group_name = iter_type_def.extends_from
+
+            groups.setdefault(group_name, ([], []))[0].append(iter_type_def)
+            type_groups[iter_type_def.class_name] = group_name
+
+        for iter_function_def in filedef.functions:
+
+            group_name = type_groups.get(iter_function_def.return_type, constants.ATTRS_PACKAGE_FUNCTIONS_MODULE_NAME)
+
+            groups.setdefault(group_name, ([], []))[1].append(iter_function_def)
+
+        return groups
+
+    def write_attrs_package(self,
+        filedef:TlFileDefinition,
+        package_dir:pathlib.Path,
+        run_stats:typing.Optional[stats.RunStats]=None,
+        with_codecs:bool=False,
+        skip_unchanged:bool=False,
+        write_stats:typing.Optional[utils.WriteStats]=None) -> None:
+        '''
+        takes a TlFileDefinition and writes it as a package of Attrs style classes, rather than one big module
+
+        there is one submodule per abstract type, with the abstract type, the concrete types that extend it and
+        the functions that return it, plus a `_base` submodule with the root object. The package's `__init__` uses a
+        module level `__getattr__` to import the submodule that defines a class the first time the class is used,
+        so importing the package doesn't have to run the attrs decorators of every class.
+
+        `tdlib_gen_globals` / `tdlib_gen_locals` import the classes as they are looked up as well, so `eval` and
+        `typing.get_type_hints` keep working, and so does `TDLIB_TYPE_DECODERS` if `with_codecs` is True
+
+        any `.py` files in the directory that were written by an earlier call but aren't needed anymore are removed
+
+        with `skip_unchanged`, each file of the package that already has the contents we would write is left
+        alone, so only the submodules whose classes changed get a new modification time
+
+        @param filedef a TlFileDefinition object
+        @param package_dir the directory of the package, created if it doesn't exist
+        @param run_stats if provided, the time and memory of sorting, emitting and writing the classes are recorded in it
+        @param with_codecs whether to include the tdlib JSON encoders and decoders, see `write_attrs_classes`
+        @param skip_unchanged if True, leave the files whose contents wouldn't change alone, see `utils.atomic_write`
+        @param write_stats if provided, each file is recorded in it as either written or unchanged
+        '''
+
+        package_dir = pathlib.Path(package_dir)
+
+        package_files = self.tl_file_definition_to_attrs_package(filedef, run_stats, with_codecs)
+
+        with stats.phase(run_stats, "write output"):
+
+            package_dir.mkdir(parents=True, exist_ok=True)
+
+            for iter_file_name, iter_contents in package_files.items():
+                with utils.atomic_write(package_dir / iter_file_name, skip_unchanged=skip_unchanged, write_stats=write_stats) as f:
+                    f.write(iter_contents)
+
+        self.remove_stale_package_files(package_dir, package_files.keys())
+
+    def tl_file_definition_to_attrs_package(self,
+        filedef:TlFileDefinition,
+        run_stats:typing.Optional[stats.RunStats]=None,
+        with_codecs:bool=False) -> typing.Dict[str, str]:
+        '''
+        does the work for `write_attrs_package`, without writing anything
+
+        @param filedef a TlFileDefinition object
+        @param run_stats if provided, the time and memory of sorting and emitting the classes are recorded in it
+        @param with_codecs whether to include the tdlib JSON encoders and decoders
+        @return a dict of the name of each file in the package -> its contents
+        '''
+
+        with stats.phase(run_stats, "sort types"):
+            groups = self._package_groups(filedef)
+
+        with stats.phase(run_stats, "emit attrs classes"):
+
+            used_module_names = {constants.ATTRS_PACKAGE_BASE_MODULE_NAME, "__init__"}
+
+            # class name -> module name
+            class_modules:typing.Dict[str, str] = dict()
+
+            package_files:typing.Dict[str, str] = dict()
+
+            for iter_group_name, (iter_type_defs, iter_function_defs) in groups.items():
+
+                module_name = self._package_module_name(iter_group_name, used_module_names)
+
+                out = io.StringIO()
+                self._write_package_submodule(iter_type_defs, iter_function_defs, out, with_codecs)
+                package_files[f"{module_name}.py"] = out.getvalue()
+
+                for iter_type_def in iter_type_defs:
+                    class_modules[iter_type_def.class_name] = module_name
+
+                for iter_function_def in iter_function_defs:
+                    class_modules[iter_function_def.function_name] = module_name
+
+            out = io.StringIO()
+            self._write_package_base_module(filedef, class_modules, out, with_codecs)
+            package_files[f"{constants.ATTRS_PACKAGE_BASE_MODULE_NAME}.py"] = out.getvalue()
+
+            out = io.StringIO()
+            self._write_package_init_module(out, with_codecs)
+            package_files["__init__.py"] = out.getvalue()
+
+        return package_files
+
+    def remove_stale_package_files(self, package_dir:pathlib.Path, keep_file_names:typing.Iterable[str]) -> None:
+        '''
+        removes the `.py` files in a package written by `write_attrs_package` that were generated by an earlier
+        call but aren't needed anymore, files that we didn't generate are left alone
+
+        @param package_dir the directory of the package
+        @param keep_file_names the names of the files that are still needed
+        '''
+
+        keep_file_names = set(keep_file_names)
+
+        for iter_path in pathlib.Path(package_dir).glob("*.py"):
+
+            if iter_path.name in keep_file_names:
+                continue
+
+            with open(iter_path, "r", encoding="utf-8") as f:
+                first_line = f.readline()
+
+            if first_line == constants.ATTRS_PACKAGE_GENERATED_MARKER:
+                logger.info("removing `%s`, which was generated earlier but isn't needed anymore", iter_path)
+                iter_path.unlink()
+
+    def _write_package_submodule(self,
+        type_defs_list:typing.Sequence[TlTypeDefinition],
+        function_defs_list:typing.Sequence[TlFunctionDefinition],
+        out:typing.TextIO,
+        with_codecs:bool) -> None:
+        '''
+        writes one of the submodules of the package, see `write_attrs_package`
+
+        @param type_defs_list the types in the submodule, already sorted so the classes are defined in a valid order
+        @param function_defs_list the functions in the submodule
+        @param out the file object to write to
+        @param with_codecs whether to write the tdlib JSON encoders and decoders
+        '''
+
+        out.write(constants.ATTRS_PACKAGE_GENERATED_MARKER)
+        out.write(constants.ATTRS_GEN_IMPORT_STATEMENTS)
 
+        if with_codecs:
+            out.write("import base64\n")
             out.write("\n")
+            out.write(f"from .{constants.ATTRS_PACKAGE_BASE_MODULE_NAME} import {constants.ROOT_OBJECT_NAME}, decode_tdlib_object, encode_tdlib_object, encode_tdlib_request\n")
+        else:
+            out.write(f"from .{constants.ATTRS_PACKAGE_BASE_MODULE_NAME} import {constants.ROOT_OBJECT_NAME}\n")
+
+        out.write("\n")
+        out.write("\n")
+
+        for iter_type_def in type_defs_list:
+            self._write_type_class(iter_type_def, out, with_codecs)
+
+        for iter_function_def in function_defs_list:
+            self._write_function_class(iter_function_def, out, with_codecs)
+
+    def _write_package_base_module(self,
+        filedef:TlFileDefinition,
+        class_modules:typing.Dict[str, str],
+        out:typing.TextIO,
+        with_codecs:bool) -> None:
+        '''
+        writes the `_base` submodule of the package, see `write_attrs_package`
+
+        @param filedef a TlFileDefinition object
+        @param class_modules a dict of class name -> the name of the submodule that defines it
+        @param out the file object to write to
+        @param with_codecs whether to write the tdlib JSON encoders and decoders
+        '''
+
+        ind = self._spaces(Generator.INDENTATION)
+
+        out.write(constants.ATTRS_PACKAGE_GENERATED_MARKER)
+        out.write(constants.ATTRS_GEN_IMPORT_STATEMENTS.replace("import typing\n", "import importlib\nimport typing\n", 1))
+
+        if with_codecs:
+            out.write(constants.ATTRS_GEN_CODECS_HELPERS)
+
+        out.write(constants.ATTRS_GEN_ROOT_OBJECT_DEFINITION)
+
+        out.write(f"{constants.ATTRS_PACKAGE_CLASS_MODULES_VAR_NAME}:typing.Dict[str, str] = {{\n")
+
+        for iter_class_name, iter_module_name in class_modules.items():
+            out.write(f"{ind}\"{iter_class_name}\": \"{iter_module_name}\",\n")
+
+        out.write("}\n")
+        out.write("\n")
+
+        out.write(constants.ATTRS_PACKAGE_BASE_LAZY_LOADING)
+        out.write("\n")
+        out.write("\n")
+
+        self._write_function_result_table("_FUNCTION_RESULT_TYPE_NAMES",
+            self._function_result_types(filedef.types, filedef.functions), True, out)
+
+        out.write(constants.ATTRS_PACKAGE_BASE_LAZY_RESULT_TYPES)
+
+        if with_codecs:
+            out.write(constants.ATTRS_PACKAGE_BASE_LAZY_DECODERS)
             out.write("\n")
+            self._write_codec_field_table(self._codec_classes(filedef.types, filedef.functions), out)
 
+    def _write_package_init_module(self, out:typing.TextIO, with_codecs:bool) -> None:
+        '''
+        writes the `__init__` module of the package, see `write_attrs_package`
 
-        # then finally write the two variables that are the 'global' and 'local' namespaces
-        # for stuff to use when they need help `eval()`ing a string representation of one of
-        # these classes
+        @param out the file object to write to
+        @param with_codecs whether to write the tdlib JSON encoders and decoders
+        '''
 
-        out.write(constants.ATTRS_GEN_LOCALS_AND_GLOBALS_VARS)
+        names = [constants.ROOT_OBJECT_NAME, constants.ATTRS_PACKAGE_CLASS_MODULES_VAR_NAME, "LazyNamespace", "load_class",
+            constants.TDLIB_FUNCTION_RESULT_TYPES_VAR_NAME]
+
+        if with_codecs:
+            names.extend(["decode_tdlib_object", "encode_tdlib_object", "encode_tdlib_request",
+                constants.TDLIB_TYPE_DECODERS_VAR_NAME, constants.TDLIB_FIELD_TABLES_VAR_NAME])
+
+        out.write(constants.ATTRS_PACKAGE_GENERATED_MARKER)
+        out.write(constants.ATTRS_GEN_IMPORT_STATEMENTS)
+        out.write(f"from .{constants.ATTRS_PACKAGE_BASE_MODULE_NAME} import {', '.join(names)}\n")
+        out.write(constants.ATTRS_PACKAGE_INIT_LAZY_LOADING)
+
+    def _pythonify_client_type_reference(self, type_reference:TlTypeReference) -> str:
+        '''
+        same as `_pythonify_type_reference`, but for the client module, where the classes are in the
+        module imported as `tl`
+
+        @param type_reference the type reference
+        @return the python-ified type to put in the client's method definition
+        '''
+
+        if type_reference.base_name in constants.BASIC_TYPES_REPLACEMENT_DICT:
+            return self._pythonify_type_reference(type_reference)
+
+        return self._pythonify_type_reference(TlTypeReference(
+            base_name=f"{constants.CLIENT_GEN_CLASSES_MODULE_ALIAS}.{type_reference.base_name}",
+            vector_depth=type_reference.vector_depth))
+
+    def write_client(self,
+        filedef:TlFileDefinition,
+        out:typing.TextIO,
+        classes_module:str,
+        run_stats:typing.Optional[stats.RunStats]=None) -> None:
+        '''
+        takes a TlFileDefinition and writes a asyncio client for it, with one `async def` per function that
+        sends the request and waits for its response, see `constants.CLIENT_GEN_RUNTIME` for the transport
+        interface and how responses are matched up with requests
+
+        the client uses the attrs classes, which need to be generated with the codecs, see `write_attrs_classes`
+
+        @param filedef a TlFileDefinition object
+        @param out the file object to write to
+        @param classes_module the name that the module (or package) with the attrs classes is imported as, like `telegram_dl.tdlib_generated`
+        @param run_stats if provided, the time and memory of emitting the client are recorded in it
+        '''
+
+        ind = self._spaces(Generator.INDENTATION)
+
+        with stats.phase(run_stats, "emit client"):
+
+            out.write(constants.CLIENT_GEN_IMPORT_STATEMENTS.format(classes_module=classes_module))
+            out.write(constants.CLIENT_GEN_RUNTIME)
+            out.write("\n")
+
+            out.write(f"class {constants.CLIENT_GEN_CLIENT_CLASS_NAME}(TdlibClientBase):\n")
+            out.write(f"{ind}'''\n")
+            out.write(f"{ind}a `TdlibClientBase` with a method for every function\n")
+            out.write(f"{ind}'''\n")
+
+            for iter_function_def in filedef.functions:
+
+                method_name = iter_function_def.function_name
+
+                if method_name in constants.CLIENT_GEN_RESERVED_NAMES:
+                    logger.warning("the function `%s` has the same name as a method of the client, it will be called `%s_`",
+                        method_name, method_name)
+                    method_name += "_"
+
+                return_type = self._pythonify_client_type_reference(TlTypeReference.from_tl_type(iter_function_def.return_type))
+
+                params = "".join(f", {x.param_name}:{self._pythonify_client_type_reference(x.param_type_reference)}"
+                    for x in iter_function_def.parameters)
+
+                if params:
+                    params = ", *" + params
+
+                args = ", ".join(f"{x.param_name}={x.param_name}" for x in iter_function_def.parameters)
+
+                out.write("\n")
+                out.write(f"{ind}async def {method_name}(self{params}) -> {return_type}:\n")
+                out.write(f"{ind * 2}return await self.invoke({constants.CLIENT_GEN_CLASSES_MODULE_ALIAS}.{iter_function_def.function_name}({args}))\n")
+
+
+# what the worker processes of `Generator._render_definition_classes_in_parallel` render, see `_init_render_worker`
+_render_worker_definitions:typing.Sequence[typing.Union[TlTypeDefinition, TlFunctionDefinition]] = ()
+_render_worker_with_codecs = False
+
+
+def _init_render_worker(
+    definitions:typing.Sequence[typing.Union[TlTypeDefinition, TlFunctionDefinition]],
+    with_codecs:bool) -> None:
+    '''
+    initializer for the worker processes of `Generator._render_definition_classes_in_parallel`
+
+    @param definitions all of the types and functions, in the order their classes are written
+    @param with_codecs whether to write the tdlib JSON encoders and decoders
+    '''
+
+    global _render_worker_definitions, _render_worker_with_codecs
+
+    _render_worker_definitions = definitions
+    _render_worker_with_codecs = with_codecs
+
+
+def _render_definition_classes(start_idx:int, end_idx:int) -> str:
+    '''
+    renders the attrs classes for a run of definitions, this runs in a worker process, see
+    `Generator._render_definition_classes_in_parallel`
+
+    @param start_idx the index of the first definition of the run
+    @param end_idx the index after the last definition of the run
+    @return the rendered classes
+    '''
+
+    gen = Generator()
+    out = io.StringIO()
+
+    for iter_definition in _render_worker_definitions[start_idx:end_idx]:
+        gen._write_definition_class(iter_definition, out, _render_worker_with_codecs)
 
-        # done
-        return out.getvalue()
\ No newline at end of file
+    return out.getvalue()
@@ -0,0 +1,319 @@
+import contextlib
+import typing
+import logging
+import threading
+
+import pyparsing
+
+import telegram_tl_parser.utils as utils
+import telegram_tl_parser.constants as constants
+import telegram_tl_parser.model as model
+
+logger = logging.getLogger(__name__)
+
+class TlGrammar:
+    '''
+    the pyparsing grammar for the Telegram TL file, used by the `PYPARSING` engine of `Parser`
+
+    building the grammar is not free, so the normal way to get one is `TlGrammar.get_shared()`,
+    which builds it once per process, and the complete expressions it hands out are cached as well.
+
+    a grammar that has debug actions set on it (debug logging or a `GrammarProfiler`) should not be
+    shared, as those get set on the ParserElements themselves, so those should be created directly
+    '''
+
+    # the process wide grammar, see `get_shared`
+    _shared_grammar:typing.Optional["TlGrammar"] = None
+    _shared_grammar_lock = threading.Lock()
+
+    def __init__(self, grammar_profiler:typing.Optional[utils.GrammarProfiler]=None):
+        '''
+        @param grammar_profiler if provided, every element of the grammar will be registered with
+            the profiler so it can count the match attempts and the time spent in each element
+        '''
+
+        self.grammar_profiler = grammar_profiler
+
+        # the LineIndex of the string each thread is parsing, see `line_index_scope`. The grammar is shared, so this
+        # can't be a plain attribute
+        self._line_indexes = threading.local()
+
+        # cache of the complete expressions, keyed by the name for the part after the equal sign
+        # and the number of lines to skip, see `get_complete_expression`
+        self._complete_expression_cache:typing.Dict[typing.Tuple[str, int], pyparsing.ParserElement] = dict()
+
+        # a literal newline
+        self.pe_newline = self._register_element(pyparsing.Literal('\n'), "newline")
+
+        # a semicolon literal
+        self.pe_semicolon_literal = self._register_element(pyparsing.Literal(";"), "semicolon")
+
+        # a literal colon
+        self.pe_colon_literal = self._register_element(pyparsing.Literal(":"), "colon")
+
+        # literal equal sign
+        self.pe_equal_sign_literal = self._register_element(pyparsing.Literal("="), "equal sign")
+
+        # a literal for the start of a comment
+        self.pe_comment_literal = self._register_element(pyparsing.Literal('//'), "comment start")
+
+        # token that skips to the end of a line
+        # used for the program argument to skip 'N' number of lines
+        self.pe_skip_line = self._register_element(pyparsing.SkipTo(pyparsing.lineEnd, include=True), "skip line")
+
+        # words that can appear in a class name
+        self.pe_class_name = self._register_element(pyparsing.Word(pyparsing.alphanums), "class name")
+
+        # characters that appear in a parameter name or type
+        self.pe_param_name = self._register_element(pyparsing.Word(pyparsing.alphanums + "_"), "param name")
+
+        # need the angle brackets for stuff like `vector<String>`
+        self.pe_param_type =  self._register_element(pyparsing.Word(pyparsing.alphanums + "<>"), "param type")
+
+        # a single param and type pair
+        # so like `message:string`
+        self.pe_param_listing = self._register_element(pyparsing.Group(
+            self.pe_param_name(constants.RESULT_NAME_PARAM_NAME) +
+            self.pe_colon_literal.suppress() +
+            self.pe_param_type(constants.RESULT_NAME_PARAM_TYPE)), "param listing")
+
+        # grouping of zero or more parameters
+        self.pe_zero_or_more_params = self._register_element(pyparsing.ZeroOrMore(
+            self.pe_param_listing(f"{constants.RESULT_NAME_PARAMS}*")), "zero or more params")
+
+        # the actual name of the class/type that is being defined
+        self.pe_tdlib_class_name = self._register_element(
+            self.pe_class_name(constants.RESULT_NAME_CLASS_OR_FUNCTION_NAME), "class or function name")
+
+    @classmethod
+    def get_shared(cls) -> "TlGrammar":
+        '''
+        returns the process wide grammar, building it on first use, this gets reused by
+        every `Parser` instance and every call to `Parser.parse`
+
+        @return the shared TlGrammar
+        '''
+
+        if cls._shared_grammar is None:
+            with cls._shared_grammar_lock:
+                if cls._shared_grammar is None:
+                    logger.debug("building the shared pyparsing grammar")
+                    cls._shared_grammar = cls()
+
+        return cls._shared_grammar
+
+    def _register_element(self, parser_element:pyparsing.ParserElement, name:str) -> pyparsing.ParserElement:
+        '''
+        helper that gives a ParserElement a readable name and registers it with the
+        grammar profiler if we have one
+
+        @param parser_element the element to register
+        @param name the name to give it
+        @return the same ParserElement, so this can be used inline
+        '''
+
+        parser_element.setName(name)
+
+        if self.grammar_profiler is not None:
+            self.grammar_profiler.attach(parser_element)
+
+        return parser_element
+
+    @contextlib.contextmanager
+    def line_index_scope(self) -> typing.Iterator[None]:
+        '''
+        wrap a `parseString` call with this, so the parse actions build the LineIndex of the string being parsed once
+        and share it, and it is dropped as soon as the call is done rather than keeping the string alive
+        '''
+
+        self._line_indexes.index = None
+
+        try:
+            yield
+
+        finally:
+            self._line_indexes.index = None
+
+    def _line_index_for(self, s:str) -> utils.LineIndex:
+        '''
+        returns the LineIndex for the string a parse action was given, pyparsing passes the same string object
+        to every parse action during a `parseString` call, so it is only built once per call
+
+        @param s the string that is being parsed
+        @return a LineIndex for that string
+        '''
+
+        line_index = getattr(self._line_indexes, "index", None)
+
+        if line_index is None or line_index.string is not s:
+            line_index = utils.LineIndex(s)
+            self._line_indexes.index = line_index
+
+        return line_index
+
+    def _setLineAndLineNumberParseAction(self, s:str, loc:int, toks:pyparsing.ParseResults) -> pyparsing.ParseResults:
+        '''
+        helper that is meant to be used with `<ParserElement>.setParseAction`, which means this function gets called
+        whenever a match for each line of the Telegram TL file gets hit.
+
+        Here we add stuff to the ParseResults that it passes in
+
+        we add the source line and source line number to each match
+
+        @param s is the original parse string
+        @param loc is the location in the string where matching started
+        @param toks is the list of the matched tokens, packaged as a ParseResults object
+        @return a ParseResults if you are modifying it, else None
+        '''
+
+        t = toks
+        line_index = self._line_index_for(s)
+        orig_line = line_index.line(loc)
+        line_number = line_index.lineno(loc)
+        column = line_index.col(loc)
+
+        logger.debug("_setLineAndLineNumberParseAction: line_number: `%s`, column: `%s`,  line: `%s`",
+            line_number, column, orig_line)
+
+        t[constants.RESULT_NAME_SOURCE_LINE] = orig_line
+        t[constants.RESULT_NAME_SOURCE_LINE_NUMBER] = line_number
+
+        return t
+
+
+    def _setTlLineTypeStringParseAction(self, line_type:model.TlFileLineType) -> typing.Callable[[str,int,pyparsing.ParseResults], pyparsing.ParseResults]:
+        '''
+        return _inner which will be the function actually called by pyparsing when it encounters a match
+        but it will 'capture' the `line_type` param and be able to use that to add to the token dictionary
+        on a match
+
+        should be registered using .setParseAction on the pyparsing.ParserElement that is responsible
+        for matching the given `TlFileLineType`
+
+        @param line_type the line type enum member identifying what this line is
+
+        @return a function that can be registered as a parser action using `.setParseAction`
+        '''
+
+        def _inner( s:str, loc:int, toks:pyparsing.ParseResults) -> pyparsing.ParseResults:
+            '''
+            helper that is meant to be used with `<ParserElement>.setParseAction`, which means this function gets called
+            whenever a match for each line of the Telegram TL file gets hit.
+
+            Here we add stuff to the ParseResults that it passes in
+
+            this will add a enum to the token dictionary if the match is a line or a comment
+
+            @param s is the original parse string
+            @param loc is the location in the string where matching started
+            @param toks is the list of the matched tokens, packaged as a ParseResults object
+            @return a ParseResults if you are modifying it, else None
+            '''
+
+
+            line_index = self._line_index_for(s)
+            line_number = line_index.lineno(loc)
+            column = line_index.col(loc)
+            toks[constants.RESULT_NAME_TL_LINE_TYPE] = line_type
+            logger.debug("_setTlLineTypeStringParseAction._inner: setting type to be `%s` at line num: `%s`, col: `%s`",
+                line_type, line_number, column)
+            return toks
+
+        return _inner
+
+    def _build_complete_expression(self, name_for_expression_after_equal:str) -> pyparsing.ParserElement:
+        ''' helper that returns the same pyparsing expression but with a different 'name'
+        for the part after the equal sign
+
+        for types, the part after the `=` is the abstract class that the type extends
+
+        for functions, the part after the `=` is the result type
+        '''
+
+        # everything in a line that is past the initial 'name' of the class/type that is being defined
+        pe_params_list_equal_sign_and_extends_from = \
+            self.pe_zero_or_more_params + \
+            self.pe_equal_sign_literal.suppress() + \
+            self._register_element(self.pe_class_name(name_for_expression_after_equal), name_for_expression_after_equal) + \
+            self.pe_semicolon_literal
+
+        # the full line definition for a line that is describing a tdlib type/class (aka not a comment)
+        pe_full_line_tdlib_type_def = self._register_element(
+            self.pe_tdlib_class_name + \
+            pe_params_list_equal_sign_and_extends_from, "definition line")
+
+        # set parser action to add a 'note' that this is a `DEFINITION` line
+        pe_full_line_tdlib_type_def.addParseAction(self._setTlLineTypeStringParseAction(model.TlFileLineType.DEFINITION))
+
+        # set parser action to add the line and column numbers
+        pe_full_line_tdlib_type_def.addParseAction(self._setLineAndLineNumberParseAction)
+
+
+        pe_full_comment_line = self._register_element(
+            self.pe_comment_literal + \
+            self._register_element(pyparsing.restOfLine(constants.RESULT_NAME_COMMENT_TEXT), "comment text"),
+            "comment line")
+
+        # set parser action to add a 'note' that this is a `COMMENT` line
+        pe_full_comment_line.addParseAction(self._setTlLineTypeStringParseAction(model.TlFileLineType.COMMENT))
+
+        # set parser action to add the line and column numbers
+        pe_full_comment_line.addParseAction(self._setLineAndLineNumberParseAction)
+
+        # note: this used to be a `pyparsing.Or`, but that tries every alternative on every line to find the
+        # longest match. A comment always starts with `//` and a definition never does, so at most one of them
+        # can ever match and a `MatchFirst` gives the same results while stopping at the first match.
+        # comments are tried first since there are more of them and they fail faster
+        to_return = \
+            pyparsing.ZeroOrMore(
+                pyparsing.Group(
+                    self._register_element(pyparsing.MatchFirst(
+                            [pe_full_comment_line,
+                            pe_full_line_tdlib_type_def]
+                        ), "comment or definition line")
+                    )
+                )
+
+        return to_return
+
+    def get_complete_expression(self, name_for_expression_after_equal:str, skip_n_lines:int) -> pyparsing.ParserElement:
+        '''
+        returns the complete expression for a section of the TL file, building it the first time it is asked for
+
+        @param name_for_expression_after_equal the result name for the part after the `=`, see `_build_complete_expression`
+        @param skip_n_lines how many lines to skip from the start of the section
+        @return the complete pyparsing expression
+        '''
+
+        cache_key = (name_for_expression_after_equal, skip_n_lines)
+
+        pe_complete_expression = self._complete_expression_cache.get(cache_key)
+
+        if pe_complete_expression is not None:
+            return pe_complete_expression
+
+        pe_complete_expression = self._build_complete_expression(name_for_expression_after_equal)
+
+        if skip_n_lines > 0:
+
+            # I did not need to add `suppress()` before , but for some reason now i do? strange...
+            # if i don't add it then it 'skips' the lines but the lines that i 'skip' still end up
+            # in the parsed results =/
+            # maybe i got lucky with a previous commit's pattern where the first X lines wouldn't
+            # match anyway even if they were 'accepted' by SkipTo? Cause the documentation for
+            # `SkipTo` is `skips ahead in the input string, accepting any characters up`the specified pattern`
+            # so that makes me think that i just got lucky and i actually always needed to add `suppress()`
+            # to the `SkipTo` elements i added
+            #
+            # also: adding all of the `SkipTo` ParserElements to a group and then calling `suppress()`
+            # on that makes the pattern shorter (for debugging), as there is only one `suppress()` and not
+            # X for `skip_n_lines`
+            skip_group = pyparsing.Group(self.pe_skip_line * skip_n_lines).suppress()
+            pe_complete_expression = skip_group + pe_complete_expression
+
+            logger.debug("skip_n_lines is `%s`, adding `%s` SkipTo (`%s`) ParserElements to the expression",
+                skip_n_lines, skip_n_lines, self.pe_skip_line)
+
+        self._complete_expression_cache[cache_key] = pe_complete_expression
+
+        return pe_complete_expression
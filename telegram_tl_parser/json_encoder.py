@@ -0,0 +1,231 @@
+import enum
+import json.encoder
+import logging
+import typing
+
+import attr
+
+import telegram_tl_parser.model as model
+
+logger = logging.getLogger(__name__)
+
+# the C accelerated version if it is available, this is what `json.dumps` uses with the default `ensure_ascii=True`
+encode_string = json.encoder.encode_basestring_ascii
+
+# the enums that can appear in the model, their encoded values are worked out once up front
+ENCODABLE_ENUMS = (model.TlClassTypeEnum, model.TlFileLineType, model.TlFileSectionType)
+
+# how many chunks we collect before writing them to the file object
+CHUNKS_PER_WRITE = 4096
+
+class TlJsonEncoder:
+    '''
+    a JSON encoder that walks the model objects directly, rather than converting them to dictionaries
+    with `attr.asdict` first and then handing those to `json.dumps`
+
+    with an indent, the output is byte for byte the same as `json.dumps(attr.asdict(obj), indent=indent)`, and
+    without an indent it is the most compact JSON possible (no whitespace at all).
+
+    like `attr.asdict` with the filter the Generator uses, only the attributes that are passed to `__init__` are
+    written, so derived or cached attributes are left out
+
+    supports the model's attrs classes, dictionaries with string keys, lists, tuples, strings, ints, floats,
+    bools, None and the enums in `ENCODABLE_ENUMS`
+    '''
+
+    def __init__(self, indent:typing.Optional[int]=4):
+        '''
+        @param indent the number of spaces to indent each level with, or None for compact output
+        '''
+
+        self.indent = indent
+
+        if indent is None:
+            self.key_separator = ":"
+        else:
+            self.key_separator = ": "
+
+        # enum member -> its encoded value
+        self._enum_values:typing.Dict[enum.Enum, str] = {
+            iter_member: encode_string(iter_member.value) for iter_enum in ENCODABLE_ENUMS for iter_member in iter_enum}
+
+        # attrs class -> tuple of (attribute name, encoded key + key separator)
+        self._fields_cache:typing.Dict[type, typing.Tuple[typing.Tuple[str, str], ...]] = dict()
+
+        # nesting level -> the newline and indentation for that level
+        self._newline_cache:typing.Dict[int, str] = dict()
+
+    def _fields_for(self, cls:type) -> typing.Tuple[typing.Tuple[str, str], ...]:
+        '''
+        returns the attributes of the attrs class that get written, along with their already encoded keys
+
+        @param cls the attrs class
+        @return a tuple of (attribute name, encoded key + key separator)
+        '''
+
+        fields = self._fields_cache.get(cls)
+
+        if fields is None:
+            fields = tuple((x.name, encode_string(x.name) + self.key_separator) for x in attr.fields(cls) if x.init)
+            self._fields_cache[cls] = fields
+
+        return fields
+
+    def _newline(self, level:int) -> str:
+        '''
+        @param level the nesting level
+        @return the newline and the indentation for the given level, or an empty string if the output is compact
+        '''
+
+        result = self._newline_cache.get(level)
+
+        if result is None:
+            result = "" if self.indent is None else "\n" + " " * (self.indent * level)
+            self._newline_cache[level] = result
+
+        return result
+
+    def encode(self, obj:typing.Any) -> str:
+        '''
+        @param obj the object to encode
+        @return the JSON string
+        '''
+
+        chunks:typing.List[str] = []
+
+        self._encode_value(obj, 0, chunks, None)
+
+        return "".join(chunks)
+
+    def write(self, obj:typing.Any, fp:typing.TextIO) -> None:
+        '''
+        encodes the object and writes it to the file object, a bit at a time, so the whole document
+        never has to be in memory at once
+
+        @param obj the object to encode
+        @param fp the file object to write to
+        '''
+
+        chunks:typing.List[str] = []
+
+        self._encode_value(obj, 0, chunks, fp)
+
+        fp.write("".join(chunks))
+
+    def _encode_value(self,
+        value:typing.Any,
+        level:int,
+        chunks:typing.List[str],
+        fp:typing.Optional[typing.TextIO]) -> None:
+        '''
+        appends the encoded value to `chunks`
+
+        @param value the value to encode
+        @param level the nesting level of the value
+        @param chunks the list of strings we are appending to
+        @param fp if provided, `chunks` is written out to this and cleared whenever it gets large
+        '''
+
+        if isinstance(value, str):
+            chunks.append(encode_string(value))
+
+        elif value is None:
+            chunks.append("null")
+
+        elif value is True:
+            chunks.append("true")
+
+        elif value is False:
+            chunks.append("false")
+
+        elif isinstance(value, enum.Enum):
+
+            encoded_value = self._enum_values.get(value)
+
+            if encoded_value is None:
+                raise TypeError(f"can't handle a enum of type `{type(value)}`")
+
+            chunks.append(encoded_value)
+
+        elif isinstance(value, int):
+            chunks.append(int.__repr__(value))
+
+        elif isinstance(value, float):
+            chunks.append(float.__repr__(value))
+
+        elif isinstance(value, (list, tuple)):
+            self._encode_sequence(value, level, chunks, fp)
+
+        elif isinstance(value, dict):
+            self._encode_items(
+                [(encode_string(k) + self.key_separator, v) for k, v in value.items()], level, chunks, fp)
+
+        elif attr.has(type(value)):
+            self._encode_items(
+                [(encoded_key, getattr(value, name)) for name, encoded_key in self._fields_for(type(value))], level, chunks, fp)
+
+        else:
+            raise TypeError(f"can't handle a object of type `{type(value)}`")
+
+    def _encode_sequence(self,
+        values:typing.Sequence[typing.Any],
+        level:int,
+        chunks:typing.List[str],
+        fp:typing.Optional[typing.TextIO]) -> None:
+        '''
+        appends the encoded list to `chunks`, see `_encode_value`
+        '''
+
+        if len(values) == 0:
+            chunks.append("[]")
+            return
+
+        item_newline = self._newline(level + 1)
+
+        chunks.append("[")
+
+        for idx, iter_value in enumerate(values):
+
+            if idx > 0:
+                chunks.append(",")
+
+            chunks.append(item_newline)
+            self._encode_value(iter_value, level + 1, chunks, fp)
+
+            if fp is not None and len(chunks) > CHUNKS_PER_WRITE:
+                fp.write("".join(chunks))
+                chunks.clear()
+
+        chunks.append(self._newline(level))
+        chunks.append("]")
+
+    def _encode_items(self,
+        items:typing.Sequence[typing.Tuple[str, typing.Any]],
+        level:int,
+        chunks:typing.List[str],
+        fp:typing.Optional[typing.TextIO]) -> None:
+        '''
+        appends the encoded object to `chunks`, see `_encode_value`
+
+        @param items tuples of (encoded key + key separator, value)
+        '''
+
+        if len(items) == 0:
+            chunks.append("{}")
+            return
+
+        item_newline = self._newline(level + 1)
+
+        chunks.append("{")
+
+        for idx, (iter_encoded_key, iter_value) in enumerate(items):
+
+            if idx > 0:
+                chunks.append(",")
+
+            chunks.append(item_newline)
+            chunks.append(iter_encoded_key)
+            self._encode_value(iter_value, level + 1, chunks, fp)
+
+        chunks.append(self._newline(level))
+        chunks.append("}")
@@ -0,0 +1,89 @@
+import json
+import logging
+import pathlib
+import typing
+
+import telegram_tl_parser.model as model
+import telegram_tl_parser.artifact as artifact
+from telegram_tl_parser.gen import Generator
+
+logger = logging.getLogger(__name__)
+
+
+def _parameters_from_json(params_list:typing.Sequence[typing.Dict[str, typing.Any]]) -> typing.List[model.TlParameter]:
+
+    return [model.TlParameter(**x) for x in params_list]
+
+
+def _comments_from_json(comments_list:typing.Sequence[typing.Dict[str, typing.Any]]) -> typing.List[model.TlComment]:
+
+    return [model.TlComment(**x) for x in comments_list]
+
+
+def file_definition_from_json(json_obj:typing.Dict[str, typing.Any]) -> model.TlFileDefinition:
+    '''
+    rebuilds a TlFileDefinition from the (already decoded) JSON that `Generator.write_json` writes
+
+    @param json_obj the decoded JSON document
+    @return the TlFileDefinition
+    '''
+
+    version = json_obj.get("__version__")
+
+    if version != Generator.VERSION:
+        raise Exception(f"unsupported JSON version `{version}`, this version of the parser reads version `{Generator.VERSION}`")
+
+    file_def_obj = json_obj["tl_file_definition"]
+
+    types = [
+        model.TlTypeDefinition(
+            class_name=x["class_name"],
+            parameters=_parameters_from_json(x["parameters"]),
+            extends_from=x["extends_from"],
+            source_line=x["source_line"],
+            source_line_number=x["source_line_number"],
+            class_type=model.TlClassTypeEnum(x["class_type"]),
+            comments=_comments_from_json(x["comments"]))
+        for x in file_def_obj["types"]]
+
+    functions = [
+        model.TlFunctionDefinition(
+            function_name=x["function_name"],
+            parameters=_parameters_from_json(x["parameters"]),
+            return_type=x["return_type"],
+            source_line=x["source_line"],
+            source_line_number=x["source_line_number"],
+            comments=_comments_from_json(x["comments"]))
+        for x in file_def_obj["functions"]]
+
+    return model.TlFileDefinition(types=types, functions=functions)
+
+
+def load_file_definition(path:pathlib.Path) -> model.TlFileDefinition:
+    '''
+    loads a TlFileDefinition that was written out earlier, either as JSON (see `Generator.write_json`, indented
+    or compact) or as a binary schema artifact (see `artifact.write_schema_artifact`), the format is detected
+    from the contents of the file
+
+    @param path the path to the JSON file or binary schema artifact
+    @return the TlFileDefinition
+    '''
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if artifact.is_schema_artifact(data):
+
+        logger.debug("loading `%s` as a binary schema artifact", path)
+
+        return artifact.read_schema_artifact(data)
+
+    logger.debug("loading `%s` as JSON", path)
+
+    try:
+        json_obj = json.loads(data)
+
+    except ValueError as e:
+        raise Exception(f"`{path}` is neither a binary schema artifact nor JSON: `{e}`") from e
+
+    return file_definition_from_json(json_obj)
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import functools
+import itertools
+import sys
 import typing
 
 import attr
 import enum
 
+import telegram_tl_parser.constants as constants
+from telegram_tl_parser.options import TlParserEngine, TlCommentsMode, BatchOutputFormat
+
 class TlFileLineType(enum.Enum):
     '''
     describes the two types of lines, either
@@ -29,47 +35,110 @@ class TlFileSectionType(enum.Enum):
     TYPES = "types"
     FUNCTIONS = "functions"
 
-@attr.s(auto_attribs=True, frozen=True)
+# note: the model classes are slotted, and the strings that repeat thousands of times in a TL file
+# (parameter names and types, what a type extends from, return types) are interned, so every
+# `int53` or `vector<int32>` is the same string object. Since we keep several parsed TL files
+# in memory at once this matters.
+#
+# sequences are converted to tuples, so they can't be changed after the fact either
+
+@attr.s(auto_attribs=True, frozen=True, slots=True)
+class TlTypeReference:
+    '''
+    describes the type of a parameter, split up into the base type and how many
+    vectors are wrapped around it
+
+    so `vector<vector<int32>>` has a base name of `int32` and a vector depth of 2
+
+    use `TlTypeReference.from_tl_type` to get one, which parses each distinct type string once per process
+    and hands out the same object every time
+    '''
+
+    base_name:str = attr.ib(converter=sys.intern)
+    vector_depth:int = attr.ib(default=0)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def from_tl_type(tl_type:str) -> TlTypeReference:
+        '''
+        parses a type as it appears in the TL file
+
+        @param tl_type the type, like `string` or `vector<vector<int32>>`
+        @return the TlTypeReference for the type
+        '''
+
+        base_name = tl_type
+        vector_depth = 0
+
+        # we need to loop because we could have arbitrarily nested vectors
+        while (regex_result := constants.BASIC_TYPE_VECTOR_REGEX.search(base_name)) is not None:
+            base_name = regex_result.group(constants.BASIC_TYPE_VECTOR_REGEX_TYPE_NAME)
+            vector_depth += 1
+
+        return TlTypeReference(base_name=base_name, vector_depth=vector_depth)
+
+    def to_tl_type(self) -> str:
+        '''
+        @return the type as it would appear in the TL file
+        '''
+
+        return f"{'vector<' * self.vector_depth}{self.base_name}{'>' * self.vector_depth}"
+
+    def __reduce__(self):
+
+        # go through `from_tl_type` when unpickling so we get the shared object for this process
+        return (TlTypeReference.from_tl_type, (self.to_tl_type(),))
+
+@attr.s(auto_attribs=True, frozen=True, slots=True)
 class TlParameter:
     '''
     describes a parameter to either a type or function
     '''
 
-    param_name:str = attr.ib()
-    param_type:str = attr.ib()
+    param_name:str = attr.ib(converter=sys.intern)
+    param_type:str = attr.ib(converter=sys.intern)
 
     # as of right now, only TlRootObject makes use of these
     required:bool = attr.ib(default=True)
     default_value:typing.Any = attr.ib(default=None)
 
-@attr.s(auto_attribs=True, frozen=True)
+    # `param_type` parsed into a TlTypeReference, this is derived from `param_type` so
+    # it isn't passed in and isn't compared
+    param_type_reference:TlTypeReference = attr.ib(init=False, eq=False, repr=False)
+
+    def __attrs_post_init__(self):
+
+        # the class is frozen, so we have to go around attrs to set this
+        object.__setattr__(self, "param_type_reference", TlTypeReference.from_tl_type(self.param_type))
+
+@attr.s(auto_attribs=True, frozen=True, slots=True)
 class TlTypeDefinition:
     '''
     describes a description of a type defined in the TL file
     '''
 
-    class_name:str = attr.ib()
-    parameters:typing.Sequence[TlParameter] = attr.ib()
-    extends_from:typing.Optional[str] = attr.ib()
+    class_name:str = attr.ib(converter=sys.intern)
+    parameters:typing.Sequence[TlParameter] = attr.ib(converter=tuple)
+    extends_from:typing.Optional[str] = attr.ib(converter=attr.converters.optional(sys.intern))
     source_line:str = attr.ib()
     source_line_number:int = attr.ib()
     class_type:TlClassTypeEnum = attr.ib()
-    comments:typing.Sequence[TlComment] = attr.ib()
+    comments:typing.Sequence[TlComment] = attr.ib(converter=tuple)
 
-@attr.s(auto_attribs=True, frozen=True)
+@attr.s(auto_attribs=True, frozen=True, slots=True)
 class TlFunctionDefinition:
     '''
     describes a description of a function defined in the TL file
     '''
 
-    function_name:str = attr.ib()
-    parameters:typing.Sequence[TlParameter] = attr.ib()
-    return_type:str = attr.ib()
+    function_name:str = attr.ib(converter=sys.intern)
+    parameters:typing.Sequence[TlParameter] = attr.ib(converter=tuple)
+    return_type:str = attr.ib(converter=sys.intern)
     source_line:str = attr.ib()
     source_line_number:int = attr.ib()
-    comments:typing.sequence[TlComment] = attr.ib()
+    comments:typing.Sequence[TlComment] = attr.ib(converter=tuple)
 
-@attr.s(auto_attribs=True, frozen=True)
+@attr.s(auto_attribs=True, frozen=True, slots=True)
 class TlComment:
     '''
     describes a comment in the TL file
@@ -77,11 +146,150 @@ class TlComment:
     comment_text:str = attr.ib()
     source_line_number:str = attr.ib()
 
-@attr.s(auto_attribs=True, frozen=True)
+class _IndexCache(dict):
+    '''
+    the dictionary that `TlFileDefinition` keeps its lazily built indexes in
+
+    it always pickles as an empty dictionary, as the indexes are cheap to rebuild and we don't want
+    them taking up space in the `ParseCache`
+    '''
+
+    def __reduce__(self):
+        return (type(self), ())
+
+@attr.s(auto_attribs=True, frozen=True, slots=True)
 class TlFileDefinition:
     '''
     describes the definition of the entire TL file after parsing
+
+    the `get_*` methods look up definitions using indexes that are built the first time they are needed
+    and then cached on this object. Since the class is frozen, the indexes can never go stale, a changed
+    TlFileDefinition is always a new object (see `attr.evolve`) that starts out with no indexes
     '''
 
-    types:typing.Sequence[TlTypeDefinition] = attr.ib()
-    functions:typing.Sequence[TlFunctionDefinition] = attr.ib()
+    types:typing.Sequence[TlTypeDefinition] = attr.ib(converter=tuple)
+    functions:typing.Sequence[TlFunctionDefinition] = attr.ib(converter=tuple)
+
+    # the lazily built indexes, keyed by the index name, see `_get_index`
+    _index_cache:typing.Dict[str, typing.Any] = attr.ib(init=False, factory=_IndexCache, eq=False, repr=False)
+
+    def _get_index(self, index_name:str, build_function:typing.Callable[[], typing.Dict[str, typing.Any]]) -> typing.Dict[str, typing.Any]:
+        '''
+        returns the index with the given name, building it with `build_function` if it hasn't been built yet
+
+        @param index_name the name of the index
+        @param build_function function that builds the index
+        @return the index
+        '''
+
+        index = self._index_cache.get(index_name)
+
+        if index is None:
+            index = build_function()
+            self._index_cache[index_name] = index
+
+        return index
+
+    def _build_types_by_name_index(self) -> typing.Dict[str, TlTypeDefinition]:
+
+        return {x.class_name: x for x in self.types}
+
+    def _build_functions_by_name_index(self) -> typing.Dict[str, TlFunctionDefinition]:
+
+        return {x.function_name: x for x in self.functions}
+
+    def _build_subclasses_index(self) -> typing.Dict[str, typing.Tuple[TlTypeDefinition, ...]]:
+
+        index:typing.Dict[str, typing.List[TlTypeDefinition]] = dict()
+
+        for iter_type_def in self.types:
+            if iter_type_def.class_type == TlClassTypeEnum.CONCRETE and iter_type_def.extends_from is not None:
+                index.setdefault(iter_type_def.extends_from, []).append(iter_type_def)
+
+        return {k: tuple(v) for k, v in index.items()}
+
+    def _build_functions_by_return_type_index(self) -> typing.Dict[str, typing.Tuple[TlFunctionDefinition, ...]]:
+
+        index:typing.Dict[str, typing.List[TlFunctionDefinition]] = dict()
+
+        for iter_function_def in self.functions:
+            index.setdefault(iter_function_def.return_type, []).append(iter_function_def)
+
+        return {k: tuple(v) for k, v in index.items()}
+
+    def _build_definitions_by_param_type_index(self) -> typing.Dict[str, typing.Tuple[typing.Union[TlTypeDefinition, TlFunctionDefinition], ...]]:
+
+        index:typing.Dict[str, typing.List[typing.Union[TlTypeDefinition, TlFunctionDefinition]]] = dict()
+
+        for iter_def in itertools.chain(self.types, self.functions):
+
+            # a definition is only listed once per type, even if several of its parameters have that type
+            for iter_param_type in dict.fromkeys(x.param_type for x in iter_def.parameters):
+                index.setdefault(iter_param_type, []).append(iter_def)
+
+        return {k: tuple(v) for k, v in index.items()}
+
+    def get_type_by_name(self, class_name:str) -> typing.Optional[TlTypeDefinition]:
+        '''
+        looks up a type (concrete or abstract) by its class name
+
+        @param class_name the class name, like `chat` or `ChatType`
+        @return the TlTypeDefinition or None if there is no type with that name
+        '''
+
+        return self._get_index("types_by_name", self._build_types_by_name_index).get(class_name)
+
+    def get_function_by_name(self, function_name:str) -> typing.Optional[TlFunctionDefinition]:
+        '''
+        looks up a function by its name
+
+        @param function_name the function name, like `setPollAnswer`
+        @return the TlFunctionDefinition or None if there is no function with that name
+        '''
+
+        return self._get_index("functions_by_name", self._build_functions_by_name_index).get(function_name)
+
+    def get_definition_by_name(self, name:str) -> typing.Optional[typing.Union[TlTypeDefinition, TlFunctionDefinition]]:
+        '''
+        looks up a type or a function by its name, types are checked first
+
+        @param name the name of the type or function
+        @return the TlTypeDefinition or TlFunctionDefinition, or None if nothing has that name
+        '''
+
+        type_def = self.get_type_by_name(name)
+
+        if type_def is not None:
+            return type_def
+
+        return self.get_function_by_name(name)
+
+    def get_subclasses_of(self, abstract_class_name:str) -> typing.Sequence[TlTypeDefinition]:
+        '''
+        returns the concrete types that extend the given abstract type
+
+        @param abstract_class_name the name of the abstract type, like `AuthenticationCodeType`
+        @return the concrete TlTypeDefinitions, in file order, empty if there are none
+        '''
+
+        return self._get_index("subclasses", self._build_subclasses_index).get(abstract_class_name, ())
+
+    def get_functions_returning(self, type_name:str) -> typing.Sequence[TlFunctionDefinition]:
+        '''
+        returns the functions that return the given type
+
+        @param type_name the return type, like `Chat`
+        @return the TlFunctionDefinitions, in file order, empty if there are none
+        '''
+
+        return self._get_index("functions_by_return_type", self._build_functions_by_return_type_index).get(type_name, ())
+
+    def get_definitions_using_param_type(self, param_type:str) -> typing.Sequence[typing.Union[TlTypeDefinition, TlFunctionDefinition]]:
+        '''
+        returns the types and functions that have at least one parameter of the given type
+
+        @param param_type the parameter type exactly as it appears in the TL file, like `int53` or `vector<int32>`
+        @return the TlTypeDefinitions and then the TlFunctionDefinitions, in file order, empty if there are none
+        '''
+
+        return self._get_index("definitions_by_param_type", self._build_definitions_by_param_type_index).get(param_type, ())
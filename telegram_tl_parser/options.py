@@ -0,0 +1,44 @@
+import enum
+import os
+import pathlib
+
+# the enums and defaults that the command line needs to build its arguments. Only the standard library is
+# imported here, so `parse_tl_file.py` can validate its arguments (or hand them to a `serve` process)
+# without importing pyparsing and attrs first. The modules they belong to re-export them.
+
+class TlParserEngine(enum.Enum):
+    ''' describes the engines that `Parser` can use to parse a TL file
+
+    `PYPARSING` is the reference implementation, `FAST` is a hand written
+    line oriented scanner that produces the same results
+    '''
+    PYPARSING = "pyparsing"
+    FAST = "fast"
+
+class TlCommentsMode(enum.Enum):
+    ''' describes what `Parser` does with the comment lines of the TL file
+
+    `FULL` creates a TlComment for every comment, and `NONE` drops the comment lines before they are parsed, so
+    the definitions have no comments at all
+    '''
+    NONE = "none"
+    FULL = "full"
+
+class BatchOutputFormat(enum.Enum):
+    ''' describes the output formats that the `batch` sub-command can generate
+    '''
+    JSON = "json"
+    ATTRS = "attrs"
+    ARTIFACT = "artifact"
+
+class RunStatsFormat(enum.Enum):
+    ''' describes the formats that a `RunStats` report can be rendered in
+    '''
+    TEXT = "text"
+    JSON = "json"
+
+# where the parse cache lives if we are not told otherwise
+DEFAULT_CACHE_DIR = pathlib.Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "telegram_tl_parser"
+
+# the default maximum size of all of the parse cache entries combined
+DEFAULT_CACHE_MAX_SIZE_BYTES = 256 * 1024 * 1024
@@ -1,12 +1,306 @@
 import logging
 import argparse
+import concurrent.futures
+import glob
+import hashlib
+import io
+import pathlib
+import time
 import typing
 
+import attr
+
+import telegram_tl_parser.constants as constants
+import telegram_tl_parser.utils as utils
+import telegram_tl_parser.stats as stats
+import telegram_tl_parser.artifact as artifact
 from telegram_tl_parser.parser import Parser
+from telegram_tl_parser.grammar import TlGrammar
+from telegram_tl_parser.cache import ParseCache
 from telegram_tl_parser.gen import Generator
+from telegram_tl_parser.model import TlFileDefinition, TlParserEngine, TlCommentsMode, BatchOutputFormat
+from telegram_tl_parser.utils import GrammarProfiler
 
 logger = logging.getLogger(__name__)
 
+def parse_from_args(parsed_args:argparse.Namespace, run_stats:typing.Optional[stats.RunStats]=None) -> TlFileDefinition:
+    '''
+    helper that creates a Parser based on the command line arguments and parses the
+    TL file that was given to us
+
+    @param parsed_args the parsed command line arguments
+    @param run_stats if provided, the time and memory of each phase are recorded in it
+    @return the parsed TlFileDefinition
+    '''
+
+    parse_cache = None
+    cache_key = None
+
+    if parsed_args.no_cache:
+        logger.debug("the parse cache is disabled")
+
+    elif parsed_args.grammar_profile or parsed_args.pyparsing_debug_logging_is_enabled:
+        logger.info("not using the parse cache since grammar profiling or pyparsing debug logging is enabled")
+
+    else:
+        parse_cache = ParseCache(parsed_args.cache_dir, parsed_args.cache_max_size_mb * 1024 * 1024)
+
+        with stats.phase(run_stats, "read parse cache"):
+            with open(parsed_args.tl_file_path, "rb") as f:
+                cache_key = parse_cache.make_key(
+                    f.read(), parsed_args.skip_n_lines, Parser.VERSION, TlParserEngine(parsed_args.engine),
+                    TlCommentsMode(parsed_args.comments))
+
+            cached_file_def = parse_cache.get(cache_key)
+
+        if cached_file_def is not None:
+            logger.info("parse cache hit for `%s` (key `%s`)", parsed_args.tl_file_path, cache_key)
+
+            if run_stats is not None:
+                run_stats.count_file_definition(cached_file_def)
+
+            return cached_file_def
+
+        logger.info("parse cache miss for `%s` (key `%s`)", parsed_args.tl_file_path, cache_key)
+
+    grammar_profiler = GrammarProfiler() if parsed_args.grammar_profile else None
+
+    parser = Parser(
+        engine=parsed_args.engine,
+        packrat=parsed_args.packrat,
+        packrat_cache_size=parsed_args.packrat_cache_size,
+        grammar_profiler=grammar_profiler,
+        comments=parsed_args.comments)
+
+    result_file_def = parser.parse(
+        parsed_args.tl_file_path,
+        parsed_args.skip_n_lines,
+        parsed_args.pyparsing_debug_logging_is_enabled,
+        workers=parsed_args.jobs,
+        run_stats=run_stats)
+
+    if grammar_profiler is not None:
+        if grammar_profiler.element_stats:
+            logger.info("grammar profile:\n%s", grammar_profiler.report())
+        else:
+            logger.info("no grammar profile was recorded, it is only available for the pyparsing engine")
+
+    if parse_cache is not None:
+        with stats.phase(run_stats, "write parse cache"):
+            parse_cache.put(cache_key, result_file_def)
+
+    return result_file_def
+
+
+def report_run_stats(parsed_args:argparse.Namespace, run_stats:stats.RunStats) -> None:
+    '''
+    helper that outputs the `--profile` report, either to the log or to the file given by `--profile-output-path`
+
+    @param parsed_args the parsed command line arguments
+    @param run_stats the RunStats to report
+    '''
+
+    run_stats.stop()
+
+    report = run_stats.report(stats.RunStatsFormat(parsed_args.profile_format))
+
+    if parsed_args.profile_output_path is not None:
+
+        with utils.atomic_write(parsed_args.profile_output_path) as f:
+            f.write(report)
+
+        logger.info("profile written to `%s`", parsed_args.profile_output_path)
+
+    else:
+        logger.info("profile:\n%s", report)
+
+
+def report_write_stats(write_stats:utils.WriteStats, run_stats:typing.Optional[stats.RunStats]=None) -> None:
+    '''
+    helper that logs how many output files were written and how many were left alone because they were
+    unchanged, and records the counts in the RunStats if there is one
+
+    @param write_stats the WriteStats that was passed to `utils.atomic_write`
+    @param run_stats if provided, the counts are recorded in it
+    '''
+
+    logger.info("output files: %s", write_stats.summary())
+
+    if run_stats is not None:
+        run_stats.counts["files written"] = len(write_stats.written_paths)
+        run_stats.counts["files unchanged"] = len(write_stats.unchanged_paths)
+
+
+# path -> the contents to write there, a str for text files or bytes for binary ones
+RenderedOutputs = typing.Dict[pathlib.Path, typing.Union[str, bytes]]
+
+
+class OutputWatcher:
+    '''
+    runs a single file sub-command (json, attrs, ...) over and over, for `--watch`
+
+    the TL file is polled for a change of its modification time or size, so no OS specific file system
+    notifications are needed. When it changes, it is reparsed with `Parser.parse_incremental` (so only the
+    definitions that changed go through the parser), the outputs are generated in memory, and only the outputs
+    whose contents changed since the last time are written. The Parser, the Generator and the last
+    TlFileDefinition stay in memory between changes
+
+    the outputs are polled the same way, so if one of them is edited or deleted while watching, it is
+    generated again from the last TlFileDefinition, without reparsing the TL file
+    '''
+
+    def __init__(self,
+        parsed_args:argparse.Namespace,
+        render_outputs_func:typing.Callable[[argparse.Namespace, Generator, TlFileDefinition], RenderedOutputs]):
+        '''
+        @param parsed_args the parsed command line arguments
+        @param render_outputs_func the `render_outputs` of the output class, which generates the outputs
+        '''
+
+        self.parsed_args = parsed_args
+        self.render_outputs_func = render_outputs_func
+
+        self.parser = Parser(
+            engine=parsed_args.engine,
+            packrat=parsed_args.packrat,
+            packrat_cache_size=parsed_args.packrat_cache_size,
+            comments=parsed_args.comments)
+        self.gen = Generator()
+
+        self.file_def:typing.Optional[TlFileDefinition] = None
+
+        # path -> the sha256 of what we last wrote there
+        self.fingerprints:typing.Dict[pathlib.Path, str] = dict()
+
+        # path -> the `_path_signature` the output had right after we last wrote it (or left it alone)
+        self.output_signatures:typing.Dict[pathlib.Path, typing.Optional[typing.Tuple[int, int]]] = dict()
+
+    @staticmethod
+    def _path_signature(path:pathlib.Path) -> typing.Optional[typing.Tuple[int, int]]:
+        '''
+        @return the modification time and size of the file, or None if it doesn't exist right now
+            (which happens while some editors save a file)
+        '''
+
+        try:
+            stat_result = pathlib.Path(path).stat()
+        except FileNotFoundError:
+            return None
+
+        return (stat_result.st_mtime_ns, stat_result.st_size)
+
+    def _file_signature(self) -> typing.Optional[typing.Tuple[int, int]]:
+        '''
+        @return the modification time and size of the TL file, see `_path_signature`
+        '''
+
+        return self._path_signature(self.parsed_args.tl_file_path)
+
+    def _changed_outputs(self) -> typing.List[pathlib.Path]:
+        '''
+        @return the outputs that were edited or deleted by something else since we last wrote them
+        '''
+
+        return [path for path, signature in self.output_signatures.items() if self._path_signature(path) != signature]
+
+    def run_cycle(self, reparse:bool=True) -> None:
+        '''
+        parses the TL file and writes the outputs that changed, if the TL file can't be parsed (like when it is
+        saved in the middle of a edit), the error is logged and the outputs are left alone
+
+        @param reparse if False, the outputs are generated from the last TlFileDefinition rather than
+            parsing the TL file again, for when only the outputs changed
+        '''
+
+        start = time.perf_counter()
+
+        try:
+            if not reparse and self.file_def is not None:
+                file_def = self.file_def
+            elif self.file_def is None:
+                file_def = parse_from_args(self.parsed_args)
+            else:
+                file_def = self.parser.parse_incremental(self.parsed_args.tl_file_path, self.file_def,
+                    self.parsed_args.skip_n_lines, self.parsed_args.pyparsing_debug_logging_is_enabled)
+
+        except Exception:
+            logger.exception("failed to parse `%s`, waiting for it to change again", self.parsed_args.tl_file_path)
+            return
+
+        parse_done = time.perf_counter()
+
+        self.file_def = file_def
+
+        outputs = self.render_outputs_func(self.parsed_args, self.gen, file_def)
+
+        render_done = time.perf_counter()
+
+        write_stats = utils.WriteStats()
+
+        for iter_path, iter_contents in outputs.items():
+
+            binary = isinstance(iter_contents, bytes)
+            fingerprint = hashlib.sha256(iter_contents if binary else iter_contents.encode("utf-8")).hexdigest()
+
+            # the fingerprint of what we wrote last time saves comparing against the file on disk, as long as
+            # nothing else touched the file since then
+            if self.fingerprints.get(iter_path) == fingerprint and \
+                self.output_signatures.get(iter_path) == self._path_signature(iter_path):
+
+                write_stats.unchanged_paths.append(iter_path)
+                continue
+
+            pathlib.Path(iter_path).parent.mkdir(parents=True, exist_ok=True)
+
+            with utils.atomic_write(iter_path, binary=binary,
+                skip_unchanged=not self.parsed_args.always_write, write_stats=write_stats) as f:
+                f.write(iter_contents)
+
+            self.fingerprints[iter_path] = fingerprint
+            self.output_signatures[iter_path] = self._path_signature(iter_path)
+
+        end = time.perf_counter()
+
+        logger.info("regenerated in %.1f ms (parse %.1f ms, generate %.1f ms, write %.1f ms): %s",
+            (end - start) * 1000, (parse_done - start) * 1000, (render_done - parse_done) * 1000, (end - render_done) * 1000,
+            write_stats.summary())
+
+    def run(self, max_cycles:typing.Optional[int]=None) -> None:
+        '''
+        runs a cycle now, and then every time the TL file or one of the outputs changes, until interrupted
+
+        @param max_cycles if provided, stop after this many cycles
+        '''
+
+        logger.info("watching `%s` for changes, checking every %s seconds", self.parsed_args.tl_file_path, self.parsed_args.watch_interval)
+
+        cycle_count = 0
+        last_signature = None
+
+        try:
+            while max_cycles is None or cycle_count < max_cycles:
+
+                signature = self._file_signature()
+
+                if signature is not None and signature != last_signature:
+                    last_signature = signature
+                    self.run_cycle()
+                    cycle_count += 1
+                    continue
+
+                changed_outputs = self._changed_outputs()
+
+                if changed_outputs:
+                    logger.info("the outputs `%s` were changed or deleted, generating them again", ", ".join(str(x) for x in changed_outputs))
+                    self.run_cycle(reparse=False)
+                    cycle_count += 1
+                else:
+                    time.sleep(self.parsed_args.watch_interval)
+
+        except KeyboardInterrupt:
+            logger.info("interrupted, no longer watching `%s`", self.parsed_args.tl_file_path)
+
+
 class JsonOutput:
 
     @staticmethod
@@ -14,20 +308,35 @@ class JsonOutput:
 
         logger.info("Parsing and outputting as JSON")
 
-        parser = Parser()
         gen = Generator()
 
-        result_file_def = parser.parse(
-            parsed_args.tl_file_path,
-            parsed_args.skip_n_lines,
-            parsed_args.pyparsing_debug_logging_is_enabled)
+        run_stats = stats.RunStats() if parsed_args.profile else None
+
+        result_file_def = parse_from_args(parsed_args, run_stats)
+
+        write_stats = utils.WriteStats()
+
+        with utils.atomic_write(parsed_args.output_file_path,
+            skip_unchanged=not parsed_args.always_write, write_stats=write_stats) as f:
+            gen.write_json(result_file_def, f, run_stats, compact=parsed_args.compact)
+
+            with stats.phase(run_stats, "write output"):
+                f.flush()
+
+        logger.info("file successfully generated as JSON to `%s`", parsed_args.output_file_path)
+
+        report_write_stats(write_stats, run_stats)
 
-        output = gen.tl_file_definition_to_json(result_file_def)
+        if run_stats is not None:
+            report_run_stats(parsed_args, run_stats)
 
-        with open(parsed_args.output_file_path, "w", encoding="utf-8") as f:
-            f.write(output)
+    @staticmethod
+    def render_outputs(parsed_args:argparse.Namespace, gen:Generator, file_def:TlFileDefinition) -> RenderedOutputs:
+
+        out = io.StringIO()
+        gen.write_json(file_def, out, compact=parsed_args.compact)
 
-        logger.info("file successfully written as JSON to `%s`", parsed_args.output_file_path)
+        return {parsed_args.output_file_path: out.getvalue()}
 
 
 class AttrsOutput:
@@ -37,15 +346,329 @@ class AttrsOutput:
 
         logger.info("Parsing and outputting as Attrs Classes")
 
-        parser = Parser()
         gen = Generator()
 
-        result_file_def = parser.parse(
-            parsed_args.tl_file_path,
-            parsed_args.skip_n_lines,
-            parsed_args.pyparsing_debug_logging_is_enabled)
+        run_stats = stats.RunStats() if parsed_args.profile else None
+
+        result_file_def = parse_from_args(parsed_args, run_stats)
+
+        write_stats = utils.WriteStats()
+
+        with utils.atomic_write(parsed_args.output_file_path,
+            skip_unchanged=not parsed_args.always_write, write_stats=write_stats) as f:
+            gen.write_attrs_classes(result_file_def, f, run_stats, with_codecs=parsed_args.with_codecs, jobs=parsed_args.gen_jobs)
+
+            with stats.phase(run_stats, "write output"):
+                f.flush()
+
+        logger.info("file successfully generated as Attrs Classes to `%s`", parsed_args.output_file_path)
+
+        report_write_stats(write_stats, run_stats)
+
+        if run_stats is not None:
+            report_run_stats(parsed_args, run_stats)
+
+    @staticmethod
+    def render_outputs(parsed_args:argparse.Namespace, gen:Generator, file_def:TlFileDefinition) -> RenderedOutputs:
+
+        out = io.StringIO()
+        gen.write_attrs_classes(file_def, out, with_codecs=parsed_args.with_codecs, jobs=parsed_args.gen_jobs)
+
+        return {parsed_args.output_file_path: out.getvalue()}
+
+
+class AttrsPackageOutput:
+
+    @staticmethod
+    def run_from_args(parsed_args:argparse.Namespace) -> None:
+
+        logger.info("Parsing and outputting as a lazy loading package of Attrs Classes")
+
+        gen = Generator()
+
+        run_stats = stats.RunStats() if parsed_args.profile else None
+
+        result_file_def = parse_from_args(parsed_args, run_stats)
+
+        write_stats = utils.WriteStats()
+
+        gen.write_attrs_package(result_file_def, parsed_args.output_file_path, run_stats, with_codecs=parsed_args.with_codecs,
+            skip_unchanged=not parsed_args.always_write, write_stats=write_stats)
+
+        logger.info("package successfully generated as Attrs Classes to `%s`", parsed_args.output_file_path)
+
+        report_write_stats(write_stats, run_stats)
+
+        if run_stats is not None:
+            report_run_stats(parsed_args, run_stats)
+
+    @staticmethod
+    def render_outputs(parsed_args:argparse.Namespace, gen:Generator, file_def:TlFileDefinition) -> RenderedOutputs:
+
+        package_dir = pathlib.Path(parsed_args.output_file_path)
+
+        package_files = gen.tl_file_definition_to_attrs_package(file_def, with_codecs=parsed_args.with_codecs)
+
+        # the files of the modules that went away, rendering happens before anything
+        # is written so this never removes a file we still need
+        if package_dir.is_dir():
+            gen.remove_stale_package_files(package_dir, package_files.keys())
+
+        return {package_dir / k: v for k, v in package_files.items()}
+
+
+class ClientOutput:
+
+    @staticmethod
+    def run_from_args(parsed_args:argparse.Namespace) -> None:
+
+        logger.info("Parsing and outputting as a asyncio client")
+
+        gen = Generator()
+
+        run_stats = stats.RunStats() if parsed_args.profile else None
+
+        result_file_def = parse_from_args(parsed_args, run_stats)
+
+        write_stats = utils.WriteStats()
+
+        with utils.atomic_write(parsed_args.output_file_path,
+            skip_unchanged=not parsed_args.always_write, write_stats=write_stats) as f:
+            gen.write_client(result_file_def, f, parsed_args.classes_module, run_stats)
+
+            with stats.phase(run_stats, "write output"):
+                f.flush()
+
+        logger.info("file successfully generated as a asyncio client to `%s`", parsed_args.output_file_path)
+
+        report_write_stats(write_stats, run_stats)
+
+        if run_stats is not None:
+            report_run_stats(parsed_args, run_stats)
+
+    @staticmethod
+    def render_outputs(parsed_args:argparse.Namespace, gen:Generator, file_def:TlFileDefinition) -> RenderedOutputs:
+
+        out = io.StringIO()
+        gen.write_client(file_def, out, parsed_args.classes_module)
+
+        return {parsed_args.output_file_path: out.getvalue()}
+
+
+class ArtifactOutput:
+
+    @staticmethod
+    def run_from_args(parsed_args:argparse.Namespace) -> None:
+
+        logger.info("Parsing and outputting as a binary schema artifact")
+
+        result_file_def = parse_from_args(parsed_args)
+
+        write_stats = utils.WriteStats()
+
+        with utils.atomic_write(parsed_args.output_file_path, binary=True,
+            skip_unchanged=not parsed_args.always_write, write_stats=write_stats) as f:
+            artifact.write_schema_artifact(result_file_def, f)
+
+        logger.info("file successfully generated as a binary schema artifact to `%s`", parsed_args.output_file_path)
+
+        report_write_stats(write_stats)
+
+    @staticmethod
+    def render_outputs(parsed_args:argparse.Namespace, gen:Generator, file_def:TlFileDefinition) -> RenderedOutputs:
+
+        out = io.BytesIO()
+        artifact.write_schema_artifact(file_def, out)
+
+        return {parsed_args.output_file_path: out.getvalue()}
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class BatchFileResult:
+    '''
+    describes what happened to a single TL file in the `batch` sub-command
+    '''
+
+    tl_file_path:pathlib.Path = attr.ib()
+    output_file_path:pathlib.Path = attr.ib()
+    parse_seconds:float = attr.ib()
+    generate_seconds:float = attr.ib()
+
+    # the error message if processing the file failed, else None
+    error:typing.Optional[str] = attr.ib(default=None)
+
+    # whether the output file was replaced (False if it already had the same contents), None if processing the file failed
+    output_written:typing.Optional[bool] = attr.ib(default=None)
+
+
+def _init_batch_worker(skip_n_lines:int) -> None:
+    '''
+    initializer for the `batch` worker processes, builds the shared grammar (and the complete expressions
+    we are going to need) once, so every file the worker processes gets a warm grammar
+
+    @param skip_n_lines the number of lines that will be skipped from the start of each file
+    '''
+
+    grammar = TlGrammar.get_shared()
+    grammar.get_complete_expression(constants.RESULT_NAME_EXTENDS_FROM_ABC, skip_n_lines)
+    grammar.get_complete_expression(constants.RESULT_NAME_RETURN_TYPE, 0)
+
+
+def _run_batch_file(
+    args_dict:typing.Dict[str, typing.Any],
+    tl_file_path:pathlib.Path,
+    output_file_path:pathlib.Path) -> BatchFileResult:
+    '''
+    parses a single TL file and writes the generated output for the `batch` sub-command, any error is
+    caught and reported in the result so that one bad file doesn't stop the others
+
+    @param args_dict the parsed command line arguments, as a dict
+    @param tl_file_path the TL file to parse
+    @param output_file_path where to write the generated output
+    @return a BatchFileResult describing what happened
+    '''
+
+    parse_seconds = 0.0
+    generate_seconds = 0.0
+
+    try:
+
+        file_args = argparse.Namespace(**args_dict)
+        file_args.tl_file_path = tl_file_path
+        file_args.output_file_path = output_file_path
+
+        # the batch already runs the files in parallel
+        file_args.jobs = 1
+
+        start_time = time.perf_counter()
+        result_file_def = parse_from_args(file_args)
+        parse_seconds = time.perf_counter() - start_time
+
+        gen = Generator()
+
+        output_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        start_time = time.perf_counter()
+
+        batch_format = BatchOutputFormat(file_args.batch_format)
+
+        write_stats = utils.WriteStats()
+
+        with utils.atomic_write(output_file_path, binary=batch_format == BatchOutputFormat.ARTIFACT,
+            skip_unchanged=not file_args.always_write, write_stats=write_stats) as f:
+            if batch_format == BatchOutputFormat.JSON:
+                gen.write_json(result_file_def, f, compact=file_args.compact)
+            elif batch_format == BatchOutputFormat.ARTIFACT:
+                artifact.write_schema_artifact(result_file_def, f)
+            else:
+                gen.write_attrs_classes(result_file_def, f, with_codecs=file_args.with_codecs)
+
+        generate_seconds = time.perf_counter() - start_time
+
+        if write_stats.written_paths:
+            logger.info("wrote `%s` to `%s`", tl_file_path, output_file_path)
+        else:
+            logger.info("the output of `%s` in `%s` is unchanged, leaving it alone", tl_file_path, output_file_path)
+
+    except Exception as e:
+
+        logger.exception("failed to process `%s`", tl_file_path)
+
+        return BatchFileResult(
+            tl_file_path=tl_file_path,
+            output_file_path=output_file_path,
+            parse_seconds=parse_seconds,
+            generate_seconds=generate_seconds,
+            error=f"{type(e).__name__}: {e}")
+
+    return BatchFileResult(
+        tl_file_path=tl_file_path,
+        output_file_path=output_file_path,
+        parse_seconds=parse_seconds,
+        generate_seconds=generate_seconds,
+        output_written=bool(write_stats.written_paths))
+
+
+class BatchOutput:
+
+    @staticmethod
+    def summary_table(results:typing.Sequence[BatchFileResult]) -> str:
+        '''
+        returns a human readable table of the per file parse and generate times
+
+        @param results the results of every file
+        @return the table as a string
+        '''
+
+        name_width = max([len("file")] + [len(x.tl_file_path.name) for x in results])
+
+        lines = [f"{'file':<{name_width}}  {'status':<6}  {'output':<9}  {'parse (s)':>10}  {'generate (s)':>12}"]
+
+        for iter_result in results:
+            status = "ok" if iter_result.error is None else "FAILED"
+
+            if iter_result.output_written is None:
+                output_status = "-"
+            else:
+                output_status = "written" if iter_result.output_written else "unchanged"
+
+            lines.append(f"{iter_result.tl_file_path.name:<{name_width}}  {status:<6}  {output_status:<9}  " +
+                f"{iter_result.parse_seconds:>10.3f}  {iter_result.generate_seconds:>12.3f}")
+
+        lines.append(f"{'total':<{name_width}}  {'':<6}  {'':<9}  {sum(x.parse_seconds for x in results):>10.3f}  " +
+            f"{sum(x.generate_seconds for x in results):>12.3f}")
+
+        written_count = len([x for x in results if x.output_written is True])
+        unchanged_count = len([x for x in results if x.output_written is False])
+
+        lines.append(f"output files: {written_count} written, {unchanged_count} unchanged")
+
+        for iter_result in results:
+            if iter_result.error is not None:
+                lines.append(f"{iter_result.tl_file_path.name}: {iter_result.error}")
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def run_from_args(parsed_args:argparse.Namespace) -> None:
+
+        tl_file_paths = sorted(pathlib.Path(x).resolve() for x in glob.glob(parsed_args.input_glob, recursive=True))
+        tl_file_paths = [x for x in tl_file_paths if x.is_file()]
+
+        if not tl_file_paths:
+            raise Exception(f"the glob `{parsed_args.input_glob}` didn't match any files")
+
+        logger.info("Parsing and outputting `%s` files as `%s` with `%s` workers",
+            len(tl_file_paths), parsed_args.batch_format, parsed_args.batch_workers)
+
+        args_dict = {k: v for k, v in vars(parsed_args).items() if k != "func_to_run"}
+
+        output_file_paths = [
+            pathlib.Path(parsed_args.output_path_template.format(stem=x.stem, name=x.name)).expanduser().resolve()
+            for x in tl_file_paths]
+
+        if parsed_args.batch_workers > 1:
+
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=parsed_args.batch_workers,
+                initializer=_init_batch_worker,
+                initargs=(parsed_args.skip_n_lines,)) as executor:
+
+                results = list(executor.map(
+                    _run_batch_file,
+                    [args_dict] * len(tl_file_paths),
+                    tl_file_paths,
+                    output_file_paths))
+
+        else:
+
+            _init_batch_worker(parsed_args.skip_n_lines)
+
+            results = [_run_batch_file(args_dict, x, y) for x, y in zip(tl_file_paths, output_file_paths)]
+
+        logger.info("batch summary:\n%s", BatchOutput.summary_table(results))
 
-        output = gen.tl_file_definition_to_attrs_classes(result_file_def)
+        failed_count = len([x for x in results if x.error is not None])
 
-        with open(parsed_args.output_file_path, "w", encoding="utf-8") as f:
-            f.write(output)
\ No newline at end of file
+        if failed_count > 0:
+            raise Exception(f"`{failed_count}` of `{len(results)}` files failed, see the summary above")
@@ -1,3 +1,7 @@
+import collections
+import concurrent.futures
+import contextlib
+import itertools
 import pathlib
 import typing
 import logging
@@ -7,17 +11,55 @@ import pyparsing
 
 import telegram_tl_parser.utils as utils
 import telegram_tl_parser.constants as constants
+import telegram_tl_parser.scanner as scanner
+import telegram_tl_parser.stats as stats
+from telegram_tl_parser.grammar import TlGrammar
 import  telegram_tl_parser.model as model
 
 logger = logging.getLogger(__name__)
 
+@attr.s(auto_attribs=True, frozen=True)
+class TlSourceBlock:
+    '''
+    describes a definition line in a section of the TL file along with the comment
+    lines above it, used by `Parser.parse_incremental`
+    '''
+
+    # the line number of the first comment line, or the definition line if there are no comments
+    first_line_number:int = attr.ib()
+
+    # tuples of (line number, line) for each comment line
+    comment_lines:typing.Sequence[typing.Tuple[int, str]] = attr.ib()
+
+    definition_line_number:int = attr.ib()
+    definition_line:str = attr.ib()
+
 class Parser:
 
-    def __init__(self):
+    # bump this whenever a change would make the parser produce a different TlFileDefinition
+    # for the same file, as it is part of the key for the `ParseCache`
+    VERSION = 3
+
+    def __init__(self,
+        engine:typing.Union[model.TlParserEngine, str]=model.TlParserEngine.PYPARSING,
+        packrat:bool=False,
+        packrat_cache_size:int=128,
+        grammar_profiler:typing.Optional[utils.GrammarProfiler]=None,
+        comments:typing.Union[model.TlCommentsMode, str]=model.TlCommentsMode.FULL):
         '''
         See `notes.md` for notes on the structure of the file
         and see `pyparsing_notes.md` for notes on pyparsing stuff
 
+        @param engine the engine to parse the file with, either a `TlParserEngine` or its value,
+            so `pyparsing` (the reference implementation) or `fast` (the hand written `TlScanner`)
+        @param packrat if true, turn on pyparsing's packrat (memoization) mode while this parser is parsing with
+            the `PYPARSING` engine, see `utils.pyparsing_packrat`
+        @param packrat_cache_size the maximum number of entries in the packrat cache
+        @param grammar_profiler if provided, the pyparsing grammar will record how many match attempts
+            and how much time each of its elements take into this profiler
+        @param comments what to do with the comments, either a `TlCommentsMode` or its value, so `full` (a TlComment
+            for each one) or `none` (the definitions have no comments)
+
         example full lines we are parsing:
 
         getJsonValue json:string = JsonValue;
@@ -27,352 +69,699 @@ class Parser:
         getInlineQueryResults bot_user_id:int32 chat_id:int53 user_location:location query:string offset:string = InlineQueryResults;
         '''
 
-        # a literal newline
-        self.pe_newline = pyparsing.Literal('\n')
+        self.engine = model.TlParserEngine(engine)
+        self.grammar_profiler = grammar_profiler
+        self.comments = model.TlCommentsMode(comments)
+        self.packrat = packrat
+        self.packrat_cache_size = packrat_cache_size
+
+    def _name_for_expression_after_equal(self, section_type:model.TlFileSectionType) -> str:
+        ''' helper that returns the result name for the part after the `=` for the given section
 
-        # a semicolon literal
-        self.pe_semicolon_literal = pyparsing.Literal(";")
+        for types, the part after the `=` is the abstract class that the type extends
 
-        # a literal colon
-        self.pe_colon_literal = pyparsing.Literal(":")
+        for functions, the part after the `=` is the result type
+        '''
 
-        # literal equal sign
-        self.pe_equal_sign_literal = pyparsing.Literal("=")
+        if section_type == model.TlFileSectionType.TYPES:
+            return constants.RESULT_NAME_EXTENDS_FROM_ABC
+        elif section_type == model.TlFileSectionType.FUNCTIONS:
+            return constants.RESULT_NAME_RETURN_TYPE
+        else:
+            raise Exception(f"unhandled TlFileSectionType! type: `{section_type}`")
 
-        # a literal for the start of a comment
-        self.pe_comment_literal = pyparsing.Literal('//')
+    def _parse_section_with_pyparsing(self,
+        section_str:str,
+        section_type:model.TlFileSectionType,
+        skip_n_lines:int,
+        pyparsing_debug_logging_enabled:bool) -> pyparsing.ParseResults:
+        '''
+        parses one section of the TL file using the pyparsing grammar
 
-        # token that skips to the end of a line
-        # used for the program argument to skip 'N' number of lines
-        self.pe_skip_line = pyparsing.SkipTo(pyparsing.lineEnd, include=True)
+        @param section_str the text of the section
+        @param section_type which section this is
+        @param skip_n_lines how many lines to skip from the start of the section
+        @param pyparsing_debug_logging_enabled whether to turn on the pyparsing debug logging
+        @return the pyparsing ParseResults, one Group per comment or definition
+        '''
 
-        # words that can appear in a class name
-        self.pe_class_name = pyparsing.Word(pyparsing.alphanums)
+        if pyparsing_debug_logging_enabled or self.grammar_profiler is not None:
+            # the debug actions get set on the ParserElements themselves, so we can't
+            # use the shared grammar for this
+            grammar = TlGrammar(grammar_profiler=self.grammar_profiler)
+        else:
+            grammar = TlGrammar.get_shared()
 
-        # characters that appear in a parameter name or type
-        self.pe_param_name = pyparsing.Word(pyparsing.alphanums + "_")
+        pe_complete_expression = grammar.get_complete_expression(
+            self._name_for_expression_after_equal(section_type), skip_n_lines)
 
-        # need the angle brackets for stuff like `vector<String>`
-        self.pe_param_type =  pyparsing.Word(pyparsing.alphanums + "<>")
+        logger.debug("final pyparsing expression for `%s`: `%s`", section_type, pe_complete_expression)
 
-        # a single param and type pair
-        # so like `message:string`
-        self.pe_param_listing = pyparsing.Group(
-            self.pe_param_name(constants.RESULT_NAME_PARAM_NAME) +
-            self.pe_colon_literal.suppress() +
-            self.pe_param_type(constants.RESULT_NAME_PARAM_TYPE))
+        if pyparsing_debug_logging_enabled:
+            logger.debug("Turning on pyparsing debug logging")
+            utils.setLoggingDebugActionForParserElement(pe_complete_expression, grammar._line_index_for)
+            utils.setLoggingDebugActionForParserElement(grammar.pe_skip_line, grammar._line_index_for)
 
-        # grouping of zero or more parameters
-        self.pe_zero_or_more_params = pyparsing.ZeroOrMore(
-            self.pe_param_listing(f"{constants.RESULT_NAME_PARAMS}*"))
+        with contextlib.ExitStack() as stack:
 
-        # the actual name of the class/type that is being defined
-        self.pe_tdlib_class_name = self.pe_class_name(constants.RESULT_NAME_CLASS_OR_FUNCTION_NAME)
+            stack.enter_context(grammar.line_index_scope())
 
+            if self.packrat:
+                logger.debug("enabling pyparsing packrat mode with a cache size of `%s`", self.packrat_cache_size)
+                stack.enter_context(utils.pyparsing_packrat(self.packrat_cache_size))
 
+            return pe_complete_expression.parseString(section_str, parseAll=True)
 
+    def _blank_comment_lines(self, section_str:str, skip_n_lines:int) -> str:
+        '''
+        blanks out the lines of a section that are nothing but a comment, so the pyparsing grammar never sees them,
+        for `TlCommentsMode.NONE`. This only looks at the start of each line (see `scanner.COMMENT_LINE_REGEX`),
+        and the lines are blanked rather than removed so the line numbers of everything else stay the same
 
-    def _setLineAndLineNumberParseAction(self, s:str, loc:int, toks:pyparsing.ParseResults) -> pyparsing.ParseResults:
+        @param section_str the text of the section
+        @param skip_n_lines how many lines to skip from the start of the section, these are left alone
+        @return the section with the comment lines blanked out
         '''
-        helper that is meant to be used with `<ParserElement>.setParseAction`, which means this function gets called
-        whenever a match for each line of the Telegram TL file gets hit.
 
-        Here we add stuff to the ParseResults that it passes in
+        start_pos = scanner.skip_lines(section_str, skip_n_lines)
 
-        we add the source line and source line number to each match
+        return section_str[:start_pos] + scanner.COMMENT_LINE_REGEX.sub("", section_str[start_pos:])
 
-        @param s is the original parse string
-        @param loc is the location in the string where matching started
-        @param toks is the list of the matched tokens, packaged as a ParseResults object
-        @return a ParseResults if you are modifying it, else None
+    def _parse_section(self,
+        section_str:str,
+        section_type:model.TlFileSectionType,
+        skip_n_lines:int,
+        pyparsing_debug_logging_enabled:bool) -> typing.Sequence[typing.Any]:
+        '''
+        parses one section of the TL file with the engine this Parser was created with
+
+        @param section_str the text of the section
+        @param section_type which section this is
+        @param skip_n_lines how many lines to skip from the start of the section
+        @param pyparsing_debug_logging_enabled whether to turn on the pyparsing debug logging, only
+            used by the `PYPARSING` engine
+        @return a sequence of results, one per comment or definition, that can be indexed by
+            the `constants.RESULT_NAME_*` names
         '''
 
-        t = toks
-        orig_line = pyparsing.line(loc, s)
-        line_number = pyparsing.lineno(loc, s)
-        column = pyparsing.col(loc, s)
+        if self.engine == model.TlParserEngine.PYPARSING:
 
-        logger.debug("_setLineAndLineNumberParseAction: line_number: `%s`, column: `%s`,  line: `%s`",
-            line_number, column, orig_line)
+            if self.comments == model.TlCommentsMode.NONE:
+                section_str = self._blank_comment_lines(section_str, skip_n_lines)
 
-        t[constants.RESULT_NAME_SOURCE_LINE] = orig_line
-        t[constants.RESULT_NAME_SOURCE_LINE_NUMBER] = line_number
+            return self._parse_section_with_pyparsing(section_str, section_type, skip_n_lines, pyparsing_debug_logging_enabled)
 
-        return t
+        elif self.engine == model.TlParserEngine.FAST:
 
+            # the scanner checks if a line is a comment before anything else, so it handles the comments itself
+            tl_scanner = scanner.TlScanner(self._name_for_expression_after_equal(section_type), self.comments)
 
-    def _setTlLineTypeStringParseAction(self, line_type:model.TlFileLineType) -> typing.Callable[[str,int,pyparsing.ParseResults], pyparsing.ParseResults]:
-        '''
-        return _inner which will be the function actually called by pyparsing when it encounters a match
-        but it will 'capture' the `line_type` param and be able to use that to add to the token dictionary
-        on a match
+            return list(tl_scanner.scan(section_str, skip_n_lines))
 
-        should be registered using .setParseAction on the pyparsing.ParserElement that is responsible
-        for matching the given `TlFileLineType`
+        else:
 
-        @param line_type the line type enum member identifying what this line is
+            raise Exception(f"unhandled TlParserEngine! engine: `{self.engine}`")
 
-        @return a function that can be registered as a parser action using `.setParseAction`
+    def _split_into_chunks(self, section_str:str, skip_n_lines:int, num_chunks:int) -> typing.List[typing.Tuple[str, int]]:
         '''
+        splits a section of the TL file into roughly `num_chunks` chunks that can be parsed independently
 
-        def _inner( s:str, loc:int, toks:pyparsing.ParseResults) -> pyparsing.ParseResults:
-            '''
-            helper that is meant to be used with `<ParserElement>.setParseAction`, which means this function gets called
-            whenever a match for each line of the Telegram TL file gets hit.
+        chunks are only ever split at a blank line that doesn't have a comment above it waiting for a
+        definition, so every definition ends up in the same chunk as its comments
 
-            Here we add stuff to the ParseResults that it passes in
+        @param section_str the text of the section
+        @param skip_n_lines how many lines to skip from the start of the section
+        @param num_chunks how many chunks we would like to end up with
+        @return a list of tuples of (chunk text, number of lines in the section before the chunk)
+        '''
 
-            this will add a enum to the token dictionary if the match is a line or a comment
+        start_pos = scanner.skip_lines(section_str, skip_n_lines)
+        first_line_idx = section_str.count("\n", 0, start_pos)
+        section_lines = section_str[start_pos:].split("\n")
 
-            @param s is the original parse string
-            @param loc is the location in the string where matching started
-            @param toks is the list of the matched tokens, packaged as a ParseResults object
-            @return a ParseResults if you are modifying it, else None
-            '''
+        target_chunk_len = max(1, -(-len(section_lines) // num_chunks))
 
+        result_list = []
+        chunk_start_idx = 0
+        comments_are_pending = False
 
-            line_number = pyparsing.lineno(loc, s)
-            column = pyparsing.col(loc, s)
-            toks[constants.RESULT_NAME_TL_LINE_TYPE] = line_type
-            logger.debug("_setTlLineTypeStringParseAction._inner: setting type to be `%s` at line num: `%s`, col: `%s`",
-                line_type, line_number, column)
-            return toks
+        for iter_idx, iter_line in enumerate(section_lines):
 
-        return _inner
+            stripped_line = iter_line.strip(scanner.WHITESPACE_CHARS)
 
+            if stripped_line:
+                # a comment, or a definition with a comment after it, will be attached to the next definition
+                comments_are_pending = "//" in stripped_line
 
+            elif not comments_are_pending and iter_idx + 1 - chunk_start_idx >= target_chunk_len:
+                result_list.append(("\n".join(section_lines[chunk_start_idx:iter_idx + 1]), first_line_idx + chunk_start_idx))
+                chunk_start_idx = iter_idx + 1
 
-    def _get_complete_expression(self, name_for_expression_after_equal:str) -> pyparsing.ParserElement:
-        ''' helper that returns the same pyparsing expression but with a different 'name'
-        for the part after the equal sign
+        if chunk_start_idx < len(section_lines):
+            result_list.append(("\n".join(section_lines[chunk_start_idx:]), first_line_idx + chunk_start_idx))
 
-        for types, the part after the `=` is the abstract class that the type extends
+        return result_list
 
-        for functions, the part after the `=` is the result type
+    def _parse_sections_in_parallel(self,
+        tl_type_str:str,
+        tl_functions_str:str,
+        skip_n_lines:int,
+        workers:int) -> typing.Tuple[typing.List[model.TlTypeDefinition], typing.List[model.TlFunctionDefinition]]:
+        '''
+        parses both sections of the TL file by splitting them into chunks (see `_split_into_chunks`) and parsing
+        those in a process pool, the results are merged back in their original order
+
+        @param tl_type_str the text of the types section
+        @param tl_functions_str the text of the functions section
+        @param skip_n_lines how many lines to skip from the start of the types section
+        @param workers the number of worker processes to use
+        @return a tuple of (the list of concrete types, the list of functions)
         '''
 
-        # everything in a line that is past the initial 'name' of the class/type that is being defined
-        pe_params_list_equal_sign_and_extends_from = \
-            self.pe_zero_or_more_params + \
-            self.pe_equal_sign_literal.suppress() + \
-            self.pe_class_name(name_for_expression_after_equal) + \
-            self.pe_semicolon_literal
-
-        # the full line definition for a line that is describing a tdlib type/class (aka not a comment)
-        pe_full_line_tdlib_type_def = \
-            self.pe_tdlib_class_name + \
-            pe_params_list_equal_sign_and_extends_from
+        # a few chunks per worker so one slow chunk doesn't hold everything up
+        num_chunks = workers * 4
 
-        # set parser action to add a 'note' that this is a `DEFINITION` line
-        pe_full_line_tdlib_type_def.addParseAction(self._setTlLineTypeStringParseAction(model.TlFileLineType.DEFINITION))
+        chunk_args = []
 
-        # set parser action to add the line and column numbers
-        pe_full_line_tdlib_type_def.addParseAction(self._setLineAndLineNumberParseAction)
+        for iter_section_type, iter_section_str, iter_skip_n_lines in (
+            (model.TlFileSectionType.TYPES, tl_type_str, skip_n_lines),
+            (model.TlFileSectionType.FUNCTIONS, tl_functions_str, 0)):
 
+            for iter_chunk_str, iter_line_offset in self._split_into_chunks(iter_section_str, iter_skip_n_lines, num_chunks):
+                chunk_args.append((self.engine.value, self.comments.value, self.packrat, self.packrat_cache_size,
+                    iter_section_type, iter_chunk_str, iter_line_offset))
 
-        pe_full_comment_line = \
-            self.pe_comment_literal + \
-            pyparsing.restOfLine(constants.RESULT_NAME_COMMENT_TEXT)
+        logger.info("parsing `%s` chunks with `%s` workers", len(chunk_args), workers)
 
-        # set parser action to add a 'note' that this is a `COMMENT` line
-        pe_full_comment_line.addParseAction(self._setTlLineTypeStringParseAction(model.TlFileLineType.COMMENT))
+        result_dict = {model.TlFileSectionType.TYPES: [], model.TlFileSectionType.FUNCTIONS: []}
 
-        # set parser action to add the line and column numbers
-        pe_full_comment_line.addParseAction(self._setLineAndLineNumberParseAction)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
 
-        to_return = \
-            pyparsing.ZeroOrMore(
-                pyparsing.Group(
-                    pyparsing.Or(
-                            [pe_full_line_tdlib_type_def,
-                            pe_full_comment_line]
-                        )
-                    )
-                )
+            for iter_args, iter_definitions in zip(chunk_args, executor.map(_parse_chunk, *zip(*chunk_args))):
+                result_dict[iter_args[4]].extend(iter_definitions)
 
-        return to_return
+        return (result_dict[model.TlFileSectionType.TYPES], result_dict[model.TlFileSectionType.FUNCTIONS])
 
     def parse(self,
         tl_file_path:pathlib.Path,
         skip_n_lines:int,
-        pyparsing_debug_logging_enabled:bool) -> typing.Sequence[model.TlFileDefinition]:
+        pyparsing_debug_logging_enabled:bool,
+        workers:int=1,
+        run_stats:typing.Optional[stats.RunStats]=None) -> typing.Sequence[model.TlFileDefinition]:
         '''
         @param tl_file_path the Path to the .tl file we are parsing
+        @param skip_n_lines how many lines to skip from the start of the file
+        @param pyparsing_debug_logging_enabled whether to turn on the pyparsing debug logging
+        @param workers if more than 1, the file is split into chunks that are parsed by this many worker processes,
+            the result is the same as parsing it in this process
+        @param run_stats if provided, the time and memory of each phase of parsing, and the counts of what was
+            parsed, are recorded in it
 
         '''
 
-        logger.info("parsing file: `%s`", tl_file_path)
+        logger.info("parsing file: `%s` using the `%s` engine", tl_file_path, self.engine.value)
         logger.info("skipping `%s` lines from the start of the file", skip_n_lines)
 
+        if workers > 1 and (pyparsing_debug_logging_enabled or self.grammar_profiler is not None):
+            logger.info("pyparsing debug logging and grammar profiling only work in this process, not using any workers")
+            workers = 1
 
-        pe_complete_expression_for_tl_types =  self._get_complete_expression(constants.RESULT_NAME_EXTENDS_FROM_ABC)
+        with stats.phase(run_stats, "read file"):
+            with open(tl_file_path, "r", encoding="utf-8") as f:
 
-        # since the types come first, we need to see if we are skipping any lines or not
-        if skip_n_lines > 0:
+                full_file = f.read()
 
-            # I did not need to add `suppress()` before , but for some reason now i do? strange...
-            # if i don't add it then it 'skips' the lines but the lines that i 'skip' still end up
-            # in the parsed results =/
-            # maybe i got lucky with a previous commit's pattern where the first X lines wouldn't
-            # match anyway even if they were 'accepted' by SkipTo? Cause the documentation for
-            # `SkipTo` is `skips ahead in the input string, accepting any characters up`the specified pattern`
-            # so that makes me think that i just got lucky and i actually always needed to add `suppress()`
-            # to the `SkipTo` elements i added
-            #
-            # also: adding all of the `SkipTo` ParserElements to a group and then calling `suppress()`
-            # on that makes the pattern shorter (for debugging), as there is only one `suppress()` and not
-            # X for `skip_n_lines`
-            skip_group = pyparsing.Group(self.pe_skip_line * skip_n_lines).suppress()
-            pe_complete_expression_for_tl_types = skip_group + pe_complete_expression_for_tl_types
+        with stats.phase(run_stats, "split sections"):
+            tl_type_str, tl_functions_str = full_file.split("---functions---")
 
-            logger.debug("skip_n_lines is `%s`, adding `%s` SkipTo (`%s`) ParserElements to the expression",
-                skip_n_lines, skip_n_lines, self.pe_skip_line)
+        if workers > 1:
 
-        logger.debug("final pyparsing expression for types: `%s`", pe_complete_expression_for_tl_types)
+            with stats.phase(run_stats, "parse and build model (parallel)"):
+                types, functions = self._parse_sections_in_parallel(tl_type_str, tl_functions_str, skip_n_lines, workers)
 
-        # we don't need to skip any lines for functions since the only thing we skip are types
-        pe_complete_expression_for_tl_functions = self._get_complete_expression(constants.RESULT_NAME_RETURN_TYPE)
+        else:
 
-        logger.debug("final pyparsing expression for functions: `%s`", pe_complete_expression_for_tl_functions)
+            # we don't need to skip any lines for functions since the only thing we skip are types
+            with stats.phase(run_stats, "parse types section"):
+                types_results = self._parse_section(tl_type_str, model.TlFileSectionType.TYPES, skip_n_lines, pyparsing_debug_logging_enabled)
 
-        if pyparsing_debug_logging_enabled:
-            logger.debug("Turning on pyparsing debug logging")
-            utils.setLoggingDebugActionForParserElement(pe_complete_expression_for_tl_types)
-            utils.setLoggingDebugActionForParserElement(pe_complete_expression_for_tl_functions)
-            utils.setLoggingDebugActionForParserElement(self.pe_skip_line)
+            with stats.phase(run_stats, "parse functions section"):
+                functions_results = self._parse_section(tl_functions_str, model.TlFileSectionType.FUNCTIONS, 0, pyparsing_debug_logging_enabled)
+
+            with stats.phase(run_stats, "build model"):
+                types = self._results_to_definitions(model.TlFileSectionType.TYPES, types_results)
+                functions = self._results_to_definitions(model.TlFileSectionType.FUNCTIONS, functions_results)
+
+        with stats.phase(run_stats, "infer abstract types"):
+            result_file_def = self._build_file_definition(types, functions)
+
+        if run_stats is not None:
+            run_stats.count_file_definition(result_file_def)
+
+        return result_file_def
+
+    def _split_into_blocks(self, section_lines:typing.Sequence[str], first_line_number:int) -> typing.Optional[typing.List[TlSourceBlock]]:
+        '''
+        splits the lines of a section of the TL file into blocks of a definition line and the comment lines above it
+
+        this only looks at the start of each line, so it can only be trusted if every definition is on a line of its
+        own, if that is not the case (like a comment after a definition on the same line) then we return None
+
+        @param section_lines the lines of the section, starting at `first_line_number`
+        @param first_line_number the line number of the first line in `section_lines`
+        @return a list of TlSourceBlock, or None if the section can't be split into blocks
+        '''
+
+        result_list = []
+        queued_comment_lines = []
+
+        for iter_line_number, iter_line in enumerate(section_lines, start=first_line_number):
+
+            stripped_line = iter_line.strip(scanner.WHITESPACE_CHARS)
+
+            if not stripped_line:
+                continue
+
+            elif stripped_line.startswith("//"):
+                queued_comment_lines.append((iter_line_number, iter_line))
+
+            elif "//" in stripped_line or stripped_line.count(";") != 1:
+                logger.debug("line `%s` is not a single definition, can't split the section into blocks: `%s`",
+                    iter_line_number, iter_line)
+                return None
+
+            else:
+                result_list.append(TlSourceBlock(
+                    first_line_number=queued_comment_lines[0][0] if queued_comment_lines else iter_line_number,
+                    comment_lines=queued_comment_lines,
+                    definition_line_number=iter_line_number,
+                    definition_line=iter_line))
+
+                queued_comment_lines = []
+
+        return result_list
+
+    def _renumber_definition(self,
+        definition:typing.Union[model.TlTypeDefinition, model.TlFunctionDefinition],
+        block:TlSourceBlock) -> typing.Union[model.TlTypeDefinition, model.TlFunctionDefinition]:
+        '''
+        returns the definition with its line numbers (and the line numbers of its comments) fixed up to
+        match where the given block is, the same object is returned if they already match
+
+        @param definition the TlTypeDefinition or TlFunctionDefinition
+        @param block the TlSourceBlock the definition was parsed from
+        @return the definition with the correct line numbers
+        '''
+
+        if self.comments == model.TlCommentsMode.NONE:
+            comment_line_numbers = []
+        else:
+            comment_line_numbers = [x[0] for x in block.comment_lines]
+
+        if definition.source_line_number == block.definition_line_number and \
+            [x.source_line_number for x in definition.comments] == comment_line_numbers:
+
+            return definition
+
+        return attr.evolve(definition,
+            source_line_number=block.definition_line_number,
+            comments=[attr.evolve(iter_comment, source_line_number=iter_line_number)
+                for iter_comment, iter_line_number in zip(definition.comments, comment_line_numbers)])
+
+    def _parse_section_incremental(self,
+        section_str:str,
+        section_type:model.TlFileSectionType,
+        skip_n_lines:int,
+        previous_definitions:typing.Sequence[typing.Union[model.TlTypeDefinition, model.TlFunctionDefinition]],
+        pyparsing_debug_logging_enabled:bool) -> typing.List[typing.Union[model.TlTypeDefinition, model.TlFunctionDefinition]]:
+        '''
+        parses one section of the TL file, reusing the definitions from a previous parse for any blocks
+        (see `TlSourceBlock`) that didn't change, only the blocks that did change are parsed
+
+        @param section_str the text of the section
+        @param section_type which section this is
+        @param skip_n_lines how many lines to skip from the start of the section
+        @param previous_definitions the concrete types or the functions from the previous parse
+        @param pyparsing_debug_logging_enabled whether to turn on the pyparsing debug logging
+        @return the list of definitions for this section, same as `_results_to_definitions`
+        '''
+
+        # pyparsing expands tabs before parsing, so the `source_line` values in the previous
+        # parse have their tabs expanded as well
+        expanded_section_str = section_str.expandtabs() if "\t" in section_str else section_str
+
+        start_pos = scanner.skip_lines(expanded_section_str, skip_n_lines)
+        first_line_number = expanded_section_str.count("\n", 0, start_pos) + 1
+        section_lines = expanded_section_str[start_pos:].split("\n")
+
+        blocks = self._split_into_blocks(section_lines, first_line_number)
+
+        if blocks is None:
+            logger.info("the `%s` section can't be split into blocks, parsing all of it", section_type)
+            return self._results_to_definitions(section_type,
+                self._parse_section(section_str, section_type, skip_n_lines, pyparsing_debug_logging_enabled))
+
+        # (comment texts, source line) -> the definitions from the previous parse, in order
+        previous_definitions_by_key = dict()
+
+        # with `TlCommentsMode.NONE` the definitions don't have comments, so changing one can't change them
+        keep_comments = self.comments != model.TlCommentsMode.NONE
+
+        for iter_definition in previous_definitions:
+            iter_key = (tuple(x.comment_text for x in iter_definition.comments), iter_definition.source_line)
+            previous_definitions_by_key.setdefault(iter_key, collections.deque()).append(iter_definition)
+
+        result_list = []
+        reparsed_count = 0
+
+        for iter_block in blocks:
+
+            iter_key = (
+                tuple(x[1].lstrip(scanner.WHITESPACE_CHARS)[2:] for x in iter_block.comment_lines) if keep_comments else (),
+                iter_block.definition_line)
+
+            candidates = previous_definitions_by_key.get(iter_key)
+
+            if candidates:
+                result_list.append(self._renumber_definition(candidates.popleft(), iter_block))
+                continue
+
+            logger.debug("block at line `%s` changed, parsing it", iter_block.first_line_number)
+            reparsed_count += 1
+
+            block_start_idx = iter_block.first_line_number - first_line_number
+            block_end_idx = iter_block.definition_line_number - first_line_number + 1
+            block_str = "\n".join(section_lines[block_start_idx:block_end_idx])
+
+            for iter_definition in self._results_to_definitions(section_type,
+                self._parse_section(block_str, section_type, 0, pyparsing_debug_logging_enabled)):
+
+                result_list.append(self._renumber_definition(iter_definition, iter_block))
+
+        logger.info("`%s` section: reused `%s` definitions from the previous parse and parsed `%s` changed blocks",
+            section_type, len(blocks) - reparsed_count, reparsed_count)
 
+        return result_list
 
-        parse_results_dict = dict()
+    def parse_incremental(self,
+        tl_file_path:pathlib.Path,
+        previous:model.TlFileDefinition,
+        skip_n_lines:int,
+        pyparsing_debug_logging_enabled:bool=False) -> model.TlFileDefinition:
+        '''
+        parses a new revision of a TL file, reusing the definitions from the TlFileDefinition of a previous
+        revision for everything that didn't change. Only the definitions (and their comments) that changed
+        are run through the parsing engine, and only abstract types that weren't in the previous
+        revision are created. The result is the same as calling `parse` on the new revision
+
+        @param tl_file_path the Path to the new revision of the .tl file
+        @param previous the TlFileDefinition of a previous revision, parsed with the same `skip_n_lines`
+        @param skip_n_lines how many lines to skip from the start of the file
+        @param pyparsing_debug_logging_enabled whether to turn on the pyparsing debug logging
+        @return the TlFileDefinition for the new revision
+        '''
+
+        logger.info("incrementally parsing file: `%s` using the `%s` engine", tl_file_path, self.engine.value)
 
         with open(tl_file_path, "r", encoding="utf-8") as f:
 
             full_file = f.read()
 
-            tl_type_str, tl_functions_str = full_file.split("---functions---")
+        tl_type_str, tl_functions_str = full_file.split("---functions---")
+
+        types = self._parse_section_incremental(
+            tl_type_str,
+            model.TlFileSectionType.TYPES,
+            skip_n_lines,
+            [x for x in previous.types if x.class_type == model.TlClassTypeEnum.CONCRETE],
+            pyparsing_debug_logging_enabled)
+
+        functions = self._parse_section_incremental(
+            tl_functions_str,
+            model.TlFileSectionType.FUNCTIONS,
+            0,
+            previous.functions,
+            pyparsing_debug_logging_enabled)
+
+        previous_abstract_types = {x.class_name: x for x in previous.types if x.class_type == model.TlClassTypeEnum.ABSTRACT}
+
+        return self._build_file_definition(types, functions, previous_abstract_types)
 
-            res_types = pe_complete_expression_for_tl_types.parseString(tl_type_str, parseAll=True)
-            parse_results_dict[model.TlFileSectionType.TYPES] = res_types
+    def _iter_streamed_results(self,
+        fileobj:typing.TextIO,
+        skip_n_lines:int,
+        pyparsing_debug_logging_enabled:bool) -> typing.Iterator[typing.Tuple[model.TlFileSectionType, typing.Any]]:
+        '''
+        reads the TL file one line at a time, and yields the results for each line as soon as it is read,
+        the same results `_parse_section` returns
+
+        line numbers follow the same rules as `parse`, so they are relative to the start of the section
+
+        @param fileobj the file object to read from, opened in text mode
+        @param skip_n_lines how many lines to skip from the start of the file
+        @param pyparsing_debug_logging_enabled whether to turn on the pyparsing debug logging
+        @return a iterator of tuples of (section type, result)
+        '''
 
-            res_functions = pe_complete_expression_for_tl_functions.parseString(tl_functions_str, parseAll=True)
-            parse_results_dict[model.TlFileSectionType.FUNCTIONS] = res_functions
+        section_type = model.TlFileSectionType.TYPES
+        line_number = 0
 
+        for iter_line in fileobj:
 
-        all_tl_types_to_add_to_file_definition = []
+            line_number += 1
 
-        # now convert the parse result to our own object
+            # pyparsing expands tabs before parsing, and since tab stops start over at every
+            # newline doing it per line gives the same result
+            iter_line = iter_line.rstrip("\n").expandtabs()
 
-        for iter_file_section_type, iter_parse_results in parse_results_dict.items():
+            if section_type == model.TlFileSectionType.TYPES and "---functions---" in iter_line:
 
-            logger.debug("Processing results from `%s`", iter_file_section_type)
+                # whatever is before the marker is still part of the types section, and whatever is after
+                # it is the first line of the functions section
+                before_marker, after_marker = iter_line.split("---functions---", 1)
 
-            # so how the 'results' work that we get back from pyparsing is that
-            # they are in a giant list, so since the comments are ABOVE the
-            # types and functions, we are going to go through each of the items
-            # in the parse results, and if it is a `TlFileLineType.COMMENT`,
-            # we create a TlComment and add it to this list, and then once we get
-            # to a non comment (aka `TlFileLineType.TYPE`) we then consume all of
-            # the items in this list and add it to the `TlTypeDefinition` or
-            # `TlFunctionDefinition`
-            queued_comments = list()
+                if line_number > skip_n_lines:
+                    for iter_result in self._parse_line(before_marker, line_number, section_type, pyparsing_debug_logging_enabled):
+                        yield (section_type, iter_result)
 
-            for iter_result in iter_parse_results:
+                section_type = model.TlFileSectionType.FUNCTIONS
+                line_number = 1
+                iter_line = after_marker
 
-                line_type = iter_result[constants.RESULT_NAME_TL_LINE_TYPE]
+            elif section_type == model.TlFileSectionType.TYPES and line_number <= skip_n_lines:
 
-                if line_type == model.TlFileLineType.COMMENT:
+                continue
 
-                    comment_text = iter_result[constants.RESULT_NAME_COMMENT_TEXT]
-                    src_line_num = iter_result[constants.RESULT_NAME_SOURCE_LINE_NUMBER]
+            for iter_result in self._parse_line(iter_line, line_number, section_type, pyparsing_debug_logging_enabled):
+                yield (section_type, iter_result)
 
-                    new_comment = model.TlComment(
-                        comment_text=comment_text,
-                        source_line_number = src_line_num)
+    def _parse_line(self,
+        line:str,
+        line_number:int,
+        section_type:model.TlFileSectionType,
+        pyparsing_debug_logging_enabled:bool) -> typing.Sequence[typing.Any]:
+        '''
+        parses a single line of the TL file with the engine this Parser was created with
+
+        @param line the line, without the trailing newline
+        @param line_number the line number to record for the results
+        @param section_type which section the line is in
+        @param pyparsing_debug_logging_enabled whether to turn on the pyparsing debug logging
+        @return a sequence of results, same as `_parse_section`
+        '''
 
-                    queued_comments.append(new_comment)
+        if not line.strip(scanner.WHITESPACE_CHARS):
+            return []
 
+        results = self._parse_section(line, section_type, 0, pyparsing_debug_logging_enabled)
 
-                elif line_type == model.TlFileLineType.DEFINITION:
+        # the line was parsed on its own, so its line number is always 1
+        for iter_result in results:
+            iter_result[constants.RESULT_NAME_SOURCE_LINE_NUMBER] = line_number
 
-                    type_to_create = None
+        return results
 
-                    type_to_create_kwargs = dict()
+    def iter_definitions(self,
+        fileobj:typing.TextIO,
+        skip_n_lines:int,
+        pyparsing_debug_logging_enabled:bool=False) -> typing.Iterator[typing.Union[model.TlTypeDefinition, model.TlFunctionDefinition]]:
+        '''
+        reads a TL file incrementally and yields every definition as soon as its line has been read, along
+        with the comments above it. The concrete types are yielded first, then the functions and then,
+        once the whole file has been read, the abstract types (starting with the root object)
+
+        only the comments above the current definition and the names of the abstract types are kept
+        around, so the memory used does not depend on the size of the file
+
+        @param fileobj the file object to read from, opened in text mode
+        @param skip_n_lines how many lines to skip from the start of the file
+        @param pyparsing_debug_logging_enabled whether to turn on the pyparsing debug logging
+        @return a iterator of TlTypeDefinition and TlFunctionDefinition objects
+        '''
+
+        # the names of the abstract types the concrete types extend, in order, a dict is used as
+        # a ordered set
+        extends_from_names = dict()
+
+        streamed_results = self._iter_streamed_results(fileobj, skip_n_lines, pyparsing_debug_logging_enabled)
+
+        # every section gets its own `_iter_results_to_definitions` so the comments at the end of
+        # the types section don't end up on the first function, just like `parse`
+        for iter_section_type, iter_section_results in itertools.groupby(streamed_results, key=lambda x: x[0]):
+
+            for iter_definition in self._iter_results_to_definitions(iter_section_type, (x[1] for x in iter_section_results)):
+
+                if iter_section_type == model.TlFileSectionType.TYPES:
+                    extends_from_names[iter_definition.extends_from] = None
+
+                yield iter_definition
+
+        yield from self._create_abstract_types(extends_from_names.keys())
+
+    def _results_to_definitions(self,
+        section_type:model.TlFileSectionType,
+        parse_results:typing.Iterable[typing.Any]) -> typing.List[typing.Union[model.TlTypeDefinition, model.TlFunctionDefinition]]:
+        '''
+        converts the results of parsing a section of the TL file to our own objects
+
+        @param section_type which section the results are from
+        @param parse_results the results from `_parse_section`
+        @return a list of `TlTypeDefinition` for the types section or `TlFunctionDefinition` for the functions section
+        '''
+
+        return list(self._iter_results_to_definitions(section_type, parse_results))
+
+    def _iter_results_to_definitions(self,
+        section_type:model.TlFileSectionType,
+        parse_results:typing.Iterable[typing.Any]) -> typing.Iterator[typing.Union[model.TlTypeDefinition, model.TlFunctionDefinition]]:
+        '''
+        same as `_results_to_definitions`, but yields each definition as soon as the result for its line
+        has been consumed, so `parse_results` can be a lazy iterator
+
+        @param section_type which section the results are from
+        @param parse_results the results from `_parse_section`
+        @return a iterator of `TlTypeDefinition` for the types section or `TlFunctionDefinition` for the functions section
+        '''
 
-                    # copy the currently queued comments and
-                    # clear the 'queue'
-                    comments = [x for x in queued_comments]
-                    queued_comments = list()
+        logger.debug("Processing results from `%s`", section_type)
 
-                    # common parameters between TYPES and FUNCTIONS
-                    src_line = iter_result[constants.RESULT_NAME_SOURCE_LINE]
-                    src_line_num = iter_result[constants.RESULT_NAME_SOURCE_LINE_NUMBER]
+        # so how the 'results' work that we get back from pyparsing is that
+        # they are in a giant list, so since the comments are ABOVE the
+        # types and functions, we are going to go through each of the items
+        # in the parse results, and if it is a `TlFileLineType.COMMENT`,
+        # we create a TlComment and add it to this list, and then once we get
+        # to a non comment (aka `TlFileLineType.TYPE`) we then consume all of
+        # the items in this list and add it to the `TlTypeDefinition` or
+        # `TlFunctionDefinition`
+        queued_comments = list()
 
-                    type_to_create_kwargs["source_line"] = src_line
-                    type_to_create_kwargs["source_line_number"] = src_line_num
-                    type_to_create_kwargs["comments"] = comments
+        for iter_result in parse_results:
 
-                    # get any parameters for this type or function if they exist
-                    param_list = []
-                    if constants.RESULT_NAME_PARAMS in iter_result.keys():
-                        for iter_param in iter_result[constants.RESULT_NAME_PARAMS]:
+            line_type = iter_result[constants.RESULT_NAME_TL_LINE_TYPE]
 
-                            p_name = iter_param[constants.RESULT_NAME_PARAM_NAME]
-                            p_type = iter_param[constants.RESULT_NAME_PARAM_TYPE]
+            if line_type == model.TlFileLineType.COMMENT:
 
-                            tlp = model.TlParameter(param_name=p_name, param_type=p_type)
-                            logger.debug("--param: `%s`", tlp)
-                            param_list.append(tlp)
+                # the lines that are just a comment never get this far with `TlCommentsMode.NONE`, but
+                # a comment after a definition on the same line does
+                if self.comments == model.TlCommentsMode.NONE:
+                    continue
 
-                    type_to_create_kwargs["parameters"] = param_list
+                src_line_num = iter_result[constants.RESULT_NAME_SOURCE_LINE_NUMBER]
 
-                    # specific arguments for either TYPES or FUNCTIONS
+                comment_text = iter_result[constants.RESULT_NAME_COMMENT_TEXT]
 
-                    if iter_file_section_type == model.TlFileSectionType.TYPES:
+                new_comment = model.TlComment(
+                    comment_text=comment_text,
+                    source_line_number = src_line_num)
 
-                        type_to_create = model.TlTypeDefinition
+                queued_comments.append(new_comment)
 
-                        cls_name = iter_result[constants.RESULT_NAME_CLASS_OR_FUNCTION_NAME]
-                        extends_from = iter_result[constants.RESULT_NAME_EXTENDS_FROM_ABC]
 
-                        type_to_create_kwargs["class_name"] = cls_name
-                        type_to_create_kwargs["extends_from"] = extends_from
-                        type_to_create_kwargs["class_type"] = model.TlClassTypeEnum.CONCRETE
+            elif line_type == model.TlFileLineType.DEFINITION:
 
-                    elif iter_file_section_type == model.TlFileSectionType.FUNCTIONS:
+                type_to_create = None
 
-                        type_to_create = model.TlFunctionDefinition
+                type_to_create_kwargs = dict()
 
-                        fn_name = iter_result[constants.RESULT_NAME_CLASS_OR_FUNCTION_NAME]
-                        rtn_type = iter_result[constants.RESULT_NAME_RETURN_TYPE]
+                # copy the currently queued comments and
+                # clear the 'queue'
+                comments = [x for x in queued_comments]
+                queued_comments = list()
 
-                        type_to_create_kwargs["function_name"] = fn_name
-                        type_to_create_kwargs["return_type"] = rtn_type
+                # common parameters between TYPES and FUNCTIONS
+                src_line = iter_result[constants.RESULT_NAME_SOURCE_LINE]
+                src_line_num = iter_result[constants.RESULT_NAME_SOURCE_LINE_NUMBER]
 
-                    else:
+                type_to_create_kwargs["source_line"] = src_line
+                type_to_create_kwargs["source_line_number"] = src_line_num
+                type_to_create_kwargs["comments"] = comments
 
-                        raise Exception(f"unhandled TlFileSectionType! type: `{iter_file_section_type}`")
+                # get any parameters for this type or function if they exist
+                param_list = []
+                if constants.RESULT_NAME_PARAMS in iter_result.keys():
+                    for iter_param in iter_result[constants.RESULT_NAME_PARAMS]:
 
+                        p_name = iter_param[constants.RESULT_NAME_PARAM_NAME]
+                        p_type = iter_param[constants.RESULT_NAME_PARAM_TYPE]
 
-                    # now create the specified type with the specified arguments and add it
-                    # to our list
+                        tlp = model.TlParameter(param_name=p_name, param_type=p_type)
+                        logger.debug("--param: `%s`", tlp)
+                        param_list.append(tlp)
 
-                    new_type = type_to_create(**type_to_create_kwargs)
+                type_to_create_kwargs["parameters"] = param_list
 
-                    logger.debug("added new `%s`: `%s`", type(new_type), new_type)
+                # specific arguments for either TYPES or FUNCTIONS
 
-                    all_tl_types_to_add_to_file_definition.append(new_type)
+                if section_type == model.TlFileSectionType.TYPES:
+
+                    type_to_create = model.TlTypeDefinition
+
+                    cls_name = iter_result[constants.RESULT_NAME_CLASS_OR_FUNCTION_NAME]
+                    extends_from = iter_result[constants.RESULT_NAME_EXTENDS_FROM_ABC]
+
+                    type_to_create_kwargs["class_name"] = cls_name
+                    type_to_create_kwargs["extends_from"] = extends_from
+                    type_to_create_kwargs["class_type"] = model.TlClassTypeEnum.CONCRETE
+
+                elif section_type == model.TlFileSectionType.FUNCTIONS:
+
+                    type_to_create = model.TlFunctionDefinition
+
+                    fn_name = iter_result[constants.RESULT_NAME_CLASS_OR_FUNCTION_NAME]
+                    rtn_type = iter_result[constants.RESULT_NAME_RETURN_TYPE]
+
+                    type_to_create_kwargs["function_name"] = fn_name
+                    type_to_create_kwargs["return_type"] = rtn_type
 
                 else:
 
-                    raise Exception(f"Unhandled TlFileLineType! type: `{line_type}`")
+                    raise Exception(f"unhandled TlFileSectionType! type: `{section_type}`")
+
 
+                # now create the specified type with the specified arguments and add it
+                # to our list
 
-        # sort the results into functions and types
-        def _filter_by_type(the_list, the_type):
-            return  [x for x in the_list if isinstance(x, the_type)]
+                new_type = type_to_create(**type_to_create_kwargs)
 
-        tl_concrete_types_to_add_to_file_definition = _filter_by_type(all_tl_types_to_add_to_file_definition, model.TlTypeDefinition)
-        tl_funcs_to_add_to_file_definition = _filter_by_type(all_tl_types_to_add_to_file_definition, model.TlFunctionDefinition)
+                logger.debug("added new `%s`: `%s`", type(new_type), new_type)
 
+                yield new_type
+
+            else:
+
+                raise Exception(f"Unhandled TlFileLineType! type: `{line_type}`")
+
+    def _create_abstract_types(self,
+        extends_from_names:typing.Iterable[str],
+        previous_abstract_types:typing.Optional[typing.Dict[str, model.TlTypeDefinition]]=None) -> typing.List[model.TlTypeDefinition]:
+        '''
+        creates the abstract types, starting with the root object, for the abstract classes that the concrete types extend
+
+        @param extends_from_names the `extends_from` of every concrete type, in order
+        @param previous_abstract_types if provided, a dict of class name -> abstract TlTypeDefinition from a
+            previous parse, any abstract types that are still needed are reused rather than created again
+        @return the list of abstract TlTypeDefinition, in the order they were first extended
+        '''
 
         # so here we have the 'explicit' results, but we need to create entries for the 'implicit' class types
         # for example, `authenticationCodeTypeTelegramMessage length:int32 = AuthenticationCodeType;` means that
@@ -385,22 +774,33 @@ class Parser:
         logger.debug("creating abstract type definitions")
 
         # first create the "root" object that all of the abstract classes will extend from
-        root_type = model.TlTypeDefinition(
-                class_name=constants.ROOT_OBJECT_NAME,
-                parameters=[model.TlParameter(param_name="_extra", param_type="str", required=False, default_value="")],
-                extends_from=None,
-                source_line_number=-1,
-                source_line = "",
-                comments=[],
-                class_type=model.TlClassTypeEnum.ABSTRACT)
+        if previous_abstract_types is not None and constants.ROOT_OBJECT_NAME in previous_abstract_types.keys():
+            root_type = previous_abstract_types[constants.ROOT_OBJECT_NAME]
+        else:
+            root_type = model.TlTypeDefinition(
+                    class_name=constants.ROOT_OBJECT_NAME,
+                    parameters=[model.TlParameter(param_name="_extra", param_type="str", required=False, default_value="")],
+                    extends_from=None,
+                    source_line_number=-1,
+                    source_line = "",
+                    comments=[],
+                    class_type=model.TlClassTypeEnum.ABSTRACT)
 
         result_abstract_types_dict[root_type.class_name] = root_type
 
-        # then go through and create more depending on the Concrete TlTypeDefinitions we created from the file
-        for iter_type_def in tl_concrete_types_to_add_to_file_definition:
-            iter_abstract_class_name = iter_type_def.extends_from
+        # then go through and create more depending on what the Concrete TlTypeDefinitions we created from the file extend
+        for iter_abstract_class_name in extends_from_names:
 
-            if iter_abstract_class_name not in result_abstract_types_dict.keys():
+            if iter_abstract_class_name in result_abstract_types_dict.keys():
+
+                logger.debug("abstract type was already created: `%s`", iter_abstract_class_name)
+
+            elif previous_abstract_types is not None and iter_abstract_class_name in previous_abstract_types.keys():
+
+                logger.debug("reusing abstract type from the previous parse: `%s`", iter_abstract_class_name)
+                result_abstract_types_dict[iter_abstract_class_name] = previous_abstract_types[iter_abstract_class_name]
+
+            else:
 
                 new_abstract_type = model.TlTypeDefinition(
                     class_name=iter_abstract_class_name,
@@ -414,28 +814,67 @@ class Parser:
                 logger.debug("new abstract type definition: `%s`", new_abstract_type)
                 result_abstract_types_dict[iter_abstract_class_name] = new_abstract_type
 
-            else:
+        return list(result_abstract_types_dict.values())
 
-                logger.debug("abstract type was already created: `%s`", iter_abstract_class_name)
+    def _build_file_definition(self,
+        concrete_types:typing.List[model.TlTypeDefinition],
+        functions:typing.List[model.TlFunctionDefinition],
+        previous_abstract_types:typing.Optional[typing.Dict[str, model.TlTypeDefinition]]=None) -> model.TlFileDefinition:
+        '''
+        creates the final TlFileDefinition out of the concrete types and functions that were parsed from the file,
+        adding the abstract types that the concrete types extend
+
+        @param concrete_types the concrete types parsed from the file
+        @param functions the functions parsed from the file
+        @param previous_abstract_types if provided, a dict of class name -> abstract TlTypeDefinition from a
+            previous parse, any abstract types that are still needed are reused rather than created again
+        @return the TlFileDefinition
+        '''
+
+        abstract_types = self._create_abstract_types((x.extends_from for x in concrete_types), previous_abstract_types)
 
         # create the final file definition
-        final_types_list = tl_concrete_types_to_add_to_file_definition + list(result_abstract_types_dict.values())
+        final_types_list = concrete_types + abstract_types
 
-        result_file_def = model.TlFileDefinition(types=final_types_list, functions=tl_funcs_to_add_to_file_definition)
+        result_file_def = model.TlFileDefinition(types=final_types_list, functions=functions)
 
         logging.info("final parsed file definition: `%s` concrete types, `%s` abstract types and `%s` functions",
-            len(tl_concrete_types_to_add_to_file_definition),
-            len(result_abstract_types_dict.values()),
+            len(concrete_types),
+            len(abstract_types),
             len(result_file_def.functions))
 
         return result_file_def
 
 
-
-
-
-
-
-
-
-
+def _parse_chunk(
+    engine_value:str,
+    comments_value:str,
+    packrat:bool,
+    packrat_cache_size:int,
+    section_type:model.TlFileSectionType,
+    chunk_str:str,
+    line_offset:int) -> typing.List[typing.Union[model.TlTypeDefinition, model.TlFunctionDefinition]]:
+    '''
+    parses a chunk of a section of the TL file, this runs in a worker process, see `Parser._parse_sections_in_parallel`
+
+    @param engine_value the value of the TlParserEngine to parse with
+    @param comments_value the value of the TlCommentsMode to parse with
+    @param packrat whether to use pyparsing's packrat mode, see `Parser`
+    @param packrat_cache_size the maximum number of entries in the packrat cache
+    @param section_type which section the chunk is from
+    @param chunk_str the text of the chunk
+    @param line_offset the number of lines in the section before the chunk, this is added to every line number
+    @return the list of definitions in the chunk
+    '''
+
+    parser = Parser(engine=engine_value, packrat=packrat, packrat_cache_size=packrat_cache_size, comments=comments_value)
+
+    definitions = parser._results_to_definitions(section_type, parser._parse_section(chunk_str, section_type, 0, False))
+
+    if line_offset == 0:
+        return definitions
+
+    return [attr.evolve(iter_definition,
+            source_line_number=iter_definition.source_line_number + line_offset,
+            comments=[attr.evolve(x, source_line_number=x.source_line_number + line_offset) for x in iter_definition.comments])
+        for iter_definition in definitions]
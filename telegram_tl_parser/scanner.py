@@ -0,0 +1,178 @@
+import logging
+import re
+import typing
+
+import pyparsing
+
+import telegram_tl_parser.constants as constants
+import telegram_tl_parser.model as model
+
+logger = logging.getLogger(__name__)
+
+# the whitespace characters that pyparsing skips by default between tokens,
+# we use the same set so that blank lines are detected the same way
+WHITESPACE_CHARS = " \t\r\n"
+
+# regex that matches a single definition line, starting at the current position
+#
+# this mirrors the pyparsing grammar in `TlGrammar._build_complete_expression`, the negative
+# lookaheads make the `Word` style tokens greedy without backtracking, just like pyparsing's
+# `Word`, so something like `abc:int32 = X;` doesn't get split up into a class name `ab` and
+# a param name `c`
+DEFINITION_REGEX = re.compile(
+    r"(?P<name>[A-Za-z0-9]+)(?![A-Za-z0-9])"
+    r"(?P<params>(?:[ \t\r\n]*[A-Za-z0-9_]+(?![A-Za-z0-9_])[ \t\r\n]*:[ \t\r\n]*[A-Za-z0-9<>]+(?![A-Za-z0-9<>]))*)"
+    r"[ \t\r\n]*=[ \t\r\n]*(?P<after_equal>[A-Za-z0-9]+)(?![A-Za-z0-9])[ \t\r\n]*;")
+
+# regex that finds the individual parameters inside the `params` group of `DEFINITION_REGEX`
+PARAM_REGEX = re.compile(r"([A-Za-z0-9_]+)[ \t\r\n]*:[ \t\r\n]*([A-Za-z0-9<>]+)")
+
+# regex that matches a line that is nothing but a comment, the `text` group is the same as the
+# `comment_text` the pyparsing grammar gives for it (everything after the `//`)
+COMMENT_LINE_REGEX = re.compile(r"^[ \t\r]*//(?P<text>.*)$", re.MULTILINE)
+
+
+def skip_lines(section_str:str, skip_n_lines:int) -> int:
+    '''
+    finds where the `skip_n_lines` lines at the start of the given string end, this
+    matches what the `SkipTo(lineEnd, include=True)` elements in the pyparsing grammar do,
+    where every skipped element consumes exactly one line, even a blank one
+
+    the end of the string counts as the end of the last line, but only once (same as `lineEnd`), so asking
+    to skip more lines than the string has raises the same ParseException that the pyparsing grammar does
+
+    @param section_str the string we are skipping lines from
+    @param skip_n_lines the number of lines to skip
+    @return the offset into the string right after the skipped lines
+    '''
+
+    pos = 0
+
+    for iter_idx in range(skip_n_lines):
+
+        newline_pos = section_str.find("\n", pos)
+
+        if newline_pos == -1:
+
+            if iter_idx + 1 < skip_n_lines:
+                raise pyparsing.ParseException(section_str, len(section_str),
+                    f"Expected `{skip_n_lines}` lines to skip, but there are only `{iter_idx + 1}`")
+
+            return len(section_str)
+
+        pos = newline_pos + 1
+
+    return pos
+
+
+class TlScanner:
+    '''
+    a hand written, single pass, line oriented scanner for the Telegram TL file format
+
+    this is an alternative to the pyparsing grammar in `TlGrammar`, it produces the same
+    'results' (dictionaries keyed by the `constants.RESULT_NAME_*` names, just like
+    the pyparsing `ParseResults`), so `Parser` can turn either of them into the model
+    objects the same way
+
+    note: just like the pyparsing grammar, line numbers are relative to the start
+    of the string that is being scanned (so the types section or the functions section)
+
+    note: unlike the pyparsing grammar, a single definition can't be split across multiple
+    lines, the Telegram TL files never do that though
+    '''
+
+    def __init__(self, name_for_expression_after_equal:str, comments_mode:model.TlCommentsMode=model.TlCommentsMode.FULL):
+        '''
+        @param name_for_expression_after_equal the result name for the part after the `=`,
+            see `TlGrammar._build_complete_expression`
+        @param comments_mode what to do with the comments, with `NONE` no comment results are yielded
+        '''
+
+        self.name_for_expression_after_equal = name_for_expression_after_equal
+        self.comments_mode = comments_mode
+
+    def scan(self, section_str:str, skip_n_lines:int=0) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+        '''
+        scans the given section of the TL file and yields a dictionary for every
+        comment or definition that is found
+
+        @param section_str the section of the TL file to scan
+        @param skip_n_lines the number of lines to skip from the start of the string
+        @return a iterator of dictionaries describing each comment or definition
+        '''
+
+        # pyparsing's `parseString` expands tabs before it does anything, and we want
+        # to produce the same `source_line` / `comment_text` values that it does
+        if "\t" in section_str:
+            section_str = section_str.expandtabs()
+
+        start_pos = skip_lines(section_str, skip_n_lines)
+
+        # the line number that `start_pos` is on
+        line_number = section_str.count("\n", 0, start_pos) + 1
+
+        for iter_line in section_str[start_pos:].split("\n"):
+
+            yield from self.scan_line(iter_line, line_number)
+
+            line_number += 1
+
+    def scan_line(self, line:str, line_number:int) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+        '''
+        scans a single line of the TL file, yielding a dictionary for every comment or definition
+        that is on it (normally just one)
+
+        @param line the line to scan, without the trailing newline
+        @param line_number the line number to record for the results
+        @return a iterator of dictionaries describing each comment or definition
+        '''
+
+        pos = 0
+        line_len = len(line)
+
+        while True:
+
+            # skip whitespace, same as pyparsing would between tokens
+            while pos < line_len and line[pos] in WHITESPACE_CHARS:
+                pos += 1
+
+            if pos >= line_len:
+                return
+
+            if line.startswith("//", pos):
+
+                # a comment always consumes the rest of the line
+                if self.comments_mode == model.TlCommentsMode.NONE:
+                    return
+
+                yield {
+                    constants.RESULT_NAME_TL_LINE_TYPE: model.TlFileLineType.COMMENT,
+                    constants.RESULT_NAME_COMMENT_TEXT: line[pos + 2:],
+                    constants.RESULT_NAME_SOURCE_LINE: line,
+                    constants.RESULT_NAME_SOURCE_LINE_NUMBER: line_number}
+
+                return
+
+            regex_result = DEFINITION_REGEX.match(line, pos)
+
+            if regex_result is None:
+                # the same exception type the pyparsing engine raises, so callers can handle both engines the same way
+                raise pyparsing.ParseException(line, pos, f"Failed to parse line `{line_number}`, column `{pos + 1}`: `{line}`")
+
+            result = {
+                constants.RESULT_NAME_TL_LINE_TYPE: model.TlFileLineType.DEFINITION,
+                constants.RESULT_NAME_CLASS_OR_FUNCTION_NAME: regex_result.group("name"),
+                self.name_for_expression_after_equal: regex_result.group("after_equal"),
+                constants.RESULT_NAME_SOURCE_LINE: line,
+                constants.RESULT_NAME_SOURCE_LINE_NUMBER: line_number}
+
+            params_str = regex_result.group("params")
+
+            if params_str:
+                result[constants.RESULT_NAME_PARAMS] = [
+                    {constants.RESULT_NAME_PARAM_NAME: p_name, constants.RESULT_NAME_PARAM_TYPE: p_type}
+                    for p_name, p_type in PARAM_REGEX.findall(params_str)]
+
+            yield result
+
+            pos = regex_result.end()
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import pathlib
+import signal
+import socket
+import socketserver
+import typing
+
+# note: only the standard library is imported here, since the client side of this runs in
+# `parse_tl_file.py` before anything else is imported
+
+logger = logging.getLogger(__name__)
+
+# how many bytes we read from the socket at a time
+RECEIVE_BUFFER_SIZE = 64 * 1024
+
+# the requests and responses are one JSON object each, followed by a newline
+#
+# request:  {"argv": [the command line arguments], "cwd": the working directory of the client}
+# response: {"exit_code": int, "output": everything that was logged or printed while running the request}
+
+RequestHandlerFunc = typing.Callable[[typing.Sequence[str]], typing.Tuple[int, str]]
+
+
+def _read_message(sock:socket.socket) -> typing.Dict[str, typing.Any]:
+    '''
+    reads one newline terminated JSON object from the socket
+
+    @param sock the socket to read from
+    @return the decoded JSON object
+    '''
+
+    chunks = []
+
+    while True:
+        chunk = sock.recv(RECEIVE_BUFFER_SIZE)
+
+        if not chunk:
+            break
+
+        chunks.append(chunk)
+
+        if chunk.endswith(b"\n"):
+            break
+
+    data = b"".join(chunks)
+
+    if not data.endswith(b"\n"):
+        raise Exception(f"the connection was closed after `{len(data)}` bytes, before the whole message was received")
+
+    return json.loads(data)
+
+
+def _write_message(sock:socket.socket, message:typing.Dict[str, typing.Any]) -> None:
+
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+
+    def handle(self) -> None:
+
+        try:
+            request = _read_message(self.request)
+
+        except Exception as e:
+            logger.warning("ignoring a malformed request: `%s`", e)
+            return
+
+        previous_cwd = os.getcwd()
+
+        # so relative paths mean the same thing they would for the client, this is safe because the
+        # server handles one request at a time
+        try:
+            os.chdir(request["cwd"])
+            exit_code, output = self.server.handle_request_func(request["argv"])
+
+        except Exception as e:
+            logger.exception("handling the request `%s` failed", request)
+            exit_code, output = 1, f"the server failed to handle the request: `{e}`\n"
+
+        finally:
+            os.chdir(previous_cwd)
+
+        _write_message(self.request, {"exit_code": exit_code, "output": output})
+
+
+class _UnixServer(socketserver.UnixStreamServer):
+
+    def __init__(self, socket_path:pathlib.Path, handle_request_func:RequestHandlerFunc):
+
+        self.handle_request_func = handle_request_func
+        super().__init__(str(socket_path), _RequestHandler)
+
+
+def serve(socket_path:pathlib.Path, handle_request_func:RequestHandlerFunc) -> None:
+    '''
+    listens on a Unix socket, and runs the requests that `send_request` sends, one at a time, until interrupted
+
+    since the process keeps running, everything that is imported or built (like the pyparsing grammar, see
+    `TlGrammar.get_shared`) stays warm between requests
+
+    @param socket_path the path of the Unix socket, a stale socket file there is replaced
+    @param handle_request_func runs the command line arguments of a request, and returns the exit code
+        and the output
+    '''
+
+    socket_path = pathlib.Path(socket_path)
+
+    if socket_path.is_socket():
+        logger.info("removing the stale socket `%s`", socket_path)
+        socket_path.unlink()
+
+    # so being killed cleans up the same way as a ctrl+c does
+    def _interrupt(signum:int, frame:typing.Any) -> None:
+        raise KeyboardInterrupt()
+
+    signal.signal(signal.SIGTERM, _interrupt)
+
+    with _UnixServer(socket_path, handle_request_func) as server:
+
+        logger.info("listening on `%s`", socket_path)
+
+        try:
+            server.serve_forever()
+
+        except KeyboardInterrupt:
+            logger.info("interrupted, shutting down")
+
+        finally:
+            socket_path.unlink(missing_ok=True)
+
+
+def send_request(socket_path:pathlib.Path, argv:typing.Sequence[str], cwd:typing.Optional[str]=None) -> typing.Tuple[int, str]:
+    '''
+    sends command line arguments to a process started with `serve`, and waits for it to run them
+
+    @param socket_path the path of the Unix socket the server is listening on
+    @param argv the command line arguments
+    @param cwd the working directory that relative paths in `argv` are relative to, defaults to ours
+    @return the exit code and the output of running the arguments
+    '''
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+
+        sock.connect(str(socket_path))
+
+        _write_message(sock, {"argv": list(argv), "cwd": cwd if cwd is not None else os.getcwd()})
+
+        response = _read_message(sock)
+
+    return response["exit_code"], response["output"]
@@ -0,0 +1,198 @@
+import contextlib
+import json
+import logging
+import time
+import tracemalloc
+import typing
+
+import attr
+
+import telegram_tl_parser.model as model
+from telegram_tl_parser.options import RunStatsFormat
+
+logger = logging.getLogger(__name__)
+
+@attr.s(auto_attribs=True)
+class PhaseStats:
+    '''
+    the statistics `RunStats` collects for a single phase, if a phase runs more than once
+    (like parsing a section) the times are added up and the largest memory peak is kept
+    '''
+
+    name:str = attr.ib()
+    calls:int = attr.ib(default=0)
+    wall_seconds:float = attr.ib(default=0.0)
+    cpu_seconds:float = attr.ib(default=0.0)
+
+    # the peak memory allocated during the phase, above what was allocated when the phase started,
+    # None if memory isn't being tracked
+    tracemalloc_peak_bytes:typing.Optional[int] = attr.ib(default=None)
+
+
+class RunStats:
+    '''
+    collects the wall time, the CPU time and the tracemalloc peak of each phase of parsing a TL file
+    and generating output for it, plus counts of what was parsed
+
+    pass one of these to `Parser.parse` and the `Generator.write_*` methods, which record their phases
+    in it, see `phase`. Phases don't nest, each one should cover a separate part of the work.
+
+    note: tracking memory uses `tracemalloc`, which slows everything down quite a bit, so the times
+    are only comparable to other runs that also track memory
+    '''
+
+    def __init__(self, track_memory:bool=True):
+        '''
+        @param track_memory whether to record the tracemalloc peak of each phase, tracemalloc
+            is started the first time it is needed if it isn't running already
+        '''
+
+        self.track_memory = track_memory
+
+        if self.track_memory and not hasattr(tracemalloc, "reset_peak"):
+            logger.warning("tracking the memory of each phase needs `tracemalloc.reset_peak`, which needs Python 3.9 or newer")
+            self.track_memory = False
+
+        # phase name -> PhaseStats, in the order the phases first ran
+        self.phases:typing.Dict[str, PhaseStats] = dict()
+
+        # count name -> count
+        self.counts:typing.Dict[str, int] = dict()
+
+        self._started_tracemalloc = False
+        self._in_phase:typing.Optional[str] = None
+
+    @contextlib.contextmanager
+    def phase(self, name:str) -> typing.Iterator[None]:
+        '''
+        context manager that records the statistics of the code inside of it as the given phase
+
+        @param name the name of the phase, like `parse types section`
+        '''
+
+        if self._in_phase is not None:
+            raise Exception(f"can't start the phase `{name}` while the phase `{self._in_phase}` is still running")
+
+        phase_stats = self.phases.get(name)
+
+        if phase_stats is None:
+            phase_stats = PhaseStats(name=name)
+            self.phases[name] = phase_stats
+
+        memory_at_start = 0
+
+        if self.track_memory:
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+
+            tracemalloc.reset_peak()
+            memory_at_start = tracemalloc.get_traced_memory()[0]
+
+        self._in_phase = name
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        try:
+            yield
+
+        finally:
+            phase_stats.wall_seconds += time.perf_counter() - wall_start
+            phase_stats.cpu_seconds += time.process_time() - cpu_start
+            phase_stats.calls += 1
+            self._in_phase = None
+
+            if self.track_memory:
+                peak_bytes = tracemalloc.get_traced_memory()[1] - memory_at_start
+                phase_stats.tracemalloc_peak_bytes = max(peak_bytes, phase_stats.tracemalloc_peak_bytes or 0)
+
+    def stop(self) -> None:
+        '''
+        stops tracemalloc if we were the ones that started it
+        '''
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def count_file_definition(self, file_definition:model.TlFileDefinition) -> None:
+        '''
+        records the counts of definitions, parameters and comments in the given TlFileDefinition
+
+        @param file_definition the parsed TlFileDefinition
+        '''
+
+        concrete_types = [x for x in file_definition.types if x.class_type == model.TlClassTypeEnum.CONCRETE]
+        abstract_types = [x for x in file_definition.types if x.class_type == model.TlClassTypeEnum.ABSTRACT]
+
+        self.counts["concrete types"] = len(concrete_types)
+        self.counts["abstract types"] = len(abstract_types)
+        self.counts["functions"] = len(file_definition.functions)
+        self.counts["parameters"] = sum(len(x.parameters) for x in file_definition.types) + \
+            sum(len(x.parameters) for x in file_definition.functions)
+        self.counts["comments"] = sum(len(x.comments) for x in file_definition.types) + \
+            sum(len(x.comments) for x in file_definition.functions)
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        '''
+        @return the statistics as a dictionary that can be serialized as JSON
+        '''
+
+        return {
+            "phases": [attr.asdict(x) for x in self.phases.values()],
+            "totals": {
+                "wall_seconds": sum(x.wall_seconds for x in self.phases.values()),
+                "cpu_seconds": sum(x.cpu_seconds for x in self.phases.values())},
+            "counts": dict(self.counts)}
+
+    def report(self, report_format:RunStatsFormat=RunStatsFormat.TEXT) -> str:
+        '''
+        renders the statistics
+
+        @param report_format whether to render a human readable table or JSON
+        @return the report as a string
+        '''
+
+        if report_format == RunStatsFormat.JSON:
+            return json.dumps(self.to_dict(), indent=4)
+
+        name_width = max([len("phase"), len("total")] + [len(x) for x in self.phases.keys()])
+
+        lines = [f"{'phase':<{name_width}}  {'calls':>6}  {'wall (s)':>10}  {'cpu (s)':>10}  {'peak (KiB)':>12}"]
+
+        for iter_stats in self.phases.values():
+
+            if iter_stats.tracemalloc_peak_bytes is None:
+                peak_str = "-"
+            else:
+                peak_str = f"{iter_stats.tracemalloc_peak_bytes / 1024:.1f}"
+
+            lines.append(f"{iter_stats.name:<{name_width}}  {iter_stats.calls:>6}  {iter_stats.wall_seconds:>10.4f}  " +
+                f"{iter_stats.cpu_seconds:>10.4f}  {peak_str:>12}")
+
+        lines.append(f"{'total':<{name_width}}  {'':>6}  {sum(x.wall_seconds for x in self.phases.values()):>10.4f}  " +
+            f"{sum(x.cpu_seconds for x in self.phases.values()):>10.4f}")
+
+        if self.counts:
+            lines.append("")
+
+            for iter_name, iter_count in self.counts.items():
+                lines.append(f"{iter_name}: {iter_count}")
+
+        return "\n".join(lines)
+
+
+def phase(run_stats:typing.Optional[RunStats], name:str) -> typing.ContextManager[None]:
+    '''
+    helper so callers don't have to check if they were given a RunStats or not
+
+    @param run_stats the RunStats to record the phase in, or None
+    @param name the name of the phase
+    @return `run_stats.phase(name)`, or a context manager that does nothing if `run_stats` is None
+    '''
+
+    if run_stats is None:
+        return contextlib.nullcontext()
+
+    return run_stats.phase(name)
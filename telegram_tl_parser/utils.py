@@ -1,4 +1,14 @@
+import bisect
+import contextlib
+import functools
+import hashlib
 import logging
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import typing
 
 import pyparsing
 
@@ -56,22 +66,76 @@ def strip_margin(string:str, preserve_newlines:bool=False, strip_characters:str=
     else:
         return " ".join(result_list)
 
-def pyparsingLoggingStartDebugAction(instring, loc, expr):
+class LineIndex:
+    '''
+    a table of the offsets where each line of a string starts, used to turn a
+    location in the string into a line, line number or column
+
+    `pyparsing.line`, `pyparsing.lineno` and `pyparsing.col` all rescan the string
+    from the start every time they are called, so calling them for every match makes
+    parsing quadratic in the size of the file. This builds the table once and then
+    uses a binary search, and returns the same values as the pyparsing functions
+
+    see `TlGrammar.line_index_scope` for how one index is shared by every parse action of a `parseString` call
+    '''
+
+    def __init__(self, string:str):
+        '''
+        @param string the string to build the index for
+        '''
+
+        self.string = string
+
+        line_starts = [0]
+        pos = string.find("\n")
+
+        while pos != -1:
+            line_starts.append(pos + 1)
+            pos = string.find("\n", pos + 1)
+
+        self.line_starts = line_starts
+
+    def lineno(self, loc:int) -> int:
+        ''' returns the 1 based line number of the given location, same as `pyparsing.lineno` '''
+
+        return bisect.bisect_right(self.line_starts, loc)
+
+    def col(self, loc:int) -> int:
+        ''' returns the 1 based column of the given location, same as `pyparsing.col` '''
+
+        return loc - self.line_starts[bisect.bisect_right(self.line_starts, loc) - 1] + 1
+
+    def line(self, loc:int) -> str:
+        ''' returns the line the given location is on, without the newline, same as `pyparsing.line` '''
+
+        line_idx = bisect.bisect_right(self.line_starts, loc)
+        start = self.line_starts[line_idx - 1]
 
-    row = pyparsing.lineno(loc, instring)
-    col = pyparsing.col(loc, instring)
+        if line_idx < len(self.line_starts):
+            return self.string[start:self.line_starts[line_idx] - 1]
+        else:
+            return self.string[start:]
+
+
+def pyparsingLoggingStartDebugAction(instring, loc, expr, cache_hit=False, line_index_for=LineIndex):
+
+    line_index = line_index_for(instring)
+    row = line_index.lineno(loc)
+    col = line_index.col(loc)
 
     pplogger.debug("Match Start: expr: `%s` at loc `%s`, row: `%d`, col: `%d`",
         expr, loc, row, col)
 
 
-def pyparsingLoggingSuccessDebugAction(instring, startloc, endloc, expr, toks):
+def pyparsingLoggingSuccessDebugAction(instring, startloc, endloc, expr, toks, cache_hit=False, line_index_for=LineIndex):
 
-    row_start = pyparsing.lineno(startloc, instring)
-    col_start = pyparsing.col(startloc, instring)
+    line_index = line_index_for(instring)
 
-    row_end = pyparsing.lineno(endloc, instring)
-    col_end = pyparsing.col(endloc, instring)
+    row_start = line_index.lineno(startloc)
+    col_start = line_index.col(startloc)
+
+    row_end = line_index.lineno(endloc)
+    col_end = line_index.col(endloc)
 
     pplogger.debug(strip_margin('''Match Success: expr: `%s`, startLoc: `%s`,
         | startRow: `%s`, startCol: `%s`, endLoc: `%s`, endRow: `%s`, endCol:
@@ -86,26 +150,299 @@ def pyparsingLoggingSuccessDebugAction(instring, startloc, endloc, expr, toks):
         len(toks.asList()))
 
 
-def pyparsingLoggingExceptionDebugAction(instring, loc, expr, exc):
+def pyparsingLoggingExceptionDebugAction(instring, loc, expr, exc, cache_hit=False, line_index_for=LineIndex):
 
-    row = pyparsing.lineno(loc, instring)
-    col = pyparsing.col(loc, instring)
+    line_index = line_index_for(instring)
+    row = line_index.lineno(loc)
+    col = line_index.col(loc)
 
     pplogger.error("Caught Exception: expr: `%s`, loc: `%s`,  row: `%d`, col: `%d`, exception: `%s`",
         expr, loc, row, col, exc)
 
 
-def setLoggingDebugActionForParserElement(parser_element:pyparsing.ParserElement) -> None:
+def setLoggingDebugActionForParserElement(
+    parser_element:pyparsing.ParserElement,
+    line_index_for:typing.Callable[[str], LineIndex]=LineIndex) -> None:
     '''
     helper function to set up the custom debug actions for a ParserElement with our
     own functions that use the logging framework rather than `print()`
 
     this also calls setDebug(True) for the parser element as well
+
+    @param parser_element the element to log the match attempts of
+    @param line_index_for returns the LineIndex for the string being parsed, pass `TlGrammar._line_index_for` so
+        the debug actions share the index the parse actions build, rather than building one for every match attempt
     '''
 
     parser_element.setDebug(True)
 
     parser_element.setDebugActions(
-        pyparsingLoggingStartDebugAction,
-        pyparsingLoggingSuccessDebugAction,
-        pyparsingLoggingExceptionDebugAction)
\ No newline at end of file
+        functools.partial(pyparsingLoggingStartDebugAction, line_index_for=line_index_for),
+        functools.partial(pyparsingLoggingSuccessDebugAction, line_index_for=line_index_for),
+        functools.partial(pyparsingLoggingExceptionDebugAction, line_index_for=line_index_for))
+
+
+# packrat mode is a class level switch on ParserElement, so only one `pyparsing_packrat` block can have it on at a time
+_packrat_lock = threading.Lock()
+
+@contextlib.contextmanager
+def pyparsing_packrat(cache_size_limit:int) -> typing.Iterator[None]:
+    '''
+    turns on pyparsing's packrat (memoization) mode for the duration of the `with` block, and turns it back
+    off (and drops the cache) afterwards, so it doesn't leak into every other parse in the process
+
+    pyparsing only has a process wide switch for this, so parses on other threads will see it while the block
+    runs. If packrat mode was already on when the block started, it is left on
+
+    @param cache_size_limit the maximum number of entries in the packrat cache
+    '''
+
+    with _packrat_lock:
+
+        if pyparsing.ParserElement._packratEnabled:
+            yield
+            return
+
+        pyparsing.ParserElement.enablePackrat(cache_size_limit=cache_size_limit)
+
+        try:
+            yield
+
+        finally:
+            # pyparsing 2.x has no `disable_memoization`, so undo what `enablePackrat` did by hand
+            pyparsing.ParserElement.resetCache()
+            pyparsing.ParserElement._packratEnabled = False
+            pyparsing.ParserElement._parse = pyparsing.ParserElement._parseNoCache
+
+class GrammarElementStats:
+    '''
+    the statistics `GrammarProfiler` collects for a single (named) element of the grammar
+    '''
+
+    __slots__ = ("name", "attempts", "matches", "failures", "total_time")
+
+    def __init__(self, name:str):
+        self.name = name
+        self.attempts = 0
+        self.matches = 0
+        self.failures = 0
+        self.total_time = 0.0
+
+
+class GrammarProfiler:
+    '''
+    collects how many match attempts, matches and failures each element of a pyparsing grammar
+    has, and how much time is spent in each of them
+
+    this works by setting debug actions on each element, see `attach`, so it replaces any
+    debug logging that was set on them. Elements are grouped by their name, and the time for
+    an element includes the time spent in the elements it contains
+    '''
+
+    def __init__(self):
+
+        # name of the element -> GrammarElementStats
+        self.element_stats:typing.Dict[str, GrammarElementStats] = dict()
+
+        # the start time of every match attempt that is still in progress
+        self._start_times:typing.List[float] = []
+
+    def attach(self, parser_element:pyparsing.ParserElement) -> None:
+        '''
+        sets the debug actions on the ParserElement so that it gets profiled
+
+        @param parser_element the element to profile
+        '''
+
+        parser_element.setDebug(True)
+
+        parser_element.setDebugActions(
+            self._start_action,
+            self._success_action,
+            self._exception_action)
+
+    def _stats_for(self, expr:pyparsing.ParserElement) -> GrammarElementStats:
+
+        name = str(expr)
+        stats = self.element_stats.get(name)
+
+        if stats is None:
+            stats = GrammarElementStats(name)
+            self.element_stats[name] = stats
+
+        return stats
+
+    def _elapsed(self) -> float:
+
+        if not self._start_times:
+            return 0.0
+
+        return time.perf_counter() - self._start_times.pop()
+
+    def _start_action(self, instring, loc, expr, cache_hit=False):
+
+        self._stats_for(expr).attempts += 1
+        self._start_times.append(time.perf_counter())
+
+    def _success_action(self, instring, startloc, endloc, expr, toks, cache_hit=False):
+
+        stats = self._stats_for(expr)
+        stats.matches += 1
+        stats.total_time += self._elapsed()
+
+    def _exception_action(self, instring, loc, expr, exc, cache_hit=False):
+
+        stats = self._stats_for(expr)
+        stats.failures += 1
+        stats.total_time += self._elapsed()
+
+    def report(self) -> str:
+        '''
+        returns a human readable table of the collected statistics, sorted so the elements
+        that took the most time are first
+
+        @return the report as a string
+        '''
+
+        name_width = max([len("element")] + [len(x) for x in self.element_stats.keys()])
+
+        lines = [f"{'element':<{name_width}}  {'attempts':>10}  {'matches':>10}  {'failures':>10}  {'time (s)':>10}"]
+
+        for iter_stats in sorted(self.element_stats.values(), key=lambda x: x.total_time, reverse=True):
+            lines.append(f"{iter_stats.name:<{name_width}}  {iter_stats.attempts:>10}  {iter_stats.matches:>10}  " +
+                f"{iter_stats.failures:>10}  {iter_stats.total_time:>10.4f}")
+
+        return "\n".join(lines)
+
+
+# the buffer size used by `atomic_write`, large enough that writing the output
+# one class or definition at a time doesn't turn into lots of tiny writes
+ATOMIC_WRITE_BUFFER_SIZE = 1024 * 1024
+
+def _read_umask() -> int:
+    ''' returns the umask of the process, the only way to read it is to set it, so this is only called once '''
+
+    current_umask = os.umask(0)
+    os.umask(current_umask)
+
+    return current_umask
+
+# the permissions `atomic_write` gives its files, the ones a normal `open()` would. The umask is read once at import
+# time, as setting it (even just to read it) changes it for every thread in the process for a moment
+ATOMIC_WRITE_FILE_MODE = 0o666 & ~_read_umask()
+
+# how many bytes `file_fingerprint` reads at a time
+FINGERPRINT_CHUNK_SIZE = 1024 * 1024
+
+
+class WriteStats:
+    '''
+    collects which files `atomic_write` replaced, and which ones it left alone because they already had the
+    contents that were written, so a run can report how many of each there were
+    '''
+
+    def __init__(self):
+
+        self.written_paths:typing.List[pathlib.Path] = []
+        self.unchanged_paths:typing.List[pathlib.Path] = []
+
+    def summary(self) -> str:
+        '''
+        @return a short human readable summary, like `3 written, 40 unchanged`
+        '''
+
+        return f"{len(self.written_paths)} written, {len(self.unchanged_paths)} unchanged"
+
+
+def file_fingerprint(path:pathlib.Path) -> str:
+    '''
+    @param path the file to fingerprint
+    @return the sha256 of the file's contents, as a hex string
+    '''
+
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for iter_chunk in iter(lambda: f.read(FINGERPRINT_CHUNK_SIZE), b""):
+            digest.update(iter_chunk)
+
+    return digest.hexdigest()
+
+
+def files_have_same_contents(first_path:pathlib.Path, second_path:pathlib.Path) -> bool:
+    '''
+    compares the sizes of the two files first, and only fingerprints them if the sizes are the same
+
+    @param first_path the first file
+    @param second_path the second file, which doesn't have to exist
+    @return whether both files exist and have the same contents
+    '''
+
+    try:
+        if os.stat(first_path).st_size != os.stat(second_path).st_size:
+            return False
+
+    except FileNotFoundError:
+        return False
+
+    return file_fingerprint(first_path) == file_fingerprint(second_path)
+
+
+@contextlib.contextmanager
+def atomic_write(path:pathlib.Path,
+    binary:bool=False,
+    encoding:str="utf-8",
+    skip_unchanged:bool=False,
+    write_stats:typing.Optional[WriteStats]=None) -> typing.Iterator[typing.IO]:
+    '''
+    context manager that opens a temporary file next to `path` for writing, and renames it over `path` once the
+    `with` block finishes without an exception. If there is an exception the temporary file is removed instead,
+    so `path` is either the old file or the complete new one, never a half written one
+
+    with `skip_unchanged`, if `path` already has exactly the contents that were written, the temporary file is
+    removed and `path` isn't touched at all, so its modification time stays the same and anything that depends
+    on it (bytecode compilation, type checkers, build steps) doesn't have to redo its work
+
+    @param path the file we ultimately want to write
+    @param binary if True the file is opened in binary mode, else in text mode
+    @param encoding the encoding to use for text mode
+    @param skip_unchanged if True, leave `path` alone if its contents wouldn't change
+    @param write_stats if provided, `path` is recorded in it as either written or unchanged
+    @return the file object to write to
+    '''
+
+    path = pathlib.Path(path)
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+
+    try:
+        if binary:
+            f = os.fdopen(fd, "wb", buffering=ATOMIC_WRITE_BUFFER_SIZE)
+        else:
+            f = os.fdopen(fd, "w", buffering=ATOMIC_WRITE_BUFFER_SIZE, encoding=encoding)
+
+        with f:
+            yield f
+
+        if skip_unchanged and files_have_same_contents(tmp_path, path):
+
+            logger.debug("`%s` is unchanged, leaving it alone", path)
+
+            pathlib.Path(tmp_path).unlink()
+
+            if write_stats is not None:
+                write_stats.unchanged_paths.append(path)
+
+            return
+
+        # mkstemp creates the file as 0600, give it the permissions a normal `open()` would
+        os.chmod(tmp_path, ATOMIC_WRITE_FILE_MODE)
+
+        os.replace(tmp_path, path)
+
+        if write_stats is not None:
+            write_stats.written_paths.append(path)
+
+    except BaseException:
+        pathlib.Path(tmp_path).unlink(missing_ok=True)
+        raise